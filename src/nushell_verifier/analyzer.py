@@ -1,36 +1,71 @@
-from typing import List, Optional
-from .models import Config, ScriptAnalysis, ScriptFile, ReleaseInfo, CompatibilityMethod
-from .scanner import NuShellScriptScanner
+import asyncio
+import bisect
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from types import MappingProxyType
+from collections.abc import Awaitable, Callable
+from .models import (
+    CompatibilityIssue,
+    CompatibilityMethod,
+    Config,
+    ReleaseInfo,
+    ScriptAnalysis,
+    ScriptFile,
+)
+from .scanner import NuShellScriptScanner, split_by_target_version
 from .github_client import GitHubClient
-from .llm_client import LLMClient
-from .version_manager import VersionManager
-from .cache import InstructionCache
-from .progress import BatchProgressManager, estimate_tokens_for_script, StreamingProgressCallback
+from .llm_client import LLMClient, count_tokens
+from .version_manager import VersionManager, parse_version
+from .cache import AnalysisCache, InstructionCache, ResponseCache
+from .progress import (
+    BatchProgressManager,
+    ProgressConfig,
+    ScriptProgressManager,
+    SharedProgressManager,
+    StreamingProgressCallback,
+    estimate_tokens_for_script,
+)
 
 
 class NuShellAnalyzer:
     """Main analyzer for NuShell script compatibility."""
 
+    SEVERITY_ICONS = MappingProxyType({
+        "error": "❌",
+        "warning": "⚠️",
+        "info": "ℹ️"
+    })
+
     def __init__(self, config: Config, disable_progress: bool = False):
         """Initialize analyzer with configuration."""
         self.config = config
         self.disable_progress = disable_progress
         self.scanner = NuShellScriptScanner(config.scan_directories)
-        self.github_client = GitHubClient(config.github_token)
+        self.github_client = GitHubClient(
+            config.github_token,
+            response_cache=ResponseCache() if config.cache_enabled else None
+        )
         self.llm_client = LLMClient(config)
         self.version_manager = VersionManager()
         self.cache = InstructionCache() if config.cache_enabled else None
+        self.analysis_cache = AnalysisCache() if config.cache_enabled else None
 
-        # Show GitHub token status
-        if self.github_client.github_token:
-            if config.github_token:
-                print("Using GitHub token from configuration")
-            else:
-                print("Using GitHub token from GitHub CLI (gh auth token)")
-        else:
-            print("Warning: No GitHub token available - API rate limits may apply")
+    def close(self) -> None:
+        """Release network resources held by the analyzer."""
+        self.llm_client.close()
+        self.github_client.close()
+
+    def __enter__(self) -> "NuShellAnalyzer":
+        return self
 
-    def analyze_scripts(self, target_version: Optional[str] = None) -> List[ScriptAnalysis]:
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def analyze_scripts(self, target_version: str | None = None) -> list[ScriptAnalysis]:
         """Analyze all scripts for compatibility with target version."""
         # Get target version (latest if not specified)
         if target_version is None:
@@ -57,203 +92,634 @@ class NuShellAnalyzer:
         releases = self.github_client.get_releases_between(earliest_version, target_version)
         print(f"Processing {len(releases)} release(s)")
 
-        # Convert blog posts to compatibility instructions
-        compatibility_instructions = []
-        cache_hits = 0
-        cache_misses = 0
-
-        for release in releases:
-            print(f"Processing release {release.version}...")
-
-            # Check cache first
-            cached_instructions = None
-            if self.cache:
-                cached_instructions = self.cache.get_cached_instructions(
-                    release.version,
-                    f"{self.config.llm_provider}/{self.config.llm_model}"
-                )
-
-            if cached_instructions:
-                print("  ✓ Using cached compatibility instructions")
-                release.compatibility_instructions = cached_instructions
-                compatibility_instructions.append(cached_instructions)
-                cache_hits += 1
-            else:
-                # Cache miss - fetch and process
-                cache_misses += 1
-                blog_content = self.github_client.fetch_blog_post_content(release)
-                if blog_content:
-                    print("  Generating compatibility instructions...")
-                    instructions = self.llm_client.convert_blog_to_instructions(release, blog_content)
-                    release.compatibility_instructions = instructions
-                    compatibility_instructions.append(instructions)
-
-                    # Save to cache
-                    if self.cache:
-                        self.cache.save_instructions(
-                            release.version,
-                            instructions,
-                            f"{self.config.llm_provider}/{self.config.llm_model}"
-                        )
-                        print("  ✓ Cached instructions for future use")
-                else:
-                    print(f"  Warning: Could not fetch blog post for {release.version}")
-
-        # Show cache statistics if cache is enabled
-        if self.cache and len(releases) > 0:
-            print(f"Cache performance: {cache_hits} hits, {cache_misses} misses")
+        # Use cached compatibility instructions; the rest are generated while
+        # scripts are being analyzed
+        missing_releases = self._load_cached_instructions(releases)
 
         # Analyze each script with real-time progress
         results = []
-        from .progress import ProgressConfig
         progress_config = ProgressConfig(enabled=not self.disable_progress)
         batch_progress = BatchProgressManager(len(scripts), progress_config)
 
-        for script in scripts:
+        # Scripts already compatible with (or newer than) the target version are skipped
+        compatible_scripts, pending_scripts = split_by_target_version(scripts, target_version)
+        for script in compatible_scripts:
             script_progress = batch_progress.start_script(script.path.name)
-
             with script_progress:
                 script_progress.set_phase("Checking version compatibility")
+                script_progress.complete()
+            print(f"⏭️  {script.path.name} - Already compatible (v{script.compatible_version} >= v{target_version})")
+
+            # Create analysis result for already compatible script
+            analysis = ScriptAnalysis(
+                script=script,
+                target_version=target_version,
+                issues=[],
+                is_compatible=True
+            )
+            results.append(analysis)
+
+        if pending_scripts or missing_releases:
+            results.extend(asyncio.run(self._run_analysis_pipeline(
+                pending_scripts, target_version, releases, missing_releases, batch_progress
+            )))
 
-                # Check if script is already compatible or newer than target version
-                if self.version_manager.is_version_same_or_after(script.compatible_version, target_version):
-                    script_progress.complete()
-                    print(f"⏭️  {script.path.name} - Already compatible (v{script.compatible_version} >= v{target_version})")
-
-                    # Create analysis result for already compatible script
-                    analysis = ScriptAnalysis(
-                        script=script,
-                        target_version=target_version,
-                        issues=[],
-                        is_compatible=True
-                    )
-                    results.append(analysis)
-                    continue
+        # Show batch summary
+        print(f"\n{batch_progress.get_batch_summary()}")
 
-                # Estimate tokens for this script
-                estimated_tokens = estimate_tokens_for_script(script.path)
-                script_progress.set_phase("Preparing analysis", estimated_tokens)
+        return results
 
-                # Get relevant instructions for this script's version range
-                script_instructions = self._get_relevant_instructions(
-                    script, target_version, releases
+    async def _run_analysis_pipeline(
+        self,
+        scripts: list[ScriptFile],
+        target_version: str,
+        releases: list[ReleaseInfo],
+        missing_releases: list[ReleaseInfo],
+        batch_progress: BatchProgressManager
+    ) -> list[ScriptAnalysis]:
+        """Generate missing instructions and analyze scripts as an overlapping pipeline.
+
+        Each script waits only for the releases newer than its compatible version,
+        so analysis starts as soon as the instructions it needs are available.
+        """
+        # Requests block in worker threads, and the default executor (sized by CPU
+        # count) would cap concurrency below the configured limit on small machines.
+        # Leave room for instruction generation and cache I/O alongside analysis.
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=2 * max(1, self.config.max_concurrency) + 4)
+        )
+
+        ready = {release.version: asyncio.Event() for release in missing_releases}
+        pending_instructions: dict[str, asyncio.Future] = {}
+
+        async def wait_for_instructions(version: str) -> list[str]:
+            version_key = parse_version(version)
+            await asyncio.gather(*(
+                ready[release.version].wait()
+                for release in missing_releases
+                if release.version_key > version_key
+            ))
+            return self._get_relevant_instructions_by_version(releases, {version})[version]
+
+        def instructions_for(version: str) -> asyncio.Future:
+            # Scripts sharing a compatible version share a single lookup
+            if version not in pending_instructions:
+                pending_instructions[version] = asyncio.ensure_future(wait_for_instructions(version))
+            return pending_instructions[version]
+
+        # Async connections belong to this event loop, so they're closed before it ends
+        async with self.llm_client.async_requests():
+            if self.config.batch_mode and self.llm_client.supports_batch():
+                # Batch jobs are submitted once, so all instructions must be ready first
+                await self._generate_instructions(missing_releases, ready)
+                return await asyncio.to_thread(
+                    self._analyze_scripts_batch_job, scripts, target_version, releases, batch_progress
                 )
 
-                script_progress.set_phase("Analyzing compatibility", estimated_tokens)
+            _, results = await asyncio.gather(
+                self._generate_instructions(missing_releases, ready),
+                self._analyze_scripts_concurrently(
+                    scripts, target_version, instructions_for, batch_progress
+                )
+            )
+            return results
+
+    async def _analyze_scripts_concurrently(
+        self,
+        scripts: list[ScriptFile],
+        target_version: str,
+        instructions_for: Callable[[str], Awaitable[list[str]]],
+        batch_progress: BatchProgressManager
+    ) -> list[ScriptAnalysis]:
+        """Analyze scripts concurrently, bounded by the configured concurrency limit."""
+        if not scripts:
+            return []
 
-                # Create streaming callback for real-time progress
-                callback = StreamingProgressCallback(script_progress)
+        groups = self._group_scripts_for_requests(scripts)
+        concurrency = max(1, min(self.config.max_concurrency, len(groups)))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        # alive_progress cannot draw overlapping bars, so scripts analyzed at the
+        # same time report to one shared bar, and per-script bars are only shown
+        # when scripts are analyzed one at a time
+        shared_progress = None
+        if concurrency > 1:
+            shared_progress = SharedProgressManager(f"{len(scripts)} scripts", batch_progress.config)
+
+        async def analyze_group(group: list[ScriptFile]) -> list[ScriptAnalysis]:
+            # Scripts in a group share a compatible version, and thus instructions
+            script_instructions = await instructions_for(group[0].compatible_version)
+            cached, group, cache_keys = await asyncio.to_thread(
+                self._load_cached_analyses, group, target_version, script_instructions, batch_progress
+            )
+            if not group:
+                return cached
+
+            async with semaphore:
+                if len(group) == 1:
+                    analyses = [await asyncio.to_thread(
+                        self._analyze_script, group[0], target_version, script_instructions,
+                        batch_progress, shared_progress
+                    )]
+                else:
+                    analyses = await asyncio.to_thread(
+                        self._analyze_script_group, group, target_version, script_instructions,
+                        batch_progress, shared_progress
+                    )
+
+            await asyncio.to_thread(self._save_analyses, analyses, cache_keys)
+            return cached + analyses
 
-                def token_callback(token: str):
-                    """Handle streaming tokens with progress updates."""
-                    if token.startswith("__USAGE__"):
-                        # Extract usage info if available
-                        try:
-                            # Handle usage updates if needed
-                            pass
-                        except Exception:
-                            pass
-                    else:
-                        callback.on_token(token)
+        if shared_progress is None:
+            group_results = await asyncio.gather(*(analyze_group(group) for group in groups))
+        else:
+            with shared_progress:
+                shared_progress.set_phase("Analyzing compatibility")
+                group_results = await asyncio.gather(*(analyze_group(group) for group in groups))
+                shared_progress.complete()
+        return [analysis for group_result in group_results for analysis in group_result]
+
+    def _analyze_scripts_batch_job(
+        self,
+        scripts: list[ScriptFile],
+        target_version: str,
+        releases: list[ReleaseInfo],
+        batch_progress: BatchProgressManager
+    ) -> list[ScriptAnalysis]:
+        """Analyze scripts in a single LLM batch job.
+
+        Scripts whose batch requests failed are analyzed individually instead.
+        """
+        if not scripts:
+            return []
 
-                # Analyze script with streaming support
+        instructions_by_version = self._get_relevant_instructions_by_version(
+            releases, {script.compatible_version for script in scripts}
+        )
+
+        results = []
+        analyses = []
+        cache_keys: dict[Path, str] = {}
+        for version, script_instructions in instructions_by_version.items():
+            cached, uncached, keys = self._load_cached_analyses(
+                [script for script in scripts if script.compatible_version == version],
+                target_version, script_instructions, batch_progress
+            )
+            results.extend(cached)
+            cache_keys.update(keys)
+            analyses.extend((script, script_instructions) for script in uncached)
+
+        if not analyses:
+            return results
+
+        print(f"Submitting {len(analyses)} script(s) as a batch job, this may take a while...")
+        issues_by_path = self.llm_client.analyze_scripts_batch_job(analyses, target_version)
+
+        analyzed = []
+        for script, script_instructions in analyses:
+            issues = issues_by_path.get(str(script.path))
+            if issues is None:
+                analyzed.append(self._analyze_script(
+                    script, target_version, script_instructions, batch_progress
+                ))
+            else:
+                batch_progress.start_script(script.path.name, disable_progress=True)
+                analyzed.append(self._report_script_analysis(script, target_version, issues))
+
+        self._save_analyses(analyzed, cache_keys)
+        return results + analyzed
+
+    def _load_cached_analyses(
+        self,
+        scripts: list[ScriptFile],
+        target_version: str,
+        script_instructions: list[str],
+        batch_progress: BatchProgressManager
+    ) -> tuple[list[ScriptAnalysis], list[ScriptFile], dict[Path, str]]:
+        """Report scripts whose analysis is cached and return the ones still to analyze.
+
+        Returns the cached analyses, the uncached scripts and the cache keys of the
+        uncached scripts. Keys are computed before analysis, since a compatible
+        script's version comment is updated afterwards.
+        """
+        if not self.analysis_cache:
+            return [], scripts, {}
+
+        model_key = f"{self.config.llm_provider}/{self.config.llm_model}"
+        instructions_digest = AnalysisCache.hash_instructions(script_instructions)
+        cached = []
+        uncached = []
+        cache_keys = {}
+        for script in scripts:
+            try:
+                # The content is kept on the script, so the prompt doesn't read it again
+                script_content = script.read_content().encode("utf-8")
+            except OSError:
+                uncached.append(script)
+                continue
+
+            key = AnalysisCache.make_key(
+                model_key, target_version, script.compatible_version,
+                instructions_digest, script_content
+            )
+            issues = self.analysis_cache.get(key)
+            if issues is None:
+                uncached.append(script)
+                cache_keys[script.path] = key
+                continue
+
+            batch_progress.start_script(script.path.name, disable_progress=True)
+            cached.append(self._report_script_analysis(
+                script, target_version, [CompatibilityIssue(**issue) for issue in issues]
+            ))
+
+        return cached, uncached, cache_keys
+
+    def _save_analyses(self, analyses: list[ScriptAnalysis], cache_keys: dict[Path, str]) -> None:
+        """Save analysis results under the keys computed before the scripts were analyzed."""
+        if not self.analysis_cache:
+            return
+
+        for analysis in analyses:
+            key = cache_keys.get(analysis.script.path)
+            if key:
+                self.analysis_cache.save(key, [asdict(issue) for issue in analysis.issues])
+
+    def _group_scripts_for_requests(self, scripts: list[ScriptFile]) -> list[list[ScriptFile]]:
+        """Group scripts that can be analyzed together in a single LLM request.
+
+        Only scripts with the same compatible version (and therefore the same
+        instructions) are grouped, up to max_scripts_per_request scripts and the
+        LLM client's token budget per group.
+        """
+        limit = self.config.max_scripts_per_request
+        if limit <= 1:
+            return [[script] for script in scripts]
+
+        by_version: dict[str, list[ScriptFile]] = {}
+        for script in scripts:
+            by_version.setdefault(script.compatible_version, []).append(script)
+
+        groups = []
+        for same_version in by_version.values():
+            group: list[ScriptFile] = []
+            group_tokens = 0
+            for script in same_version:
+                if script.size is None:
+                    # Keep the size, so reading and token estimates later don't repeat the lookup
+                    try:
+                        script.size = script.path.stat().st_size
+                    except OSError:
+                        pass
+                # Roughly 4 characters per token
+                script_tokens = script.size // 4 if script.size is not None else 0
+
+                if group and (
+                    len(group) >= limit
+                    or group_tokens + script_tokens > self.llm_client.SCRIPT_BATCH_TOKEN_BUDGET
+                ):
+                    groups.append(group)
+                    group, group_tokens = [], 0
+
+                group.append(script)
+                group_tokens += script_tokens
+
+            if group:
+                groups.append(group)
+
+        return groups
+
+    def _analyze_script(
+        self,
+        script: ScriptFile,
+        target_version: str,
+        script_instructions: list[str],
+        batch_progress: BatchProgressManager,
+        shared_progress: SharedProgressManager | None = None
+    ) -> ScriptAnalysis:
+        """Analyze a single script with the LLM and report its results immediately.
+
+        With shared_progress, the script gets no bar of its own and its tokens and
+        issues are reported to the shared bar instead.
+        """
+        script_progress = batch_progress.start_script(
+            script.path.name, disable_progress=shared_progress is not None
+        )
+        progress = shared_progress or script_progress
+
+        with script_progress:
+            # Estimate tokens for this script. The estimate is only shown on a
+            # progress bar, so the script is only tokenized when one is shown;
+            # otherwise its size (about 4 characters per token) is enough
+            if progress.disabled:
+                script_tokens = None
+            else:
                 try:
-                    issues = self.llm_client.analyze_script_compatibility_streaming(
-                        script, target_version, script_instructions,
-                        progress_callback=token_callback
-                    )
-                except AttributeError:
-                    # Fallback to non-streaming if streaming not available
-                    issues = self.llm_client.analyze_script_compatibility(
-                        script, target_version, script_instructions
+                    script_tokens = count_tokens(
+                        f"{self.config.llm_provider}/{self.config.llm_model}", script.read_content()
                     )
+                except OSError:
+                    script_tokens = None
+            estimated_tokens = estimate_tokens_for_script(script.path, script.size, script_tokens)
+            script_progress.set_phase("Preparing analysis", estimated_tokens)
+
+            script_progress.set_phase("Analyzing compatibility", estimated_tokens)
+            if shared_progress is not None:
+                shared_progress.add_estimate(estimated_tokens)
+
+            # Create streaming callback for real-time progress
+            callback = StreamingProgressCallback(progress)
+
+            def token_callback(token: str):
+                """Handle streaming tokens with progress updates."""
+                # The final usage report is skipped; the token count shown is
+                # estimated from the streamed content
+                if not token.startswith("__USAGE__"):
+                    callback.on_token(token)
+
+            # Analyze script with streaming support
+            issues = self.llm_client.analyze_script_compatibility_streaming(
+                script, target_version, script_instructions,
+                progress_callback=token_callback,
+                issue_callback=lambda issue: progress.add_issue()
+            )
+
+            script_progress.complete()
+
+        return self._report_script_analysis(script, target_version, issues)
+
+    def _analyze_script_group(
+        self,
+        scripts: list[ScriptFile],
+        target_version: str,
+        script_instructions: list[str],
+        batch_progress: BatchProgressManager,
+        shared_progress: SharedProgressManager | None = None
+    ) -> list[ScriptAnalysis]:
+        """Analyze scripts sharing the same instructions with a single LLM request.
+
+        Falls back to analyzing the scripts one by one if the batched response
+        can't be matched back to the individual scripts.
+        """
+        script_names = ", ".join(script.path.name for script in scripts)
+        group_progress = ScriptProgressManager(
+            script_names, batch_progress.config, disable_progress=shared_progress is not None
+        )
 
-                is_compatible = len(issues) == 0
-                analysis = ScriptAnalysis(
-                    script=script,
-                    target_version=target_version,
-                    issues=issues,
-                    is_compatible=is_compatible
+        try:
+            with group_progress:
+                group_progress.set_phase(f"Analyzing {len(scripts)} scripts together")
+                issues_per_script = self.llm_client.analyze_scripts_batch(
+                    scripts, target_version, script_instructions
+                )
+                group_progress.complete()
+        except (ValueError, AttributeError):
+            return [
+                self._analyze_script(
+                    script, target_version, script_instructions, batch_progress, shared_progress
                 )
-                results.append(analysis)
+                for script in scripts
+            ]
 
-                script_progress.complete()
+        # Count the scripts towards the batch progress only once they've been analyzed
+        for script in scripts:
+            batch_progress.start_script(script.path.name, disable_progress=True)
+
+        return [
+            self._report_script_analysis(script, target_version, issues)
+            for script, issues in zip(scripts, issues_per_script)
+        ]
+
+    def _report_script_analysis(
+        self, script: ScriptFile, target_version: str, issues: list
+    ) -> ScriptAnalysis:
+        """Report a script's results immediately and update its version comment if compatible."""
+        is_compatible = len(issues) == 0
+        analysis = ScriptAnalysis(
+            script=script,
+            target_version=target_version,
+            issues=issues,
+            is_compatible=is_compatible
+        )
+
+        # Show immediate results for this script
+        if is_compatible:
+            print(f"✅ {script.path.name} - Compatible with {target_version}")
+        else:
+            print(f"⚠️  {script.path.name} - {len(issues)} issue(s) found")
+            self._display_immediate_script_results(script, issues)
 
-                # Show immediate results for this script
-                if is_compatible:
-                    print(f"✅ {script.path.name} - Compatible with {target_version}")
-                else:
-                    print(f"⚠️  {script.path.name} - {len(issues)} issue(s) found")
-                    self._display_immediate_script_results(script, issues)
+        # Update version comment if compatible
+        if is_compatible and script.method is not CompatibilityMethod.DIRECTORY_FILE:
+            self._update_script_version_comment(script, target_version)
 
-                # Update version comment if compatible
-                if is_compatible and script.method != CompatibilityMethod.DIRECTORY_FILE:
-                    self._update_script_version_comment(script, target_version)
+        return analysis
 
-        # Show batch summary
-        print(f"\n{batch_progress.get_batch_summary()}")
+    def _prepare_release_instructions(self, releases: list[ReleaseInfo]) -> None:
+        """Populate compatibility instructions for releases from cache or the LLM."""
+        missing_releases = self._load_cached_instructions(releases)
+        asyncio.run(self._generate_instructions(missing_releases))
 
-        return results
+    def _load_cached_instructions(self, releases: list[ReleaseInfo]) -> list[ReleaseInfo]:
+        """Populate cached compatibility instructions and return the releases still missing them."""
+        model_key = f"{self.config.llm_provider}/{self.config.llm_model}"
+        missing_releases = []
+
+        for release in releases:
+            # Check cache first
+            cached_instructions = None
+            if self.cache:
+                cached_instructions = self.cache.get_cached_instructions(release.version, model_key)
+
+            if cached_instructions:
+                print(f"Processing release {release.version}...")
+                print("  ✓ Using cached compatibility instructions")
+                release.compatibility_instructions = cached_instructions
+            else:
+                missing_releases.append(release)
+
+        # Show cache statistics if cache is enabled
+        if self.cache and len(releases) > 0:
+            cache_misses = len(missing_releases)
+            print(f"Cache performance: {len(releases) - cache_misses} hits, {cache_misses} misses")
+
+        return missing_releases
+
+    async def _generate_instructions(
+        self,
+        releases: list[ReleaseInfo],
+        ready: dict[str, asyncio.Event] | None = None
+    ) -> None:
+        """Fetch blog posts and generate compatibility instructions concurrently.
+
+        Args:
+            releases: Releases missing compatibility instructions
+            ready: Optional per-version events, set as each release is processed
+        """
+        if not releases:
+            return
+
+        print(f"Generating compatibility instructions for {len(releases)} release(s)...")
+
+        # Fetch all blog posts in one request up front where possible
+        await asyncio.to_thread(self.github_client.prefetch_blog_posts, releases)
 
-    def _update_default_versions(self, scripts: List[ScriptFile], target_version: str) -> None:
+        if self.config.batch_mode and self.llm_client.supports_batch():
+            generated = await asyncio.to_thread(self._generate_instructions_batch, releases)
+            for release, instructions in zip(releases, generated):
+                self._store_generated_instructions(release, instructions)
+                if ready:
+                    ready[release.version].set()
+            return
+
+        if self.config.batch_mode:
+            print(f"  Batch mode is not supported for {self.config.llm_provider}, "
+                  "generating instructions individually")
+
+        semaphore = asyncio.Semaphore(max(1, min(self.config.max_concurrency, len(releases))))
+
+        async def generate_one(release: ReleaseInfo) -> None:
+            async with semaphore:
+                # Blog fetches use the blocking GitHub client; the LLM call is native async
+                instructions = None
+                blog_content = await asyncio.to_thread(
+                    self.github_client.fetch_blog_post_content, release
+                )
+                if blog_content:
+                    instructions = await self.llm_client.convert_blog_to_instructions_async(
+                        release, blog_content
+                    )
+            self._store_generated_instructions(release, instructions)
+            if ready:
+                ready[release.version].set()
+
+        await asyncio.gather(*(generate_one(release) for release in releases))
+
+    def _store_generated_instructions(self, release: ReleaseInfo, instructions: str | None) -> None:
+        """Attach newly generated instructions to a release and cache them."""
+        print(f"Processing release {release.version}...")
+        if instructions is None:
+            print(f"  Warning: Could not fetch blog post for {release.version}")
+            return
+
+        release.compatibility_instructions = instructions
+
+        # Save to cache
+        if self.cache:
+            model_key = f"{self.config.llm_provider}/{self.config.llm_model}"
+            self.cache.save_instructions(release.version, instructions, model_key)
+            print("  ✓ Cached instructions for future use")
+
+    def _generate_instructions_batch(self, releases: list[ReleaseInfo]) -> list[str | None]:
+        """Fetch blog posts concurrently and convert them in a single LLM batch job.
+
+        Returns:
+            Generated instructions in release order, None where the blog post
+            could not be fetched or its batch request failed
+        """
+        workers = max(1, min(self.config.max_concurrency, len(releases)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            blog_contents = list(executor.map(self.github_client.fetch_blog_post_content, releases))
+        blog_posts = [
+            (release, content) for release, content in zip(releases, blog_contents) if content
+        ]
+
+        print(f"Submitting {len(blog_posts)} release(s) as a batch job, this may take a while...")
+        instructions = self.llm_client.convert_blogs_to_instructions_batch(blog_posts)
+        return [instructions.get(release.version) for release in releases]
+
+    def _update_default_versions(self, scripts: list[ScriptFile], target_version: str) -> None:
         """Update scripts with default version assumptions."""
         default_version = self.version_manager.calculate_default_version(target_version)
 
         for script in scripts:
-            if script.method == CompatibilityMethod.DEFAULT_ASSUMPTION:
+            if script.method is CompatibilityMethod.DEFAULT_ASSUMPTION:
                 script.compatible_version = default_version
 
-    def _find_earliest_version(self, scripts: List[ScriptFile]) -> str:
+    def _find_earliest_version(self, scripts: list[ScriptFile]) -> str:
         """Find the earliest compatible version among all scripts."""
-        versions = [script.compatible_version for script in scripts]
-        return self.version_manager.find_earliest_version(versions)
-
-    def _get_relevant_instructions(
-        self, script: ScriptFile, target_version: str, releases: List[ReleaseInfo]
-    ) -> List[str]:
-        """Get compatibility instructions relevant to the script's version range."""
-        relevant_instructions = []
-
-        for release in releases:
-            if self.version_manager.is_version_after(release.version, script.compatible_version):
-                if release.compatibility_instructions:
-                    relevant_instructions.append(release.compatibility_instructions)
-
-        return relevant_instructions
-
-    def _display_immediate_script_results(self, script: ScriptFile, issues: List) -> None:
+        if not scripts:
+            return self.version_manager.find_earliest_version([])
+        return min(scripts, key=lambda script: script.version_key).compatible_version
+
+    def _get_relevant_instructions_by_version(
+        self, releases: list[ReleaseInfo], compatible_versions: set
+    ) -> dict[str, list[str]]:
+        """Get relevant compatibility instructions for each distinct compatible version.
+
+        Releases are sorted once, so each version needs a single bisect instead of
+        a comparison against every release. Instructions are ordered oldest first.
+        """
+        releases_with_instructions = sorted(
+            (release for release in releases if release.compatibility_instructions),
+            key=lambda release: release.version_key
+        )
+        release_keys = [release.version_key for release in releases_with_instructions]
+        instructions = [release.compatibility_instructions for release in releases_with_instructions]
+
+        relevant_by_version = {}
+        for version in compatible_versions:
+            start = bisect.bisect_right(release_keys, parse_version(version))
+            relevant_by_version[version] = instructions[start:]
+
+        return relevant_by_version
+
+    def _display_immediate_script_results(self, script: ScriptFile, issues: list) -> None:
         """Display compatibility issues for a script immediately after analysis."""
         if not issues:
             return
 
-        print(f"   📋 Issues found in {script.path.name}:")
-        for i, issue in enumerate(issues, 1):
-            severity_icon = {
-                "error": "❌",
-                "warning": "⚠️",
-                "info": "ℹ️"
-            }.get(issue.severity, "•")
-
-            print(f"   {severity_icon} {issue.description}")
+        lines = [f"   📋 Issues found in {script.path.name}:"]
+        for issue in issues:
+            severity_icon = self.SEVERITY_ICONS.get(issue.severity, "•")
+            lines.append(f"   {severity_icon} {issue.description}")
             if issue.suggested_fix:
-                print(f"      💡 Fix: {issue.suggested_fix}")
+                lines.append(f"      💡 Fix: {issue.suggested_fix}")
 
-        print()  # Add spacing after issues
+        # Print the block in one call so output from concurrently analyzed
+        # scripts doesn't interleave, with a blank line for spacing
+        print("\n".join(lines) + "\n")
 
     def _update_script_version_comment(self, script: ScriptFile, new_version: str) -> None:
-        """Update the version comment in a compatible script."""
-        try:
-            with open(script.path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            updated_lines = self.version_manager.update_version_comment(lines, new_version)
+        """Update the version comment in a compatible script.
 
-            with open(script.path, "w", encoding="utf-8") as f:
-                f.writelines(updated_lines)
+        Only the comment header is read and rewritten; the rest of the script is
+        streamed into a temporary file that then atomically replaces the original.
+        """
+        temp_path = None
+        try:
+            with open(script.path, "rb") as src:
+                # The header ends at the first line that is neither blank nor a comment
+                header = []
+                for raw_line in src:
+                    line = raw_line.decode("utf-8")
+                    header.append(line)
+                    if line.strip() and not line.strip().startswith("#"):
+                        break
+
+                updated_header = self.version_manager.update_version_comment(header, new_version)
+
+                with tempfile.NamedTemporaryFile(
+                    "wb", dir=script.path.parent, prefix=f".{script.path.name}.",
+                    suffix=".tmp", delete=False
+                ) as tmp:
+                    temp_path = tmp.name
+                    tmp.write("".join(updated_header).encode("utf-8"))
+                    shutil.copyfileobj(src, tmp, length=64 * 1024)
+
+            # Keep the script's permissions (e.g. the executable bit)
+            shutil.copymode(script.path, temp_path)
+            os.replace(temp_path, script.path)
+            temp_path = None
+            script.content = None
 
             print(f"Updated version comment in {script.path.name} to {new_version}")
 
         except (OSError, UnicodeDecodeError) as e:
             print(f"Warning: Could not update version comment in {script.path}: {e}")
-
-
+        finally:
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
@@ -1,18 +1,33 @@
-import json
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+import hashlib
+import os
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+import orjson
 from .config import get_cache_path
 
 
 class InstructionCache:
     """Cache manager for compatibility instructions."""
 
+    REQUIRED_FIELDS = ("version", "instructions", "created_at", "llm_model")
+
     def __init__(self):
         """Initialize cache manager."""
         self.cache_dir = get_cache_path()
         self.instructions_dir = self.cache_dir / "instructions"
+        # Directories of the analysis and response caches, which share the cache
+        # root and are reported and cleared together with the instructions
+        self.analysis_dir = self.cache_dir / "analysis"
+        self.responses_dir = self.cache_dir / "responses"
+
+        # In-process memo of lookups, keyed by (version, llm_model)
+        self._memory: dict[tuple[str, str], str | None] = {}
+        self._memory_lock = threading.Lock()
 
-    def get_cached_instructions(self, version: str, llm_model: str) -> Optional[str]:
+    def get_cached_instructions(self, version: str, llm_model: str) -> str | None:
         """Get cached compatibility instructions for a version and LLM model.
 
         Args:
@@ -22,35 +37,73 @@ class InstructionCache:
         Returns:
             Cached instructions if available and valid, None otherwise
         """
-        # Use only version in filename
-        cache_file = self.instructions_dir / f"{version}.json"
+        key = (version, llm_model)
+        if key in self._memory:
+            return self._memory[key]
 
-        if not cache_file.exists():
-            return None
+        instructions = None
+        cache_data = self._load_entry(version)
 
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
+        # Check if the cached entry was created with the same LLM model
+        if cache_data is not None and cache_data["llm_model"] == llm_model:
+            instructions = cache_data["instructions"]
+
+        self._memory[key] = instructions
+        return instructions
+
+    def has_instructions(self, version: str, llm_model: str) -> bool:
+        """Check whether instructions for a version and LLM model are cached.
+
+        Entries are stored per version with the model inside, so only an existing
+        file has to be read to compare models; absent versions cost a single stat.
+
+        Args:
+            version: The NuShell version
+            llm_model: The LLM model used
+
+        Returns:
+            True if valid cached instructions exist
+        """
+        if (version, llm_model) not in self._memory:
+            if not (self.instructions_dir / f"{version}.json").is_file():
+                return False
+        return self.get_cached_instructions(version, llm_model) is not None
+
+    def _load_entry(self, version: str) -> dict[str, Any] | None:
+        """Load and validate the cache entry for a version.
+
+        The file is opened directly rather than checked for existence first,
+        so a lookup costs a single open() on both hits and misses.
 
-            # Validate cache structure
-            required_fields = ["version", "instructions", "created_at", "llm_model"]
-            if not all(field in cache_data for field in required_fields):
-                return None
+        Args:
+            version: The NuShell version
 
-            # Check if the cached entry was created with the same LLM model
-            if cache_data["llm_model"] != llm_model:
-                return None
+        Returns:
+            The cache entry if it exists and is well-formed, None otherwise
+        """
+        # Use only version in filename
+        cache_file = self.instructions_dir / f"{version}.json"
+
+        try:
+            with open(cache_file, "rb") as f:
+                cache_data = orjson.loads(f.read())
+        except (orjson.JSONDecodeError, OSError):
+            # Cache file is missing, corrupted or unreadable, ignore it
+            return None
 
-            # Validate version matches
-            if cache_data["version"] != version:
-                return None
+        if not isinstance(cache_data, dict):
+            return None
 
-            return cache_data["instructions"]
+        # Check required fields and their types
+        if not all(isinstance(cache_data.get(field), str) for field in self.REQUIRED_FIELDS):
+            return None
 
-        except (json.JSONDecodeError, OSError, KeyError):
-            # Cache file is corrupted or unreadable, ignore it
+        # Validate that version in file matches filename
+        if cache_data["version"] != version:
             return None
 
+        return cache_data
+
     def save_instructions(self, version: str, instructions: str, llm_model: str) -> None:
         """Save compatibility instructions to cache.
 
@@ -59,44 +112,65 @@ class InstructionCache:
             instructions: The compatibility instructions
             llm_model: The LLM model used to generate instructions
         """
+        # Entries are stored per version, so saving replaces any other model's entry.
+        # Saves may come from several threads, so don't iterate the memo unguarded
+        with self._memory_lock:
+            for key in [key for key in self._memory if key[0] == version]:
+                del self._memory[key]
+            self._memory[(version, llm_model)] = instructions
+
         # Ensure cache directory exists
         self.instructions_dir.mkdir(parents=True, exist_ok=True)
 
         cache_data = {
             "version": version,
             "instructions": instructions,
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(UTC).isoformat(),
             "llm_model": llm_model
         }
 
         # Use only version in filename
         cache_file = self.instructions_dir / f"{version}.json"
 
+        # Write to a temporary file and rename it into place so concurrent
+        # readers never observe a partially written entry
+        temp_file = self.instructions_dir / f".{version}.{os.getpid()}.{threading.get_ident()}.tmp"
+
         try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+            with open(temp_file, "wb") as f:
+                f.write(orjson.dumps(cache_data, option=orjson.OPT_INDENT_2))
+            os.replace(temp_file, cache_file)
         except OSError as e:
+            temp_file.unlink(missing_ok=True)
             # Failed to write cache, but don't crash the application
             print(f"Warning: Could not save cache for {version}: {e}")
 
     def clear_cache(self) -> int:
-        """Clear all cached instructions.
+        """Clear all cached instructions, analysis results and API responses.
 
         Returns:
             Number of cache files removed
         """
-        if not self.instructions_dir.exists():
+        with self._memory_lock:
+            self._memory.clear()
+
+        cache_dirs = (self.instructions_dir, self.analysis_dir, self.responses_dir)
+        if not any(directory.exists() for directory in cache_dirs):
             return 0
 
         removed_count = 0
         try:
-            for cache_file in self.instructions_dir.glob("*.json"):
-                cache_file.unlink()
-                removed_count += 1
+            for directory in cache_dirs:
+                if not directory.exists():
+                    continue
 
-            # Remove directory if empty
-            if not any(self.instructions_dir.iterdir()):
-                self.instructions_dir.rmdir()
+                for cache_file in self._scan_cache_files(directory):
+                    os.unlink(cache_file.path)
+                    removed_count += 1
+
+                # Remove directory if empty
+                if not any(directory.iterdir()):
+                    directory.rmdir()
 
             # Remove parent cache directory if empty
             if not any(self.cache_dir.iterdir()):
@@ -107,46 +181,87 @@ class InstructionCache:
 
         return removed_count
 
-    def get_cache_info(self) -> Dict[str, Any]:
+    def _scan_cache_files(self, directory: Path | None = None) -> list[os.DirEntry]:
+        """List cache entry files in a single pass over a cache directory.
+
+        scandir returns file type information with the names, and the entries
+        cache their stat results, so no per-file Path objects or extra lookups
+        are needed.
+
+        Args:
+            directory: Directory to scan, defaults to the instructions directory
+
+        Returns:
+            Directory entries for cache files, excluding in-progress temporary files
+        """
+        try:
+            with os.scandir(directory or self.instructions_dir) as entries:
+                return [
+                    entry for entry in entries
+                    if entry.name.endswith(".json") and not entry.name.startswith(".")
+                    and entry.is_file()
+                ]
+        except OSError:
+            return []
+
+    def get_cache_info(self) -> dict[str, Any]:
         """Get information about the cache.
 
         Returns:
-            Dictionary with cache statistics and directory path
+            Dictionary with cache statistics and directory path, covering the
+            instructions, analysis results and API responses
         """
-        if not self.instructions_dir.exists():
+        cache_dirs = (self.instructions_dir, self.analysis_dir, self.responses_dir)
+        if not any(directory.exists() for directory in cache_dirs):
             return {
-                "cache_directory": str(self.instructions_dir),
+                "cache_directory": str(self.cache_dir),
                 "exists": False,
                 "file_count": 0,
                 "total_size_bytes": 0,
-                "versions": []
+                "versions": [],
+                "analysis_count": 0,
+                "response_count": 0
             }
 
-        cache_files = list(self.instructions_dir.glob("*.json"))
         total_size = 0
         versions = []
 
-        for cache_file in cache_files:
+        for entry in self._scan_cache_files():
             try:
-                stat = cache_file.stat()
-                total_size += stat.st_size
+                total_size += entry.stat().st_size
 
                 # Extract version from filename (format: version.json)
-                version = cache_file.stem
-                if version not in versions:  # Avoid duplicates
-                    versions.append(version)
+                versions.append(entry.name[:-len(".json")])
             except OSError:
                 pass
 
+        analysis_count, analysis_size = self._measure_directory(self.analysis_dir)
+        response_count, response_size = self._measure_directory(self.responses_dir)
+        total_size += analysis_size + response_size
+
         return {
-            "cache_directory": str(self.instructions_dir),
+            "cache_directory": str(self.cache_dir),
             "exists": True,
-            "file_count": len(cache_files),
+            "file_count": len(versions) + analysis_count + response_count,
             "total_size_bytes": total_size,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
-            "versions": sorted(versions)
+            "versions": sorted(versions),
+            "analysis_count": analysis_count,
+            "response_count": response_count
         }
 
+    def _measure_directory(self, directory: Path) -> tuple[int, int]:
+        """Count the cache files in a directory and their total size in bytes."""
+        count = 0
+        total_size = 0
+        for entry in self._scan_cache_files(directory):
+            try:
+                total_size += entry.stat().st_size
+                count += 1
+            except OSError:
+                pass
+        return count, total_size
+
     def validate_cache_entry(self, version: str, llm_model: str = "gpt-4") -> bool:
         """Validate that a cache entry is well-formed.
 
@@ -157,70 +272,43 @@ class InstructionCache:
         Returns:
             True if cache entry is valid, False otherwise
         """
-        # Use only version in filename
-        cache_file = self.instructions_dir / f"{version}.json"
-
-        if not cache_file.exists():
-            return False
+        return self._load_entry(version) is not None
 
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
-
-            # Check required fields
-            required_fields = ["version", "instructions", "created_at", "llm_model"]
-            if not all(field in cache_data for field in required_fields):
-                return False
-
-            # Validate data types
-            if not isinstance(cache_data["instructions"], str):
-                return False
-
-            if not isinstance(cache_data["version"], str):
-                return False
-
-            if not isinstance(cache_data["llm_model"], str):
-                return False
-
-            # Validate that version in file matches filename
-            if cache_data["version"] != version:
-                return False
-
-            return True
-
-        except (json.JSONDecodeError, OSError, KeyError, TypeError):
-            return False
-
-    def get_detailed_cache_info(self) -> Dict[str, Any]:
+    def get_detailed_cache_info(self) -> dict[str, Any]:
         """Get detailed information about cached entries.
 
         Returns:
             Dictionary with detailed cache information including per-version details
         """
+        analysis_count = self._measure_directory(self.analysis_dir)[0]
+        response_count = self._measure_directory(self.responses_dir)[0]
+
         if not self.instructions_dir.exists():
             return {
                 "cache_directory": str(self.instructions_dir),
                 "exists": False,
-                "entries": []
+                "entries": [],
+                "analysis_count": analysis_count,
+                "response_count": response_count
             }
 
-        cache_files = list(self.instructions_dir.glob("*.json"))
         entries = []
 
-        for cache_file in cache_files:
+        for cache_file in self._scan_cache_files():
             try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    cache_data = json.load(f)
+                with open(cache_file.path, "rb") as f:
+                    raw_data = f.read()
+                cache_data = orjson.loads(raw_data)
 
                 entry = {
                     "version": cache_data.get("version", "unknown"),
                     "created_at": cache_data.get("created_at", "unknown"),
                     "llm_model": cache_data.get("llm_model", "unknown"),
                     "instructions": cache_data.get("instructions", ""),
-                    "file_size_bytes": cache_file.stat().st_size
+                    "file_size_bytes": len(raw_data)
                 }
                 entries.append(entry)
-            except (json.JSONDecodeError, OSError, KeyError):
+            except (orjson.JSONDecodeError, OSError, KeyError):
                 # Skip corrupted files
                 continue
 
@@ -230,5 +318,182 @@ class InstructionCache:
         return {
             "cache_directory": str(self.instructions_dir),
             "exists": True,
-            "entries": entries
-        }
\ No newline at end of file
+            "entries": entries,
+            "analysis_count": analysis_count,
+            "response_count": response_count
+        }
+
+
+class ResponseCache:
+    """Cache for GitHub API responses, revalidated with ETags once expired."""
+
+    def __init__(self, ttl: float = 3600):
+        """Initialize response cache.
+
+        Args:
+            ttl: Seconds a cached response is used without contacting GitHub
+        """
+        self.cache_dir = get_cache_path()
+        self.responses_dir = self.cache_dir / "responses"
+        self.ttl = ttl
+
+    def _cache_file(self, key: str) -> Path:
+        """Get the cache file for a request key."""
+        return self.responses_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Get a cached response entry.
+
+        Args:
+            key: Key identifying the request (e.g. its URL and parameters)
+
+        Returns:
+            Entry with "data", "etag" and "fetched_at" fields, or None if not cached
+        """
+        try:
+            with open(self._cache_file(key), "rb") as f:
+                entry = orjson.loads(f.read())
+        except (orjson.JSONDecodeError, OSError):
+            return None
+
+        if not isinstance(entry, dict) or entry.get("key") != key or "data" not in entry:
+            return None
+        if not isinstance(entry.get("fetched_at"), (int, float)):
+            return None
+
+        return entry
+
+    def is_fresh(self, entry: dict[str, Any]) -> bool:
+        """Check whether a cached entry can be used without revalidation."""
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def save(self, key: str, data: Any, etag: str | None = None) -> None:
+        """Save a response to the cache.
+
+        Args:
+            key: Key identifying the request
+            data: JSON-serializable response data
+            etag: ETag returned by the server, used for conditional requests
+        """
+        self.responses_dir.mkdir(parents=True, exist_ok=True)
+
+        entry = {
+            "key": key,
+            "etag": etag,
+            "fetched_at": time.time(),
+            "data": data
+        }
+
+        cache_file = self._cache_file(key)
+        temp_file = self.responses_dir / f".{cache_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            with open(temp_file, "wb") as f:
+                f.write(orjson.dumps(entry))
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            temp_file.unlink(missing_ok=True)
+            # Failed to write cache, but don't crash the application
+            print(f"Warning: Could not save response cache: {e}")
+
+
+class AnalysisCache:
+    """Cache for script analysis results, keyed by everything the analysis depends on.
+
+    Only exact matches are reused: any change to the script, its instructions, the
+    target version or the model produces a different key.
+    """
+
+    def __init__(self):
+        """Initialize analysis cache."""
+        self.cache_dir = get_cache_path()
+        self.analysis_dir = self.cache_dir / "analysis"
+
+    @staticmethod
+    def hash_instructions(instructions: list[str]) -> str:
+        """Hash compatibility instructions once for all scripts checked against them.
+
+        Args:
+            instructions: Compatibility instructions
+
+        Returns:
+            Hex digest of the instructions
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for instruction in instructions:
+            digest.update(instruction.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(
+        llm_model: str,
+        target_version: str,
+        compatible_version: str,
+        instructions_digest: str,
+        script_content: bytes
+    ) -> str:
+        """Build the cache key for a script analysis.
+
+        Args:
+            llm_model: The LLM model used (e.g., "openai/gpt-4")
+            target_version: Target NuShell version
+            compatible_version: The script's last known compatible version
+            instructions_digest: Digest of the instructions, from hash_instructions
+            script_content: Raw script content
+
+        Returns:
+            Hex digest identifying the analysis
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (llm_model, target_version, compatible_version, instructions_digest):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(script_content)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> list[dict[str, Any]] | None:
+        """Get cached issues for an analysis.
+
+        Args:
+            key: Key returned by make_key
+
+        Returns:
+            List of issue dictionaries (empty if compatible), or None if not cached
+        """
+        try:
+            with open(self.analysis_dir / f"{key}.json", "rb") as f:
+                entry = orjson.loads(f.read())
+        except (orjson.JSONDecodeError, OSError):
+            return None
+
+        if not isinstance(entry, dict) or not isinstance(entry.get("issues"), list):
+            return None
+
+        return entry["issues"]
+
+    def save(self, key: str, issues: list[dict[str, Any]]) -> None:
+        """Save the issues found by an analysis.
+
+        Args:
+            key: Key returned by make_key
+            issues: JSON-serializable issue dictionaries
+        """
+        self.analysis_dir.mkdir(parents=True, exist_ok=True)
+
+        entry = {
+            "created_at": datetime.now(UTC).isoformat(),
+            "issues": issues
+        }
+
+        cache_file = self.analysis_dir / f"{key}.json"
+        temp_file = self.analysis_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            with open(temp_file, "wb") as f:
+                f.write(orjson.dumps(entry))
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            temp_file.unlink(missing_ok=True)
+            # Failed to write cache, but don't crash the application
+            print(f"Warning: Could not save analysis cache: {e}")
@@ -1,7 +1,5 @@
 import click
-import litellm
 from pathlib import Path
-from typing import List, Optional
 
 
 @click.group(invoke_without_command=True)
@@ -34,6 +32,11 @@ from typing import List, Optional
     is_flag=True,
     help="Disable progress bars and spinners"
 )
+@click.option(
+    "--batch-mode",
+    is_flag=True,
+    help="Run LLM requests through the provider's Batch API (cheaper, but slow)"
+)
 @click.option(
     "--debug",
     is_flag=True,
@@ -47,12 +50,13 @@ from typing import List, Optional
 @click.pass_context
 def cli(
     ctx,
-    version: Optional[str],
-    directories: List[str],
-    config: Optional[Path],
+    version: str | None,
+    directories: list[str],
+    config: Path | None,
     verbose: bool,
     no_cache: bool,
     no_progress: bool,
+    batch_mode: bool,
     debug: bool,
     help: bool
 ):
@@ -71,6 +75,8 @@ def cli(
         from .reporter import Reporter
 
         if debug:
+            # litellm is slow to import, so only load it here when it's needed
+            import litellm
             litellm._turn_on_debug()
 
         # Load configuration
@@ -81,11 +87,16 @@ def cli(
             cfg.scan_directories = list(directories)
         if no_cache:
             cfg.cache_enabled = False
+        if batch_mode:
+            cfg.batch_mode = True
 
         # Initialize analyzer and reporter
         analyzer = NuShellAnalyzer(cfg, disable_progress=no_progress)
         reporter = Reporter(verbose=verbose)
 
+        # Show GitHub token status
+        click.echo(analyzer.github_client.token_status())
+
         try:
             # Run analysis
             results = analyzer.analyze_scripts(target_version=version)
@@ -96,6 +107,8 @@ def cli(
         except Exception as e:
             click.echo(f"Error: {e}", err=True)
             raise click.Abort()
+        finally:
+            analyzer.close()
 
 
 @cli.group()
@@ -129,6 +142,8 @@ def cache_info(short):
                 click.echo(f"  Cached versions: {', '.join(info['versions'])}")
             else:
                 click.echo("  No cached versions")
+            click.echo(f"  Cached analysis results: {info['analysis_count']}")
+            click.echo(f"  Cached API responses: {info['response_count']}")
     else:
         # Show detailed view with rich formatting
         _show_detailed_cache_info(cache)
@@ -143,14 +158,19 @@ def _show_detailed_cache_info(cache):
 
     console = Console()
     detailed_info = cache.get_detailed_cache_info()
+    other_entries = (
+        f"[dim]Cached analysis results: {detailed_info['analysis_count']}, "
+        f"cached API responses: {detailed_info['response_count']}[/dim]"
+    )
 
     if not detailed_info['exists'] or not detailed_info['entries']:
         console.print(Panel(
-            "[yellow]Cache is empty or does not exist[/yellow]",
+            "[yellow]No cached instructions[/yellow]",
             title="[bold blue]Cache Information[/bold blue]",
             border_style="blue"
         ))
         console.print(f"[dim]Directory: {detailed_info['cache_directory']}[/dim]")
+        console.print(other_entries)
         return
 
     # Header
@@ -159,7 +179,8 @@ def _show_detailed_cache_info(cache):
         title="[bold blue]Cache Information[/bold blue]",
         border_style="blue"
     ))
-    console.print(f"[dim]Directory: {detailed_info['cache_directory']}[/dim]\n")
+    console.print(f"[dim]Directory: {detailed_info['cache_directory']}[/dim]")
+    console.print(f"{other_entries}\n")
 
     # Show each version
     for entry in detailed_info['entries']:
@@ -209,13 +230,13 @@ def _show_detailed_cache_info(cache):
 
 @cache.command("clean")
 def cache_clean():
-    """Clear all cached compatibility instructions."""
+    """Clear all cached instructions, analysis results and API responses."""
     from .cache import InstructionCache
 
     cache = InstructionCache()
     removed_count = cache.clear_cache()
     if removed_count > 0:
-        click.echo(f"Cleared {removed_count} cached compatibility instruction(s)")
+        click.echo(f"Cleared {removed_count} cache file(s)")
     else:
         click.echo("Cache was already empty")
 
@@ -229,9 +250,9 @@ def cache_clean():
 )
 def cache_add(versions, config):
     """Prepare compatibility instructions for specific versions."""
+    from concurrent.futures import ThreadPoolExecutor
     from .config import load_config
     from .analyzer import NuShellAnalyzer
-    from .github_client import GitHubClient
 
     # Load configuration
     cfg = load_config(config)
@@ -241,78 +262,93 @@ def cache_add(versions, config):
         click.echo("Error: Cache is disabled in configuration", err=True)
         raise click.Abort()
 
-    # Initialize components
-    github_client = GitHubClient(cfg.github_token)
-
-    # Show GitHub token status
-    if github_client.github_token:
-        if cfg.github_token:
-            click.echo("Using GitHub token from configuration")
-        else:
-            click.echo("Using GitHub token from GitHub CLI (gh auth token)")
-    else:
-        click.echo("Warning: No GitHub token available - API rate limits may apply")
-
     click.echo(f"Preparing compatibility instructions for {len(versions)} version(s): {', '.join(versions)}")
 
     try:
         # Create a minimal analyzer to reuse the instruction preparation logic
-        analyzer = NuShellAnalyzer(cfg, disable_progress=False)
-
-        # Prepare instructions for each version
-        for version in versions:
-            _prepare_instructions_for_version(analyzer, version)
+        with NuShellAnalyzer(cfg, disable_progress=False) as analyzer:
+            # Show GitHub token status
+            click.echo(analyzer.github_client.token_status())
+
+            # Only versions that aren't cached yet need anything from GitHub
+            model_key = f"{cfg.llm_provider}/{cfg.llm_model}"
+            uncached_versions = [
+                version for version in versions
+                if not (analyzer.cache and analyzer.cache.has_instructions(version, model_key))
+            ]
+
+            releases_by_version = {}
+            if uncached_versions:
+                releases_by_version = {
+                    release.version: release for release in analyzer.github_client.get_all_releases()
+                }
+                analyzer.github_client.prefetch_blog_posts(
+                    releases_by_version[version]
+                    for version in uncached_versions if version in releases_by_version
+                )
+
+            # Prepare instructions for all versions concurrently, printing each
+            # version's output as one block when it finishes
+
+            workers = max(1, min(cfg.max_concurrency, len(versions)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for output in executor.map(
+                    lambda version: _prepare_instructions_for_version(
+                        analyzer, version, releases_by_version
+                    ),
+                    versions
+                ):
+                    click.echo(output)
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
 
 
-def _prepare_instructions_for_version(analyzer, version):
-    """Prepare compatibility instructions for a specific version."""
+def _prepare_instructions_for_version(analyzer, version, releases_by_version) -> str:
+    """Prepare compatibility instructions for a specific version.
+
+    releases_by_version maps version strings to GitHub releases, fetched once
+    for all versions. Returns the progress output rather than echoing it, so versions prepared
+    concurrently don't interleave their lines.
+    """
     from .models import ReleaseInfo
 
-    click.echo(f"\nProcessing version {version}...")
+    output = [f"\nProcessing version {version}..."]
 
     # Check if already cached
     if analyzer.cache:
-        cached_instructions = analyzer.cache.get_cached_instructions(
+        if analyzer.cache.has_instructions(
             version,
             f"{analyzer.config.llm_provider}/{analyzer.config.llm_model}"
-        )
-        if cached_instructions:
-            click.echo("  ✓ Instructions already cached")
-            return
+        ):
+            output.append("  ✓ Instructions already cached")
+            return "\n".join(output)
 
     # Create a ReleaseInfo object for this version
     # We need to determine the blog URL - let's try to get it from GitHub
     try:
-        # Get all releases to find the blog URL for this version
-        all_releases = analyzer.github_client.get_all_releases()
-        release_info = None
-
-        for release in all_releases:
-            if release.version == version:
-                release_info = release
-                break
+        release_info = releases_by_version.get(version)
 
         if not release_info:
             # If we can't find it in releases, create a basic one and try to derive the blog URL
             blog_url = f"https://www.nushell.sh/blog/{version.replace('.', '_')}.html"
             release_info = ReleaseInfo(version, blog_url)
-            click.echo(f"  Using inferred blog URL: {blog_url}")
+            output.append(f"  Using inferred blog URL: {blog_url}")
 
         # Fetch blog content
-        click.echo("  Fetching blog content...")
+        output.append("  Fetching blog content...")
         blog_content = analyzer.github_client.fetch_blog_post_content(release_info)
 
         if not blog_content:
-            click.echo(f"  ✗ Could not fetch blog content for version {version}")
-            return
+            output.append(f"  ✗ Could not fetch blog content for version {version}")
+            return "\n".join(output)
 
         # Generate instructions
-        click.echo("  Generating compatibility instructions...")
-        instructions = analyzer.llm_client.convert_blog_to_instructions(release_info, blog_content)
+        output.append("  Generating compatibility instructions...")
+        instructions = analyzer.llm_client.convert_blog_to_instructions_streaming(
+            release_info, blog_content
+        )
 
         # Save to cache
         if analyzer.cache:
@@ -321,12 +357,14 @@ def _prepare_instructions_for_version(analyzer, version):
                 instructions,
                 f"{analyzer.config.llm_provider}/{analyzer.config.llm_model}"
             )
-            click.echo("  ✓ Instructions generated and cached")
+            output.append("  ✓ Instructions generated and cached")
         else:
-            click.echo("  ✓ Instructions generated (cache disabled)")
+            output.append("  ✓ Instructions generated (cache disabled)")
 
     except Exception as e:
-        click.echo(f"  ✗ Failed to process version {version}: {e}")
+        output.append(f"  ✗ Failed to process version {version}: {e}")
+
+    return "\n".join(output)
 
 
 if __name__ == "__main__":
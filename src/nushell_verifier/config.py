@@ -1,12 +1,29 @@
 import os
-import toml
+import tomllib
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
 from .models import Config
 
+# Written verbatim by create_default_config, since tomllib can only read TOML
+DEFAULT_CONFIG_TOML = """\
+llm_provider = "openai"
+llm_model = "gpt-4"
+api_key = ""
+github_token = ""
+scan_directories = ["~/dots/bin", "~/dots/config/nushell"]
+temperature = 0.1
+max_concurrency = 8
 
+[llm_params]
+"""
+
+
+@lru_cache(maxsize=1)
 def get_config_path() -> Path:
-    """Get XDG-compliant configuration directory."""
+    """Get XDG-compliant configuration directory.
+
+    Resolved once per process; XDG variables are assumed not to change while running.
+    """
     config_dir = os.getenv("XDG_CONFIG_HOME")
     if config_dir:
         return Path(config_dir) / "nushell-verifier"
@@ -14,8 +31,12 @@ def get_config_path() -> Path:
         return Path.home() / ".config" / "nushell-verifier"
 
 
+@lru_cache(maxsize=1)
 def get_cache_path() -> Path:
-    """Get XDG-compliant cache directory."""
+    """Get XDG-compliant cache directory.
+
+    Resolved once per process; XDG variables are assumed not to change while running.
+    """
     cache_dir = os.getenv("XDG_CACHE_HOME")
     if cache_dir:
         return Path(cache_dir) / "nushell-verifier"
@@ -23,7 +44,7 @@ def get_cache_path() -> Path:
         return Path.home() / ".cache" / "nushell-verifier"
 
 
-def load_config(config_path: Optional[Path] = None) -> Config:
+def load_config(config_path: Path | None = None) -> Config:
     """Load configuration from TOML file."""
     if config_path is None:
         config_path = get_config_path() / "config.toml"
@@ -32,8 +53,8 @@ def load_config(config_path: Optional[Path] = None) -> Config:
         return Config()
 
     try:
-        with open(config_path, "r") as f:
-            config_data = toml.load(f)
+        with open(config_path, "rb") as f:
+            config_data = tomllib.load(f)
 
         return Config(
             llm_provider=config_data.get("llm_provider", "openai"),
@@ -43,10 +64,13 @@ def load_config(config_path: Optional[Path] = None) -> Config:
             scan_directories=config_data.get("scan_directories", ["~/dots/bin", "~/dots/config/nushell"]),
             temperature=config_data.get("temperature"),
             llm_params=config_data.get("llm_params", {}),
-            cache_enabled=config_data.get("cache_enabled", True)
+            cache_enabled=config_data.get("cache_enabled", True),
+            max_concurrency=config_data.get("max_concurrency", 8),
+            batch_mode=config_data.get("batch_mode", False),
+            max_scripts_per_request=config_data.get("max_scripts_per_request", 1)
         )
     except Exception as e:
-        raise RuntimeError(f"Failed to load config from {config_path}: {e}")
+        raise RuntimeError(f"Failed to load config from {config_path}: {e}") from e
 
 
 def create_default_config() -> None:
@@ -58,18 +82,7 @@ def create_default_config() -> None:
     if config_path.exists():
         return
 
-    default_config = {
-        "llm_provider": "openai",
-        "llm_model": "gpt-4",
-        "api_key": "",
-        "github_token": "",
-        "scan_directories": ["~/dots/bin", "~/dots/config/nushell"],
-        "temperature": 0.1,
-        "llm_params": {}
-    }
-
-    with open(config_path, "w") as f:
-        toml.dump(default_config, f)
+    config_path.write_text(DEFAULT_CONFIG_TOML)
 
     print(f"Created default configuration at {config_path}")
     print("Please edit the configuration file to add your API keys.")
\ No newline at end of file
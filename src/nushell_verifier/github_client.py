@@ -1,62 +1,135 @@
+import json
+import os
+import random
 import re
 import subprocess
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 import httpx
-from typing import List, Optional
+from collections.abc import Iterable
+from .cache import ResponseCache
 from .models import ReleaseInfo
+from .version_manager import parse_version
+
+
+@lru_cache(maxsize=1)
+def _gh_cli_token() -> str | None:
+    """Get the GitHub CLI token, running `gh auth token` at most once per process."""
+    try:
+        # Check if gh CLI is available
+        result = subprocess.run(
+            ["gh", "auth", "token"],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+
+        if result.returncode == 0:
+            token = result.stdout.strip()
+            if token:
+                return token
+    except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
+        # gh CLI not available or not authenticated
+        pass
+
+    return None
 
 
 class GitHubClient:
     """Client for fetching NuShell releases and blog posts from GitHub."""
 
-    def __init__(self, github_token: Optional[str] = None):
+    BLOG_URL_PREFIX = "https://www.nushell.sh/blog/"
+    BLOG_URL_PATTERN = re.compile(r"https://www\.nushell\.sh/blog/[\w\-/]+\.html", re.ASCII)
+    BLOG_PATH_PATTERN = re.compile(r"https://www\.nushell\.sh/blog/(.+)\.html")
+
+    # Only the fields we use, so the response is much smaller than the REST listing
+    RELEASES_QUERY = """
+    query($owner: String!, $name: String!, $first: Int!) {
+      repository(owner: $owner, name: $name) {
+        releases(first: $first, orderBy: {field: CREATED_AT, direction: DESC}) {
+          nodes { tagName description isDraft isPrerelease }
+        }
+      }
+    }
+    """
+
+    # Retry policy for transient failures (connection errors, rate limits, server errors)
+    MAX_RETRIES = 4
+    MAX_BACKOFF = 30.0
+    MAX_RATE_LIMIT_WAIT = 60.0
+    RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, github_token: str | None = None, response_cache: ResponseCache | None = None):
         """Initialize GitHub client with optional token for higher rate limits."""
-        self.github_token = github_token or self._get_gh_cli_token()
+        # Remember where the token came from, for token_status
+        if github_token:
+            self.github_token, self.token_source = github_token, "configuration"
+        elif env_token := os.getenv("GITHUB_TOKEN"):
+            self.github_token, self.token_source = env_token, "GITHUB_TOKEN environment variable"
+        else:
+            self.github_token = self._get_gh_cli_token()
+            self.token_source = "GitHub CLI (gh auth token)" if self.github_token else None
+        self.response_cache = response_cache
         self.base_url = "https://api.github.com"
+        self.raw_url = "https://raw.githubusercontent.com"
         self.blog_repo = "nushell/nushell.github.io"
         self.nushell_repo = "nushell/nushell"
 
-    def _get_gh_cli_token(self) -> Optional[str]:
-        """Try to get GitHub token from GitHub CLI if available."""
-        try:
-            # Check if gh CLI is available
-            result = subprocess.run(
-                ["gh", "auth", "token"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+        # Release listings already fetched by this client, keyed by page size
+        self._releases_memo: dict[int, list[ReleaseInfo]] = {}
 
-            if result.returncode == 0:
-                token = result.stdout.strip()
-                if token:
-                    return token
-        except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
-            # gh CLI not available or not authenticated
-            pass
+        # Releases sorted by version (with their keys), built on first range query
+        self._release_index: tuple[list[tuple[int, ...]], list[ReleaseInfo]] | None = None
 
-        return None
+        # Blog post contents fetched in bulk, keyed by path (None if the file is missing)
+        self._prefetched_files: dict[str, str | None] = {}
+
+        # One client for all requests, so connections (and TLS sessions) are reused
+        self.http_client = httpx.Client(timeout=30, follow_redirects=True)
+
+    def close(self) -> None:
+        """Close the HTTP connection pool."""
+        self.http_client.close()
+
+    def token_status(self) -> str:
+        """Describe where the client's GitHub token came from, for status output."""
+        if not self.github_token:
+            return "Warning: No GitHub token available - API rate limits may apply"
+        return f"Using GitHub token from {self.token_source}"
+
+    def _get_gh_cli_token(self) -> str | None:
+        """Try to get GitHub token from GitHub CLI if available."""
+        return _gh_cli_token()
 
     def get_latest_version(self) -> str:
         """Get the latest NuShell version from GitHub releases."""
-        releases = self._get_releases(limit=1)
+        # Share the (cached) full release listing with get_releases_between
+        releases = self._get_releases()
         if not releases:
             raise RuntimeError("Could not fetch latest NuShell version")
         return releases[0].version
 
-    def get_releases_between(self, start_version: str, end_version: str) -> List[ReleaseInfo]:
+    def get_releases_between(self, start_version: str, end_version: str) -> list[ReleaseInfo]:
         """Get all non-patch releases between two versions."""
-        all_releases = self._get_releases()
-
-        # Filter releases between versions (excluding patch releases)
-        filtered_releases = []
-        for release in all_releases:
-            if self._is_version_between(release.version, start_version, end_version):
-                if not self._is_patch_release(release.version):
-                    filtered_releases.append(release)
-
-        return filtered_releases
-
-    def fetch_blog_post_content(self, release: ReleaseInfo) -> Optional[str]:
+        keys, sorted_releases = self._get_release_index()
+        start = bisect_left(keys, parse_version(start_version))
+        end = bisect_right(keys, parse_version(end_version))
+
+        # Newest first, excluding patch releases (x.y.z where z > 0)
+        return [
+            release for release in reversed(sorted_releases[start:end])
+            if not (len(release.version_key) >= 3 and release.version_key[2] > 0)
+        ]
+
+    def _get_release_index(self) -> tuple[list[tuple[int, ...]], list[ReleaseInfo]]:
+        """Get all releases sorted by version, with their version keys for bisection."""
+        if self._release_index is None:
+            sorted_releases = sorted(self._get_releases(), key=lambda release: release.version_key)
+            self._release_index = ([release.version_key for release in sorted_releases], sorted_releases)
+        return self._release_index
+
+    def fetch_blog_post_content(self, release: ReleaseInfo) -> str | None:
         """Fetch blog post content for a release."""
         if not release.blog_post_url:
             return None
@@ -66,27 +139,112 @@ class GitHubClient:
         if not blog_path:
             return None
 
+        if blog_path in self._prefetched_files:
+            return self._prefetched_files[blog_path]
+
         return self._fetch_file_content(self.blog_repo, blog_path)
 
-    def get_all_releases(self, limit: Optional[int] = None) -> List[ReleaseInfo]:
+    def prefetch_blog_posts(self, releases: Iterable[ReleaseInfo]) -> None:
+        """Fetch the blog posts of several releases in a single GraphQL request.
+
+        Later calls to fetch_blog_post_content for these releases are answered
+        from memory, including for posts that don't exist. This requires a token;
+        without one, or if the request fails, posts are fetched individually as
+        usual.
+        """
+        if not self.github_token:
+            return
+
+        paths = sorted({
+            path for release in releases
+            if release.blog_post_url
+            and (path := self._extract_blog_path(release.blog_post_url))
+            and path not in self._prefetched_files
+        })
+        if not paths:
+            return
+
+        # One aliased object lookup per file
+        fields = " ".join(
+            f"file{i}: object(expression: {json.dumps('HEAD:' + path)}) "
+            "{ ... on Blob { text isTruncated } }"
+            for i, path in enumerate(paths)
+        )
+        owner, name = self.blog_repo.split("/")
+
+        try:
+            response = self._post_with_retries(
+                f"{self.base_url}/graphql",
+                headers={"Authorization": f"bearer {self.github_token}"},
+                json={
+                    "query": f"query($owner: String!, $name: String!) {{ "
+                             f"repository(owner: $owner, name: $name) {{ {fields} }} }}",
+                    "variables": {"owner": owner, "name": name}
+                }
+            )
+            response.raise_for_status()
+            repository = (response.json().get("data") or {}).get("repository") or {}
+        except (httpx.HTTPError, ValueError):
+            return
+
+        for i, path in enumerate(paths):
+            alias = f"file{i}"
+            if alias not in repository:
+                continue
+            blob = repository[alias]
+            if blob is None:
+                self._prefetched_files[path] = None
+            elif blob.get("text") is not None and not blob.get("isTruncated"):
+                self._prefetched_files[path] = blob["text"]
+
+    def get_all_releases(self, limit: int | None = None) -> list[ReleaseInfo]:
         """Get all releases (public wrapper around _get_releases)."""
         return self._get_releases(limit)
 
-    def _get_releases(self, limit: Optional[int] = None) -> List[ReleaseInfo]:
-        """Fetch releases from GitHub API."""
+    def _get_releases(self, limit: int | None = None) -> list[ReleaseInfo]:
+        """Fetch releases from GitHub API, at most once per client and page size.
+
+        Listings are newest first, so a shorter listing is served from a longer
+        one already fetched.
+        """
+        per_page = limit or 100
+        if per_page not in self._releases_memo:
+            longer = [size for size in self._releases_memo if size > per_page]
+            if longer:
+                return self._releases_memo[min(longer)][:per_page]
+            self._releases_memo[per_page] = self._fetch_releases(per_page)
+        return list(self._releases_memo[per_page])
+
+    def _fetch_releases(self, per_page: int) -> list[ReleaseInfo]:
+        """Fetch releases from GitHub API, using the response cache if available."""
         headers = {}
         if self.github_token:
             headers["Authorization"] = f"token {self.github_token}"
 
-        params = {"per_page": limit or 100}
+        params = {"per_page": per_page}
+        url = f"{self.base_url}/repos/{self.nushell_repo}/releases"
+        cache_key = f"{url}?per_page={params['per_page']}"
+
+        cached = self.response_cache.get(cache_key) if self.response_cache else None
+        if cached and self.response_cache.is_fresh(cached):
+            return [ReleaseInfo(**release) for release in cached["data"]]
+
+        # Revalidate an expired entry; a 304 doesn't count against the rate limit
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
 
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.base_url}/repos/{self.nushell_repo}/releases",
-                    headers=headers,
-                    params=params
-                )
+            if self.github_token and "If-None-Match" not in headers:
+                # GraphQL needs authentication, but fetches only the fields we use
+                releases = self._get_releases_graphql(params["per_page"])
+                etag = None
+            else:
+                response = self._get_with_retries(url, headers=headers, params=params)
+
+                if cached and response.status_code == 304:
+                    self.response_cache.save(cache_key, cached["data"], cached["etag"])
+                    return [ReleaseInfo(**release) for release in cached["data"]]
+
                 response.raise_for_status()
 
                 releases = []
@@ -101,20 +259,116 @@ class GitHubClient:
                         version=version,
                         blog_post_url=blog_url
                     ))
+                etag = response.headers.get("ETag")
+
+            if self.response_cache:
+                self.response_cache.save(
+                    cache_key,
+                    [{"version": r.version, "blog_post_url": r.blog_post_url} for r in releases],
+                    etag
+                )
 
-                return releases
+            return releases
 
         except httpx.HTTPError as e:
-            raise RuntimeError(f"Failed to fetch releases: {e}")
+            raise RuntimeError(f"Failed to fetch releases: {e}") from e
+
+    def _get_releases_graphql(self, limit: int) -> list[ReleaseInfo]:
+        """Fetch releases through the GraphQL API (requires a token)."""
+        owner, name = self.nushell_repo.split("/")
+        response = self._post_with_retries(
+            f"{self.base_url}/graphql",
+            headers={"Authorization": f"bearer {self.github_token}"},
+            json={
+                "query": self.RELEASES_QUERY,
+                "variables": {"owner": owner, "name": name, "first": min(limit, 100)}
+            }
+        )
+        response.raise_for_status()
+
+        result = response.json()
+        if result.get("errors"):
+            message = result["errors"][0].get("message", "unknown error")
+            raise httpx.HTTPError(f"GraphQL query failed: {message}")
+
+        releases = []
+        for release_data in result["data"]["repository"]["releases"]["nodes"]:
+            if release_data.get("isDraft") or release_data.get("isPrerelease"):
+                continue
+
+            releases.append(ReleaseInfo(
+                version=release_data["tagName"],
+                blog_post_url=self._extract_blog_url(release_data.get("description") or "")
+            ))
+
+        return releases
+
+    def _get_with_retries(self, url: str, **kwargs) -> httpx.Response:
+        """GET a URL, retrying transient failures with exponential backoff and jitter."""
+        return self._send_with_retries(self.http_client.get, url, **kwargs)
+
+    def _post_with_retries(self, url: str, **kwargs) -> httpx.Response:
+        """POST to a URL, retrying transient failures with exponential backoff and jitter."""
+        return self._send_with_retries(self.http_client.post, url, **kwargs)
+
+    def _send_with_retries(self, send, url: str, **kwargs) -> httpx.Response:
+        """Send a request with the given client method, retrying transient failures."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                response = send(url, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                delay = self._retry_delay(response, attempt)
+                if delay is None or attempt == self.MAX_RETRIES:
+                    return response
+
+            time.sleep(delay)
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float | None:
+        """Get the delay before retrying a response, or None if it shouldn't be retried."""
+        if response.status_code in (403, 429):
+            # Secondary rate limits tell us how long to wait
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = float(retry_after)
+                return delay if delay <= self.MAX_RATE_LIMIT_WAIT else None
+
+            # Primary rate limits reset at a known time; only wait if it's soon
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                try:
+                    delay = float(response.headers["X-RateLimit-Reset"]) - time.time() + 1
+                except (KeyError, ValueError):
+                    return None
+                return max(0.0, delay) if delay <= self.MAX_RATE_LIMIT_WAIT else None
+
+            if response.status_code == 403:
+                return None
+
+        if response.status_code in self.RETRYABLE_STATUS_CODES:
+            return self._backoff_delay(attempt)
 
-    def _extract_blog_url(self, release_body: str) -> Optional[str]:
+        return None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter, so concurrent retries don't fire in lockstep."""
+        return min(self.MAX_BACKOFF, 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _extract_blog_url(self, release_body: str) -> str | None:
         """Extract blog post URL from release body."""
-        # Look for blog post links in release notes
-        blog_pattern = re.compile(r"https://www\.nushell\.sh/blog/[\w\-/]+\.html")
-        match = blog_pattern.search(release_body)
-        return match.group(0) if match else None
+        # Look for blog post links in release notes. Release notes are long, so
+        # find candidates with a plain substring search and only run the regex there
+        start = release_body.find(self.BLOG_URL_PREFIX)
+        while start >= 0:
+            match = self.BLOG_URL_PATTERN.match(release_body, start)
+            if match:
+                return match.group(0)
+            start = release_body.find(self.BLOG_URL_PREFIX, start + 1)
+        return None
 
-    def _extract_blog_path(self, blog_url: str) -> Optional[str]:
+    def _extract_blog_path(self, blog_url: str) -> str | None:
         """Extract file path from blog URL."""
         if not blog_url:
             return None
@@ -122,53 +376,38 @@ class GitHubClient:
         # Convert URL to file path in the blog repository
         # https://www.nushell.sh/blog/2023-10-10-nushell_0_85_0.html
         # -> blog/2023-10-10-nushell_0_85_0.md
-        pattern = re.compile(r"https://www\.nushell\.sh/blog/(.+)\.html")
-        match = pattern.search(blog_url)
+        match = self.BLOG_PATH_PATTERN.search(blog_url)
         if match:
             return f"blog/{match.group(1)}.md"
         return None
 
-    def _fetch_file_content(self, repo: str, file_path: str) -> Optional[str]:
+    def _fetch_file_content(self, repo: str, file_path: str) -> str | None:
         """Fetch file content from GitHub repository."""
+        # Raw file downloads skip the contents API's base64-in-JSON encoding
+        # and don't count against the API rate limit
+        url = f"{self.raw_url}/{repo}/HEAD/{file_path}"
+
+        cached = self.response_cache.get(url) if self.response_cache else None
+        if cached and self.response_cache.is_fresh(cached):
+            return cached["data"]
+
         headers = {}
-        if self.github_token:
-            headers["Authorization"] = f"token {self.github_token}"
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
 
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.base_url}/repos/{repo}/contents/{file_path}",
-                    headers=headers
-                )
-                response.raise_for_status()
+            response = self._get_with_retries(url, headers=headers)
 
-                content_data = response.json()
-                if content_data.get("encoding") == "base64":
-                    import base64
-                    return base64.b64decode(content_data["content"]).decode("utf-8")
+            if cached and response.status_code == 304:
+                self.response_cache.save(url, cached["data"], cached["etag"])
+                return cached["data"]
+
+            if response.status_code == 200:
+                if self.response_cache:
+                    self.response_cache.save(url, response.text, response.headers.get("ETag"))
+                return response.text
 
         except httpx.HTTPError:
             pass  # File might not exist
 
         return None
-
-    def _is_version_between(self, version: str, start: str, end: str) -> bool:
-        """Check if version is between start and end versions."""
-        def version_tuple(v: str) -> tuple:
-            return tuple(map(int, v.lstrip("v").split(".")))
-
-        try:
-            v_tuple = version_tuple(version)
-            start_tuple = version_tuple(start)
-            end_tuple = version_tuple(end)
-            return start_tuple <= v_tuple <= end_tuple
-        except ValueError:
-            return False
-
-    def _is_patch_release(self, version: str) -> bool:
-        """Check if version is a patch release (x.y.z where z > 0)."""
-        try:
-            parts = version.lstrip("v").split(".")
-            return len(parts) >= 3 and int(parts[2]) > 0
-        except (ValueError, IndexError):
-            return False
\ No newline at end of file
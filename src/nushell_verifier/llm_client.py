@@ -1,123 +1,444 @@
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import time
+from functools import lru_cache
+from types import MappingProxyType
+import httpx
 import litellm
-from typing import Optional, List, Dict, Any, Callable
+import openai
+import orjson
+from collections.abc import Callable
+from typing import Any
 from .models import Config, ReleaseInfo, ScriptFile, CompatibilityIssue
 
 
+# Prompt templates, filled in with str.format (literal braces are doubled). Script
+# analysis prompts are split into a system message with everything shared by the
+# scripts checked against the same instructions, and a user message with the
+# script itself, so providers can cache the shared prefix.
+INSTRUCTIONS_PROMPT_TEMPLATE = """
+You are a NuShell expert analyzing release notes. Your task is to convert the blog post content for NuShell {version} into a set of specific, actionable instructions for checking if existing NuShell scripts are compatible with this version.
+
+Focus on:
+1. Breaking changes that affect script syntax or behavior
+2. Deprecated features and their replacements
+3. New syntax requirements or restrictions
+4. Changes to built-in commands or their parameters
+5. Changes to variable scoping or data types
+
+For each breaking change, provide:
+- A clear description of what changed
+- How to detect if a script uses the old pattern
+- What the new pattern should be
+
+Ignore:
+- New features that don't affect existing scripts
+- Performance improvements
+- Bug fixes that don't change expected behavior
+- Documentation updates
+
+Blog post content:
+{blog_content}
+
+Please provide the output as a structured list of compatibility checks:
+"""
+
+ANALYSIS_SYSTEM_PROMPT_TEMPLATE = """
+You are a NuShell expert analyzing script compatibility. Review the NuShell script you are given against the compatibility requirements for version {target_version}.
+
+Compatibility requirements to check:
+{instructions}
+
+Analyze the script and identify any compatibility issues. For each issue found, provide:
+1. A clear description of the problem
+2. The specific line(s) or pattern that causes the issue
+3. A suggested fix or replacement
+4. The severity level (error, warning, info)
+
+If the script is fully compatible, respond with "COMPATIBLE".
+
+Format your response as a JSON array of issues:
+[
+  {{
+    "description": "Clear description of the issue",
+    "suggested_fix": "How to fix it",
+    "severity": "error|warning|info"
+  }}
+]
+
+Or simply: COMPATIBLE
+"""
+
+ANALYSIS_PROMPT_TEMPLATE = """Script path: {script_path}
+Last known compatible version: {compatible_version}
+Target version: {target_version}
+
+Script content:
+```nushell
+{script_content}
+```"""
+
+SCRIPT_SECTION_TEMPLATE = """### Script {script_id}
+Script path: {script_path}
+Last known compatible version: {compatible_version}
+
+```nushell
+{script_content}
+```"""
+
+SCRIPTS_ANALYSIS_SYSTEM_PROMPT_TEMPLATE = """
+You are a NuShell expert analyzing script compatibility. Review each of the NuShell scripts you are given against the compatibility requirements for version {target_version}.
+
+Target version: {target_version}
+
+Compatibility requirements to check:
+{instructions}
+
+Analyze each script independently and identify any compatibility issues. For each issue found, provide:
+1. A clear description of the problem
+2. The specific line(s) or pattern that causes the issue
+3. A suggested fix or replacement
+4. The severity level (error, warning, info)
+
+Respond with only a JSON array containing one entry per script, using an empty issues list for fully compatible scripts:
+[
+  {{
+    "script_id": 1,
+    "issues": [
+      {{
+        "description": "Clear description of the issue",
+        "suggested_fix": "How to fix it",
+        "severity": "error|warning|info"
+      }}
+    ]
+  }}
+]
+"""
+
+# Messages sent for a single prompt, or the prompt itself
+Prompt = str | list[dict[str, Any]]
+
+
+@lru_cache(maxsize=16)
+def _system_prompt(template: str, target_version: str, instructions: tuple[str, ...]) -> str:
+    """Fill in a system prompt template, reusing it across scripts that share instructions."""
+    return template.format(
+        target_version=target_version, instructions="\n\n".join(instructions)
+    )
+
+
+def count_tokens(model: str, text: str) -> int | None:
+    """Count the tokens in text with the model's tokenizer.
+
+    LiteLLM picks the tokenizer for the model (falling back to tiktoken's
+    cl100k_base) and caches it, so repeated counts don't reload it.
+
+    Args:
+        model: Model name including the provider, as used for completions
+        text: Text to count tokens in
+
+    Returns:
+        Number of tokens, or None if the text couldn't be tokenized
+    """
+    try:
+        return len(litellm.encode(model=model, text=text))
+    except Exception:  # noqa: BLE001 - tokenizer backends raise assorted errors, and counts are optional
+        return None
+
+
+class _IssueStreamParser:
+    """Incrementally extract issue objects from a streamed JSON array of issues."""
+
+    def __init__(self):
+        """Initialize parser with an empty buffer."""
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        # Index of the next unparsed array element, once the array has started
+        self._position: int | None = None
+        self._done = False
+
+    def feed(self, text: str) -> list[dict[str, Any]]:
+        """Add streamed content and return the issues completed by it.
+
+        Args:
+            text: Newly streamed response content
+
+        Returns:
+            Issue dictionaries whose closing brace arrived with this content
+        """
+        if self._done:
+            return []
+
+        self._buffer += text
+        if self._position is None:
+            start = self._buffer.find("[")
+            if start < 0:
+                return []
+            self._position = start + 1
+
+        buffer = self._buffer
+        issues = []
+        while True:
+            position = self._position
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            self._position = position
+
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                self._done = True
+                break
+
+            try:
+                issue, self._position = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element is still incomplete, wait for more content
+                break
+
+            if isinstance(issue, dict):
+                issues.append(issue)
+
+        return issues
+
+
 class LLMClient:
     """Client for interacting with LLM providers via LiteLLM."""
 
-    # Model parameter compatibility mapping
-    MODEL_PARAM_COMPATIBILITY = {
+    # Parameters each model accepts
+    MODEL_PARAM_COMPATIBILITY = MappingProxyType({
         # OpenAI models
-        "openai/gpt-3.5-turbo": {"temperature": True, "max_tokens": True, "top_p": True},
-        "openai/gpt-4": {"temperature": True, "max_tokens": True, "top_p": True},
-        "openai/gpt-4-turbo": {"temperature": True, "max_tokens": True, "top_p": True},
-        "openai/gpt-4o": {"temperature": True, "max_tokens": True, "top_p": True},
-        "openai/gpt-4o-mini": {"temperature": True, "max_tokens": True, "top_p": True},
-        "openai/gpt-5": {"temperature": False, "max_tokens": True, "top_p": True},  # GPT-5 only supports temperature=1
+        "openai/gpt-3.5-turbo": frozenset({"temperature", "max_tokens", "top_p"}),
+        "openai/gpt-4": frozenset({"temperature", "max_tokens", "top_p"}),
+        "openai/gpt-4-turbo": frozenset({"temperature", "max_tokens", "top_p"}),
+        "openai/gpt-4o": frozenset({"temperature", "max_tokens", "top_p"}),
+        "openai/gpt-4o-mini": frozenset({"temperature", "max_tokens", "top_p"}),
+        "openai/gpt-5": frozenset({"max_tokens", "top_p"}),  # GPT-5 only supports temperature=1
 
         # Anthropic models
-        "anthropic/claude-3-sonnet": {"temperature": True, "max_tokens": True, "top_p": True},
-        "anthropic/claude-3-opus": {"temperature": True, "max_tokens": True, "top_p": True},
-        "anthropic/claude-3-haiku": {"temperature": True, "max_tokens": True, "top_p": True},
-        "anthropic/claude-3-5-sonnet": {"temperature": True, "max_tokens": True, "top_p": True},
+        "anthropic/claude-3-sonnet": frozenset({"temperature", "max_tokens", "top_p"}),
+        "anthropic/claude-3-opus": frozenset({"temperature", "max_tokens", "top_p"}),
+        "anthropic/claude-3-haiku": frozenset({"temperature", "max_tokens", "top_p"}),
+        "anthropic/claude-3-5-sonnet": frozenset({"temperature", "max_tokens", "top_p"}),
 
         # Google models
-        "google/gemini-pro": {"temperature": True, "max_tokens": True, "top_p": True},
-        "google/gemini-1.5-pro": {"temperature": True, "max_tokens": True, "top_p": True},
+        "google/gemini-pro": frozenset({"temperature", "max_tokens", "top_p"}),
+        "google/gemini-1.5-pro": frozenset({"temperature", "max_tokens", "top_p"}),
 
         # Default fallback for unknown models
-        "_default": {"temperature": False, "max_tokens": True, "top_p": False}
-    }
+        "_default": frozenset({"max_tokens"})
+    })
+
+    # Retries for rate limited or failed LLM requests
+    NUM_RETRIES = 3
+
+    # Seconds an idle pooled connection is kept open for reuse
+    KEEPALIVE_EXPIRY = 60.0
+
+    # Seconds between progress callbacks while streaming, matching the progress bar refresh
+    STREAM_CALLBACK_INTERVAL = 0.1
+
+    # Upper bound on the combined size (in estimated tokens) of scripts analyzed in one request
+    SCRIPT_BATCH_TOKEN_BUDGET = 16000
+
+    # Providers whose Batch API is reachable through LiteLLM
+    BATCH_PROVIDERS = frozenset({"openai", "azure"})
+
+    # Terminal states reported by the Batch API
+    BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
 
     def __init__(self, config: Config):
         """Initialize LLM client with configuration."""
         self.config = config
         self.model = f"{config.llm_provider}/{config.llm_model}"
 
-        # Set API key for the provider
+        # OpenAI requests share one connection pool, sized so concurrent script
+        # analysis and instruction generation don't wait for connections. It
+        # reaches LiteLLM through an SDK client passed with each request, leaving
+        # LiteLLM's module-level settings alone. Other providers use LiteLLM's own
+        # clients, so no pool is opened for them
+        self.openai_client_options = self._openai_client_options()
+        self.http_client: httpx.Client | None = None
+        self.request_client: openai.OpenAI | None = None
+        if self.openai_client_options is not None:
+            self.http_client = httpx.Client(**self._http_client_options())
+            self.request_client = openai.OpenAI(
+                http_client=self.http_client, **self.openai_client_options
+            )
+
+        # Async requests get their own pool, created for the event loop that uses it
+        self.async_http_client: httpx.AsyncClient | None = None
+        self.async_request_client: openai.AsyncOpenAI | None = None
+        self._async_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+        # The configured API key is passed with each request rather than set in the
+        # environment, so clients with different keys don't interfere. Without one,
+        # LiteLLM falls back to the provider's usual environment variable
+        self.request_params: dict[str, Any] = {}
         if config.api_key:
-            if config.llm_provider == "openai":
-                import os
-                os.environ["OPENAI_API_KEY"] = config.api_key
-            elif config.llm_provider == "anthropic":
-                import os
-                os.environ["ANTHROPIC_API_KEY"] = config.api_key
-            elif config.llm_provider == "google":
-                import os
-                os.environ["GOOGLE_API_KEY"] = config.api_key
-            # Add other providers as needed
-
-    def _get_safe_params(self, custom_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+            self.request_params["api_key"] = config.api_key
+
+    def _http_client_options(self) -> dict[str, Any]:
+        """Connection pool settings shared by the sync and async HTTP clients."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.config.max_concurrency * 2,
+                max_keepalive_connections=self.config.max_concurrency,
+                keepalive_expiry=self.KEEPALIVE_EXPIRY
+            ),
+            "timeout": httpx.Timeout(600.0, connect=10.0),
+            "follow_redirects": True
+        }
+
+    def _openai_client_options(self) -> dict[str, Any] | None:
+        """Settings for the OpenAI SDK clients passed with each request.
+
+        LiteLLM uses a given SDK client as is, so the key, base URL and organization
+        are resolved the way LiteLLM would. SDK retries are off, because LiteLLM
+        already retries each request NUM_RETRIES times. Other providers, and OpenAI
+        without a key, get None, and LiteLLM uses its own pooled clients.
+        """
+        if self.config.llm_provider != "openai":
+            return None
+
+        api_key = self.config.api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+
+        return {
+            "api_key": api_key,
+            "base_url": os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE"),
+            "organization": os.getenv("OPENAI_ORGANIZATION"),
+            "max_retries": 0
+        }
+
+    def _use_async_http_client(self) -> None:
+        """Make sure async requests have a pooled client for the running event loop.
+
+        Async connections are bound to the loop that opened them, so a new pool is
+        created whenever requests are made from a different loop.
+        """
+        if self.openai_client_options is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        if self.async_http_client is None or self._async_http_client_loop is not loop:
+            self.async_http_client = httpx.AsyncClient(**self._http_client_options())
+            self.async_request_client = openai.AsyncOpenAI(
+                http_client=self.async_http_client, **self.openai_client_options
+            )
+            self._async_http_client_loop = loop
+
+    async def aclose(self) -> None:
+        """Close the async connection pool; must run on the event loop that used it."""
+        if self.async_http_client is not None:
+            await self.async_http_client.aclose()
+            self.async_http_client = None
+            self.async_request_client = None
+            self._async_http_client_loop = None
+
+    @contextlib.asynccontextmanager
+    async def async_requests(self):
+        """Scope async requests to a block, closing their connections before the loop ends."""
+        try:
+            yield self
+        finally:
+            await self.aclose()
+
+    def close(self) -> None:
+        """Close the shared HTTP connection pool, if one was opened.
+
+        The async pool is closed by aclose, on its own event loop.
+        """
+        if self.http_client is not None:
+            self.http_client.close()
+
+    def _messages(self, prompt: Prompt) -> list[dict[str, Any]]:
+        """Get the messages for a prompt, wrapping plain prompts in a single user message."""
+        if isinstance(prompt, str):
+            return [{"role": "user", "content": prompt}]
+        return prompt
+
+    def _completion(self, prompt: Prompt, **params):
+        """Send a single-prompt completion request, retrying transient failures.
+
+        Rate limits, timeouts and connection errors are retried with exponential
+        backoff so concurrent requests don't hammer a provider that is recovering.
+        """
+        return litellm.completion(
+            model=self.model,
+            messages=self._messages(prompt),
+            num_retries=self.NUM_RETRIES,
+            retry_strategy="exponential_backoff_retry",
+            client=self.request_client,
+            **self.request_params,
+            **params
+        )
+
+    async def _acompletion(self, prompt: Prompt, **params):
+        """Async counterpart of _completion, for use from an event loop."""
+        self._use_async_http_client()
+        return await litellm.acompletion(
+            model=self.model,
+            messages=self._messages(prompt),
+            num_retries=self.NUM_RETRIES,
+            retry_strategy="exponential_backoff_retry",
+            client=self.async_request_client,
+            **self.request_params,
+            **params
+        )
+
+    def _get_safe_params(self, custom_params: dict[str, Any] | None = None) -> dict[str, Any]:
         """Get safe parameters for the current model."""
         params = {}
 
         # Get model compatibility or use default
-        model_compat = self.MODEL_PARAM_COMPATIBILITY.get(
+        supported = self.MODEL_PARAM_COMPATIBILITY.get(
             self.model,
             self.MODEL_PARAM_COMPATIBILITY["_default"]
         )
 
         # Add temperature if supported
-        if model_compat.get("temperature", False):
+        if "temperature" in supported:
             if self.config.temperature is not None:
                 params["temperature"] = self.config.temperature
             else:
                 params["temperature"] = 0.1  # Default for deterministic results
 
         # Add max_tokens if supported (high limit for modern models processing large blog posts)
-        if model_compat.get("max_tokens", False):
+        if "max_tokens" in supported:
             params["max_tokens"] = 32000
 
         # Merge custom parameters
         if custom_params:
             for key, value in custom_params.items():
-                if model_compat.get(key, False):
+                if key in supported:
                     params[key] = value
 
         # Merge user-configured parameters
         for key, value in self.config.llm_params.items():
-            if model_compat.get(key, False):
+            if key in supported:
                 params[key] = value
 
         return params
 
-    def convert_blog_to_instructions(self, release: ReleaseInfo, blog_content: str) -> str:
-        """Convert blog post content to compatibility checking instructions."""
-        prompt = f"""
-You are a NuShell expert analyzing release notes. Your task is to convert the blog post content for NuShell {release.version} into a set of specific, actionable instructions for checking if existing NuShell scripts are compatible with this version.
-
-Focus on:
-1. Breaking changes that affect script syntax or behavior
-2. Deprecated features and their replacements
-3. New syntax requirements or restrictions
-4. Changes to built-in commands or their parameters
-5. Changes to variable scoping or data types
-
-For each breaking change, provide:
-- A clear description of what changed
-- How to detect if a script uses the old pattern
-- What the new pattern should be
-
-Ignore:
-- New features that don't affect existing scripts
-- Performance improvements
-- Bug fixes that don't change expected behavior
-- Documentation updates
-
-Blog post content:
-{blog_content}
+    def _build_instructions_prompt(self, release: ReleaseInfo, blog_content: str) -> str:
+        """Build the prompt that converts a release blog post into compatibility instructions."""
+        return INSTRUCTIONS_PROMPT_TEMPLATE.format(
+            version=release.version, blog_content=blog_content
+        )
 
-Please provide the output as a structured list of compatibility checks:
-"""
+    async def convert_blog_to_instructions_async(self, release: ReleaseInfo, blog_content: str) -> str:
+        """Convert blog post content to compatibility instructions without blocking the event loop."""
+        prompt = self._build_instructions_prompt(release, blog_content)
 
         try:
             params = self._get_safe_params()
-            response = litellm.completion(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                **params
-            )
+            response = await self._acompletion(prompt, **params)
 
             result = response.choices[0].message.content
             if result is None:
@@ -126,102 +447,300 @@ Please provide the output as a structured list of compatibility checks:
 
             return result.strip()
         except Exception as e:
-            raise RuntimeError(f"Failed to process blog post for {release.version}: {e}")
+            raise RuntimeError(f"Failed to process blog post for {release.version}: {e}") from e
+
+    def supports_batch(self) -> bool:
+        """Check whether the configured provider supports the Batch API."""
+        return self.config.llm_provider in self.BATCH_PROVIDERS
 
-    def analyze_script_compatibility(
+    def convert_blogs_to_instructions_batch(
         self,
-        script: ScriptFile,
+        blog_posts: list[tuple[ReleaseInfo, str]],
+        poll_interval: float = 30.0
+    ) -> dict[str, str]:
+        """Convert several blog posts to compatibility instructions in one batch job.
+
+        Batch jobs are billed at a discount and are not subject to per-request
+        rate limits, at the cost of latency (up to the 24h completion window).
+
+        Args:
+            blog_posts: Pairs of release information and blog post content
+            poll_interval: Seconds to wait between batch status checks
+
+        Returns:
+            Mapping of release version to compatibility instructions. Releases whose
+            requests failed within the batch are omitted.
+        """
+        if not blog_posts:
+            return {}
+
+        prompts = {
+            release.version: self._build_instructions_prompt(release, blog_content)
+            for release, blog_content in blog_posts
+        }
+        try:
+            results = self._run_batch_job(prompts, "instructions.jsonl", poll_interval)
+        except Exception as e:
+            raise RuntimeError(f"Failed to process blog posts in batch mode: {e}") from e
+
+        return {version: content.strip() for version, content in results.items()}
+
+    def analyze_scripts_batch_job(
+        self,
+        analyses: list[tuple[ScriptFile, list[str]]],
         target_version: str,
-        compatibility_instructions: List[str]
-    ) -> List[CompatibilityIssue]:
-        """Analyze script compatibility against breaking changes."""
-        # Read script content
+        poll_interval: float = 30.0
+    ) -> dict[str, list[CompatibilityIssue]]:
+        """Analyze scripts offline in one batch job instead of interactive requests.
+
+        Args:
+            analyses: Pairs of script and the compatibility instructions it needs
+            target_version: Target NuShell version
+            poll_interval: Seconds to wait between batch status checks
+
+        Returns:
+            Mapping of script path (as a string) to compatibility issues. Scripts whose
+            requests failed within the batch are omitted.
+        """
+        if not analyses:
+            return {}
+
+        prompts = {
+            str(script.path): self._build_analysis_prompt(script, target_version, instructions)
+            for script, instructions in analyses
+        }
         try:
-            with open(script.path, "r", encoding="utf-8", errors="ignore") as f:
-                script_content = f.read()
-        except (OSError, UnicodeDecodeError) as e:
-            raise RuntimeError(f"Failed to read script {script.path}: {e}")
+            results = self._run_batch_job(prompts, "analysis.jsonl", poll_interval)
+        except Exception as e:
+            raise RuntimeError(f"Failed to analyze scripts in batch mode: {e}") from e
 
-        # Combine all compatibility instructions
-        all_instructions = "\n\n".join(compatibility_instructions)
+        return {
+            path: self._parse_analysis_response(content.strip())
+            for path, content in results.items()
+        }
 
-        prompt = f"""
-You are a NuShell expert analyzing script compatibility. Review the following NuShell script against the compatibility requirements for version {target_version}.
+    def _run_batch_job(
+        self,
+        prompts: dict[str, Prompt],
+        filename: str,
+        poll_interval: float
+    ) -> dict[str, str]:
+        """Submit prompts as a Batch API job and wait for it to finish.
 
-Script path: {script.path}
-Last known compatible version: {script.compatible_version}
-Target version: {target_version}
+        Args:
+            prompts: Mapping of custom ID to prompt
+            filename: Name of the uploaded JSONL input file
+            poll_interval: Seconds to wait between batch status checks
 
-Compatibility requirements to check:
-{all_instructions}
+        Returns:
+            Mapping of custom ID to response content, without the failed requests
+        """
+        provider = self.config.llm_provider
+        params = self._get_safe_params()
+        lines = []
+        for custom_id, prompt in prompts.items():
+            lines.append(orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.config.llm_model,
+                    "messages": self._messages(prompt),
+                    **params
+                }
+            }))
+
+        batch_file = litellm.create_file(
+            file=(filename, b"\n".join(lines)),
+            purpose="batch",
+            custom_llm_provider=provider,
+            **self.request_params
+        )
+        batch = litellm.create_batch(
+            completion_window="24h",
+            endpoint="/v1/chat/completions",
+            input_file_id=batch_file.id,
+            custom_llm_provider=provider,
+            **self.request_params
+        )
 
-Script content:
-```nushell
-{script_content}
-```
+        while batch.status not in self.BATCH_TERMINAL_STATUSES:
+            time.sleep(poll_interval)
+            batch = litellm.retrieve_batch(
+                batch_id=batch.id, custom_llm_provider=provider, **self.request_params
+            )
 
-Analyze the script and identify any compatibility issues. For each issue found, provide:
-1. A clear description of the problem
-2. The specific line(s) or pattern that causes the issue
-3. A suggested fix or replacement
-4. The severity level (error, warning, info)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"batch {batch.id} finished with status '{batch.status}'")
 
-If the script is fully compatible, respond with "COMPATIBLE".
+        output = litellm.file_content(
+            file_id=batch.output_file_id,
+            custom_llm_provider=provider,
+            **self.request_params
+        )
 
-Format your response as a JSON array of issues:
-[
-  {{
-    "description": "Clear description of the issue",
-    "suggested_fix": "How to fix it",
-    "severity": "error|warning|info"
-  }}
-]
+        results = {}
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                print(f"  Warning: Batch request failed for {entry.get('custom_id')}")
+                continue
 
-Or simply: COMPATIBLE
-"""
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[entry["custom_id"]] = content or ""
+
+        return results
 
+    def _read_script(self, script: ScriptFile) -> str:
+        """Read a script's content for a prompt, reusing content already read."""
         try:
-            params = self._get_safe_params()
-            response = litellm.completion(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                **params
-            )
+            return script.read_content()
+        except (OSError, UnicodeDecodeError) as e:
+            raise RuntimeError(f"Failed to read script {script.path}: {e}") from e
 
-            result = response.choices[0].message.content.strip()
+    def _system_message(self, content: str) -> dict[str, Any]:
+        """Build a system message whose content providers may cache as a prompt prefix.
 
-            if result == "COMPATIBLE":
-                return []
+        OpenAI caches long prefixes automatically, while Anthropic needs the
+        cacheable block marked explicitly.
+        """
+        if self.config.llm_provider == "anthropic":
+            return {
+                "role": "system",
+                "content": [{
+                    "type": "text",
+                    "text": content,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+        return {"role": "system", "content": content}
+
+    def _build_analysis_prompt(
+        self,
+        script: ScriptFile,
+        target_version: str,
+        compatibility_instructions: list[str]
+    ) -> list[dict[str, Any]]:
+        """Read a script and build the messages that check it against compatibility instructions."""
+        script_content = self._read_script(script)
 
-            # Parse JSON response
-            import json
-            try:
-                issues_data = json.loads(result)
-                return [
+        system_prompt = _system_prompt(
+            ANALYSIS_SYSTEM_PROMPT_TEMPLATE, target_version, tuple(compatibility_instructions)
+        )
+        return [
+            self._system_message(system_prompt),
+            {"role": "user", "content": ANALYSIS_PROMPT_TEMPLATE.format(
+                target_version=target_version,
+                script_path=script.path,
+                compatible_version=script.compatible_version,
+                script_content=script_content
+            )}
+        ]
+
+    def _parse_analysis_response(self, result: str) -> list[CompatibilityIssue]:
+        """Parse a script analysis response into compatibility issues."""
+        if result == "COMPATIBLE":
+            return []
+
+        # Parse JSON response
+        try:
+            issues_data = orjson.loads(result)
+            return [
+                CompatibilityIssue(
+                    description=issue["description"],
+                    suggested_fix=issue.get("suggested_fix"),
+                    severity=issue.get("severity", "warning")
+                )
+                for issue in issues_data
+            ]
+        except orjson.JSONDecodeError:
+            # Fallback: treat entire response as a single issue
+            return [CompatibilityIssue(
+                description=result,
+                severity="warning"
+            )]
+
+    def analyze_scripts_batch(
+        self,
+        scripts: list[ScriptFile],
+        target_version: str,
+        compatibility_instructions: list[str]
+    ) -> list[list[CompatibilityIssue]]:
+        """Analyze several scripts that share compatibility instructions in one request.
+
+        The instructions are sent once for the whole group instead of once per script.
+
+        Args:
+            scripts: Scripts to analyze, all needing the same instructions
+            target_version: Target NuShell version
+            compatibility_instructions: List of compatibility instructions
+
+        Returns:
+            Compatibility issues for each script, in the same order as scripts
+
+        Raises:
+            ValueError: If the response doesn't contain results for every script
+        """
+        script_sections = []
+        for script_id, script in enumerate(scripts, 1):
+            script_content = self._read_script(script)
+
+            script_sections.append(SCRIPT_SECTION_TEMPLATE.format(
+                script_id=script_id,
+                script_path=script.path,
+                compatible_version=script.compatible_version,
+                script_content=script_content
+            ))
+
+        system_prompt = _system_prompt(
+            SCRIPTS_ANALYSIS_SYSTEM_PROMPT_TEMPLATE, target_version, tuple(compatibility_instructions)
+        )
+        prompt = [
+            self._system_message(system_prompt),
+            {"role": "user", "content": "Scripts:\n" + "\n\n".join(script_sections)}
+        ]
+
+        try:
+            params = self._get_safe_params()
+            response = self._completion(prompt, **params)
+            result = (response.choices[0].message.content or "").strip()
+        except Exception as e:
+            raise RuntimeError(f"Failed to analyze scripts {', '.join(str(s.path) for s in scripts)}: {e}") from e
+
+        try:
+            results_data = orjson.loads(result)
+            issues_by_id = {
+                entry["script_id"]: [
                     CompatibilityIssue(
                         description=issue["description"],
                         suggested_fix=issue.get("suggested_fix"),
                         severity=issue.get("severity", "warning")
                     )
-                    for issue in issues_data
+                    for issue in entry["issues"]
                 ]
-            except json.JSONDecodeError:
-                # Fallback: treat entire response as a single issue
-                return [CompatibilityIssue(
-                    description=result,
-                    severity="warning"
-                )]
+                for entry in results_data
+            }
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Could not parse batched analysis response: {e}") from e
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to analyze script {script.path}: {e}")
+        missing = [script_id for script_id in range(1, len(scripts) + 1) if script_id not in issues_by_id]
+        if missing:
+            raise ValueError(f"Batched analysis response is missing scripts {missing}")
+
+        return [issues_by_id[script_id] for script_id in range(1, len(scripts) + 1)]
 
     def convert_blog_to_instructions_streaming(
         self,
         release: ReleaseInfo,
         blog_content: str,
-        progress_callback: Optional[Callable[[str], None]] = None
+        progress_callback: Callable[[str], None] | None = None
     ) -> str:
-        """Convert blog post content to compatibility checking instructions with streaming.
+        """Convert blog post content to compatibility checking instructions.
+
+        The response is only streamed when a progress callback is given.
 
         Args:
             release: Release information
@@ -231,162 +750,76 @@ Or simply: COMPATIBLE
         Returns:
             Compatibility checking instructions
         """
-        prompt = f"""
-You are a NuShell expert analyzing release notes. Your task is to convert the blog post content for NuShell {release.version} into a set of specific, actionable instructions for checking if existing NuShell scripts are compatible with this version.
-
-Focus on:
-1. Breaking changes that affect script syntax or behavior
-2. Deprecated features and their replacements
-3. New syntax requirements or restrictions
-4. Changes to built-in commands or their parameters
-5. Changes to variable scoping or data types
-
-For each breaking change, provide:
-- A clear description of what changed
-- How to detect if a script uses the old pattern
-- What the new pattern should be
-
-Ignore:
-- New features that don't affect existing scripts
-- Performance improvements
-- Bug fixes that don't change expected behavior
-- Documentation updates
-
-Blog post content:
-{blog_content}
-
-Please provide the output as a structured list of compatibility checks:
-"""
+        prompt = self._build_instructions_prompt(release, blog_content)
 
         try:
-            # Try streaming first, fallback to regular completion
-            try:
-                return self._stream_completion(prompt, progress_callback)
-            except Exception:
-                # Fallback to non-streaming
-                params = self._get_safe_params()
-                response = litellm.completion(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    **params
-                )
-                result = response.choices[0].message.content
-                if result is None:
-                    print(f"  Warning: LLM returned None content for {release.version}")
-                    return ""
-                return result.strip()
-
+            result = self._stream_completion(prompt, progress_callback)
         except Exception as e:
-            raise RuntimeError(f"Failed to process blog post for {release.version}: {e}")
+            raise RuntimeError(f"Failed to process blog post for {release.version}: {e}") from e
+
+        if not result:
+            print(f"  Warning: LLM returned no content for {release.version}")
+        return result
 
     def analyze_script_compatibility_streaming(
         self,
         script: ScriptFile,
         target_version: str,
-        compatibility_instructions: List[str],
-        progress_callback: Optional[Callable[[str], None]] = None
-    ) -> List[CompatibilityIssue]:
-        """Analyze script compatibility against breaking changes with streaming.
+        compatibility_instructions: list[str],
+        progress_callback: Callable[[str], None] | None = None,
+        issue_callback: Callable[[CompatibilityIssue], None] | None = None
+    ) -> list[CompatibilityIssue]:
+        """Analyze script compatibility against breaking changes.
+
+        The response is only streamed when a callback is given.
 
         Args:
             script: Script file information
             target_version: Target NuShell version
             compatibility_instructions: List of compatibility instructions
             progress_callback: Optional callback for progress updates
+            issue_callback: Optional callback for each issue as soon as it has been
+                streamed, before the rest of the response arrives
 
         Returns:
             List of compatibility issues found
         """
-        # Read script content
-        try:
-            with open(script.path, "r", encoding="utf-8", errors="ignore") as f:
-                script_content = f.read()
-        except (OSError, UnicodeDecodeError) as e:
-            raise RuntimeError(f"Failed to read script {script.path}: {e}")
-
-        # Combine all compatibility instructions
-        all_instructions = "\n\n".join(compatibility_instructions)
-
-        prompt = f"""
-You are a NuShell expert analyzing script compatibility. Review the following NuShell script against the compatibility requirements for version {target_version}.
-
-Script path: {script.path}
-Last known compatible version: {script.compatible_version}
-Target version: {target_version}
-
-Compatibility requirements to check:
-{all_instructions}
-
-Script content:
-```nushell
-{script_content}
-```
-
-Analyze the script and identify any compatibility issues. For each issue found, provide:
-1. A clear description of the problem
-2. The specific line(s) or pattern that causes the issue
-3. A suggested fix or replacement
-4. The severity level (error, warning, info)
-
-If the script is fully compatible, respond with "COMPATIBLE".
-
-Format your response as a JSON array of issues:
-[
-  {{
-    "description": "Clear description of the issue",
-    "suggested_fix": "How to fix it",
-    "severity": "error|warning|info"
-  }}
-]
-
-Or simply: COMPATIBLE
-"""
+        prompt = self._build_analysis_prompt(script, target_version, compatibility_instructions)
+
+        if issue_callback is not None:
+            parser = _IssueStreamParser()
+            token_callback = progress_callback
+
+            def progress_callback(text: str) -> None:
+                if token_callback:
+                    token_callback(text)
+                if not text.startswith("__USAGE__"):
+                    for issue in parser.feed(text):
+                        if isinstance(issue.get("description"), str):
+                            issue_callback(CompatibilityIssue(
+                                description=issue["description"],
+                                suggested_fix=issue.get("suggested_fix"),
+                                severity=issue.get("severity", "warning")
+                            ))
 
         try:
-            # Try streaming first, fallback to regular completion
-            try:
-                result = self._stream_completion(prompt, progress_callback)
-            except Exception:
-                # Fallback to non-streaming
-                params = self._get_safe_params()
-                response = litellm.completion(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    **params
-                )
-                result = response.choices[0].message.content.strip()
-
-            if result == "COMPATIBLE":
-                return []
-
-            # Parse JSON response
-            import json
-            try:
-                issues_data = json.loads(result)
-                return [
-                    CompatibilityIssue(
-                        description=issue["description"],
-                        suggested_fix=issue.get("suggested_fix"),
-                        severity=issue.get("severity", "warning")
-                    )
-                    for issue in issues_data
-                ]
-            except json.JSONDecodeError:
-                # Fallback: treat entire response as a single issue
-                return [CompatibilityIssue(
-                    description=result,
-                    severity="warning"
-                )]
+            result = self._stream_completion(prompt, progress_callback)
+            return self._parse_analysis_response(result)
 
         except Exception as e:
-            raise RuntimeError(f"Failed to analyze script {script.path}: {e}")
+            raise RuntimeError(f"Failed to analyze script {script.path}: {e}") from e
 
     def _stream_completion(
         self,
-        prompt: str,
-        progress_callback: Optional[Callable[[str], None]] = None
+        prompt: Prompt,
+        progress_callback: Callable[[str], None] | None = None
     ) -> str:
-        """Perform streaming completion with progress updates.
+        """Perform a completion, streamed with progress updates if a callback is given.
+
+        Without a callback there is nothing to report while the response is being
+        generated, so a regular completion is used. A stream that fails before its
+        first chunk falls back to a regular completion; once content has reached
+        the callback, failures are raised instead of repeating the request.
 
         Args:
             prompt: The prompt to send to the LLM
@@ -397,45 +830,84 @@ Or simply: COMPATIBLE
         """
         params = self._get_safe_params()
 
-        # Add streaming parameters
-        params.update({
-            "stream": True,
-            "stream_options": {"include_usage": True}
-        })
+        if progress_callback is not None:
+            try:
+                stream = iter(self._completion(
+                    prompt,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **params
+                ))
+                first_chunk = next(stream, None)
+            except Exception:  # noqa: BLE001 - providers reject streaming with assorted errors
+                # Nothing has been reported yet, so fall back to non-streaming
+                first_chunk = stream = None
 
-        response = litellm.completion(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            **params
-        )
+            if stream is not None:
+                if first_chunk is not None:
+                    stream = itertools.chain((first_chunk,), stream)
+                return self._collect_stream(stream, progress_callback)
 
-        # Collect the streamed response
-        content_parts = []
+        response = self._completion(prompt, **params)
+        return (response.choices[0].message.content or "").strip()
 
-        for chunk in response:
-            # Handle different chunk types
-            if hasattr(chunk, 'choices') and chunk.choices:
-                delta = chunk.choices[0].delta
+    def _collect_stream(self, response, progress_callback: Callable[[str], None]) -> str:
+        """Collect a streamed response, reporting new content to the progress callback.
 
-                if hasattr(delta, 'content') and delta.content:
-                    content_parts.append(delta.content)
+        Args:
+            response: Streamed completion response
+            progress_callback: Callback for token updates
 
-                    # Call progress callback if provided
-                    if progress_callback:
-                        try:
-                            progress_callback(delta.content)
-                        except Exception:
-                            # Don't let callback errors break streaming
-                            pass
+        Returns:
+            Complete response content
+        """
+        # Collect the streamed response, passing new content to the callback at
+        # most once per interval rather than once per token
+        content = io.StringIO()
+        pending: list[str] = []
+        last_flush = time.monotonic()
+
+        # Bound once, since the loop body runs for every streamed token
+        write_content = content.write
+        add_pending = pending.append
+        monotonic = time.monotonic
+        interval = self.STREAM_CALLBACK_INTERVAL
+
+        for chunk in response:
+            try:
+                delta_content = chunk.choices[0].delta.content
+            except (AttributeError, IndexError, TypeError):
+                delta_content = None
+
+            if delta_content:
+                write_content(delta_content)
+                add_pending(delta_content)
+                now = monotonic()
+                if now - last_flush >= interval:
+                    self._notify_progress(progress_callback, "".join(pending))
+                    pending.clear()
+                    last_flush = now
 
             # Handle usage information if available
-            if hasattr(chunk, 'usage') and chunk.usage:
+            usage = getattr(chunk, "usage", None)
+            if usage:
                 # This is the final chunk with usage info
-                if progress_callback:
-                    try:
-                        # Send usage info as a special callback
-                        progress_callback(f"__USAGE__{chunk.usage}")
-                    except Exception:
-                        pass
-
-        return ''.join(content_parts).strip()
\ No newline at end of file
+                if pending:
+                    self._notify_progress(progress_callback, "".join(pending))
+                    pending.clear()
+                # Send usage info as a special callback
+                self._notify_progress(progress_callback, f"__USAGE__{usage}")
+
+        if pending:
+            self._notify_progress(progress_callback, "".join(pending))
+
+        return content.getvalue().strip()
+
+    @staticmethod
+    def _notify_progress(progress_callback: Callable[[str], None], text: str) -> None:
+        """Invoke a streaming progress callback, ignoring its errors."""
+        try:
+            progress_callback(text)
+        except Exception:
+            # Don't let callback errors break streaming
+            pass
@@ -1,7 +1,10 @@
+import mmap
+import sys
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Optional, List
+from typing import ClassVar
+from .version_manager import parse_version
 
 
 class CompatibilityMethod(Enum):
@@ -10,47 +13,103 @@ class CompatibilityMethod(Enum):
     DEFAULT_ASSUMPTION = "default_assumption"
 
 
-@dataclass
+@dataclass(slots=True)
 class ScriptFile:
     path: Path
     compatible_version: str
     method: CompatibilityMethod
     has_shebang: bool = False
+    size: int | None = None  # Script size in bytes, recorded at scan time
+    content: str | None = None  # Script content, read on first use
 
+    # Scripts at least this many bytes long are memory-mapped when read
+    MMAP_THRESHOLD: ClassVar[int] = 64 * 1024
 
-@dataclass
+    def __post_init__(self):
+        # Most scripts share a handful of versions, each read separately from
+        # its own header; interning dedups them and makes version key lookups
+        # hit by identity
+        self.compatible_version = sys.intern(self.compatible_version)
+
+    @property
+    def version_key(self) -> tuple[int, ...]:
+        """Parsed compatible version, for tuple comparisons."""
+        return parse_version(self.compatible_version)
+
+    def read_content(self) -> str:
+        """Read the script's content, keeping it so later reads don't touch the file.
+
+        Scripts known to be large are memory-mapped and decoded straight from the
+        mapping, avoiding an intermediate copy of the raw bytes. Undecodable bytes
+        are dropped.
+
+        Raises:
+            OSError: If the script can't be read
+        """
+        if self.content is not None:
+            return self.content
+
+        if self.size is None or self.size < self.MMAP_THRESHOLD:
+            with open(self.path, encoding="utf-8", errors="ignore") as f:
+                self.content = f.read()
+            return self.content
+
+        with open(self.path, "rb") as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    content = str(mapped, "utf-8", "ignore")
+            except ValueError:
+                # Empty files can't be mapped
+                content = ""
+
+        # Match the newline translation of text mode reads
+        if "\r" in content:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        self.content = content
+        return content
+
+
+@dataclass(slots=True)
 class CompatibilityIssue:
     description: str
-    suggested_fix: Optional[str] = None
+    suggested_fix: str | None = None
     severity: str = "warning"
 
 
-@dataclass
+@dataclass(slots=True)
 class ScriptAnalysis:
     script: ScriptFile
     target_version: str
-    issues: List[CompatibilityIssue]
+    issues: list[CompatibilityIssue]
     is_compatible: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class ReleaseInfo:
     version: str
-    blog_post_url: Optional[str]
-    blog_post_content: Optional[str] = None
-    compatibility_instructions: Optional[str] = None
+    blog_post_url: str | None
+    blog_post_content: str | None = None
+    compatibility_instructions: str | None = None
+
+    @property
+    def version_key(self) -> tuple[int, ...]:
+        """Parsed release version, for tuple comparisons."""
+        return parse_version(self.version)
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     llm_provider: str = "openai"
     llm_model: str = "gpt-4"
-    api_key: Optional[str] = None
-    github_token: Optional[str] = None
-    scan_directories: List[str] = None
-    temperature: Optional[float] = None
-    llm_params: Optional[dict] = None
+    api_key: str | None = None
+    github_token: str | None = None
+    scan_directories: list[str] = None
+    temperature: float | None = None
+    llm_params: dict | None = None
     cache_enabled: bool = True
+    max_concurrency: int = 8
+    batch_mode: bool = False
+    max_scripts_per_request: int = 1
 
     def __post_init__(self):
         if self.scan_directories is None:
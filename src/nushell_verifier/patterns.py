@@ -0,0 +1,22 @@
+"""Patterns shared by the scanner and the version manager."""
+
+import re
+
+# First line of a script run by NuShell, e.g. "#!/usr/bin/env nu"
+NUSHELL_SHEBANG_PATTERN = re.compile(r"^#!\s*.*nu(?:shell)?(?:\s|$)")
+
+# Header comment declaring the latest NuShell version a script is known to work with
+VERSION_COMMENT_KEY = "nushell-compatible-with:"
+VERSION_COMMENT_PATTERN = re.compile(r"^\s*#\s*nushell-compatible-with:\s*(\S+)")
+
+# Number of leading lines searched for a version comment
+VERSION_COMMENT_HEADER_LINES = 20
+
+
+def is_nushell_shebang(line: str) -> bool:
+    """Check whether a script's first line is a NuShell shebang.
+
+    Most lines checked are from files that aren't scripts at all, so cheap
+    literal checks rule those out before the pattern is matched.
+    """
+    return line.startswith("#!") and "nu" in line and bool(NUSHELL_SHEBANG_PATTERN.match(line))
@@ -1,8 +1,8 @@
 """
 Real-time progress management for script analysis.
 """
+import threading
 import time
-from typing import Optional
 from pathlib import Path
 from alive_progress import alive_bar
 from dataclasses import dataclass
@@ -20,10 +20,24 @@ class ProgressConfig:
 class ScriptProgressManager:
     """Manages progress display for individual script analysis."""
 
+    # Streaming updates these on every chunk, so keep attribute access off the instance dict
+    __slots__ = (
+        "_bar",
+        "_current_phase",
+        "_estimated_tokens",
+        "_issue_count",
+        "_phase_start_time",
+        "_start_time",
+        "_token_count",
+        "config",
+        "disabled",
+        "script_name",
+    )
+
     def __init__(
         self,
         script_name: str,
-        config: Optional[ProgressConfig] = None,
+        config: ProgressConfig | None = None,
         disable_progress: bool = False
     ):
         """Initialize progress manager for a script.
@@ -41,6 +55,7 @@ class ScriptProgressManager:
         self._current_phase = "Initializing"
         self._token_count = 0
         self._estimated_tokens = None
+        self._issue_count = 0
         self._start_time = None
         self._phase_start_time = None
 
@@ -50,12 +65,15 @@ class ScriptProgressManager:
             self._start_time = time.time()
             self._phase_start_time = self._start_time
 
-            # Create alive_bar with dynamic title
+            # Create alive_bar with dynamic title. Its render thread otherwise
+            # redraws at up to 60 fps; the text only changes on our updates, so
+            # refresh at the update interval instead
             self._bar = alive_bar(
                 title=f"📄 {self.script_name}",
                 length=20,
                 spinner="classic",
-                unknown="stars"
+                unknown="stars",
+                refresh_secs=self.config.update_interval
             ).__enter__()
 
             self.set_phase("Starting analysis")
@@ -70,7 +88,7 @@ class ScriptProgressManager:
             except Exception:
                 pass  # Ignore cleanup errors
 
-    def set_phase(self, phase: str, estimated_tokens: Optional[int] = None):
+    def set_phase(self, phase: str, estimated_tokens: int | None = None):
         """Set the current processing phase.
 
         Args:
@@ -89,7 +107,7 @@ class ScriptProgressManager:
             # Update the progress bar title with current phase
             self._update_display()
 
-    def update_tokens(self, new_tokens: int, total_estimated: Optional[int] = None):
+    def update_tokens(self, new_tokens: int, total_estimated: int | None = None):
         """Update token progress.
 
         Args:
@@ -103,10 +121,12 @@ class ScriptProgressManager:
         if total_estimated is not None:
             self._estimated_tokens = total_estimated
 
+        # Streamed content arrives coalesced, and the bar only redraws every
+        # update interval, so this just refreshes its text
         if self._bar and self.config.show_tokens:
             self._update_display()
 
-    def set_tokens(self, current_tokens: int, total_estimated: Optional[int] = None):
+    def set_tokens(self, current_tokens: int, total_estimated: int | None = None):
         """Set absolute token count.
 
         Args:
@@ -123,6 +143,15 @@ class ScriptProgressManager:
         if self._bar and self.config.show_tokens:
             self._update_display()
 
+    def add_issue(self):
+        """Count an issue found while the analysis is still running."""
+        if self.disabled:
+            return
+
+        self._issue_count += 1
+        if self._bar:
+            self._update_display()
+
     def _update_display(self):
         """Update the progress bar display."""
         if not self._bar:
@@ -134,6 +163,9 @@ class ScriptProgressManager:
         if self.config.show_phases:
             parts.append(f"Phase: {self._current_phase}")
 
+        if self._issue_count > 0:
+            parts.append(f"Issues: {self._issue_count}")
+
         if self.config.show_tokens and self._token_count > 0:
             if self._estimated_tokens:
                 percentage = min(100, (self._token_count / self._estimated_tokens) * 100)
@@ -171,10 +203,63 @@ class ScriptProgressManager:
             self._update_display()
 
 
+class SharedProgressManager(ScriptProgressManager):
+    """Progress display shared by scripts analyzed at the same time.
+
+    alive_progress can't draw overlapping bars, so concurrently analyzed scripts
+    report their tokens and issues to this one bar instead of a bar each. Each
+    script adds its own estimate as it starts, so the total grows with the
+    scripts in flight.
+    """
+
+    __slots__ = ("_lock",)
+
+    def __init__(
+        self,
+        title: str,
+        config: ProgressConfig | None = None,
+        disable_progress: bool = False
+    ):
+        """Initialize the shared progress display.
+
+        Args:
+            title: Title shown on the bar
+            config: Progress configuration
+            disable_progress: Whether to disable all progress display
+        """
+        super().__init__(title, config, disable_progress)
+        # Updates come from the worker threads analyzing the scripts
+        self._lock = threading.Lock()
+
+    def add_estimate(self, estimated_tokens: int):
+        """Add a starting script's estimated tokens to the total.
+
+        Args:
+            estimated_tokens: Estimated tokens for the script
+        """
+        if self.disabled:
+            return
+
+        with self._lock:
+            self._estimated_tokens = (self._estimated_tokens or 0) + estimated_tokens
+            if self._bar and self.config.show_tokens:
+                self._update_display()
+
+    def update_tokens(self, new_tokens: int, total_estimated: int | None = None):
+        """Update token progress from any script's thread."""
+        with self._lock:
+            super().update_tokens(new_tokens, total_estimated)
+
+    def add_issue(self):
+        """Count an issue found by any script still being analyzed."""
+        with self._lock:
+            super().add_issue()
+
+
 class BatchProgressManager:
     """Manages progress display for batch script processing."""
 
-    def __init__(self, total_scripts: int, config: Optional[ProgressConfig] = None):
+    def __init__(self, total_scripts: int, config: ProgressConfig | None = None):
         """Initialize batch progress manager.
 
         Args:
@@ -185,24 +270,29 @@ class BatchProgressManager:
         self.config = config or ProgressConfig()
         self.current_script = 0
         self._start_time = time.time()
+        self._lock = threading.Lock()
 
-    def start_script(self, script_name: str) -> ScriptProgressManager:
+    def start_script(self, script_name: str, disable_progress: bool = False) -> ScriptProgressManager:
         """Start processing a new script.
 
         Args:
             script_name: Name of the script to process
+            disable_progress: Whether to suppress the progress bar for this script
 
         Returns:
             ScriptProgressManager for the script
         """
-        self.current_script += 1
+        # Scripts may be started from several worker threads at once
+        with self._lock:
+            self.current_script += 1
+            script_number = self.current_script
 
-        if not self.config.enabled:
+        if disable_progress or not self.config.enabled:
             return ScriptProgressManager(script_name, self.config, disable_progress=True)
 
         # Add batch context to script name
         if self.total_scripts > 1:
-            batch_info = f"[{self.current_script}/{self.total_scripts}]"
+            batch_info = f"[{script_number}/{self.total_scripts}]"
             display_name = f"{batch_info} {script_name}"
         else:
             display_name = script_name
@@ -224,22 +314,31 @@ class BatchProgressManager:
         )
 
 
-def estimate_tokens_for_script(script_path: Path) -> int:
+def estimate_tokens_for_script(
+    script_path: Path,
+    size: int | None = None,
+    script_tokens: int | None = None
+) -> int:
     """Estimate the number of tokens needed to analyze a script.
 
     Args:
         script_path: Path to the script file
+        size: Script size in bytes, if already known (avoids reading the file)
+        script_tokens: Exact token count of the script, if known (used instead
+            of estimating it from the script size)
 
     Returns:
         Estimated token count for analysis
     """
     try:
-        # Read script to estimate complexity
-        with open(script_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        if script_tokens is None:
+            if size is None:
+                # Read script to estimate complexity
+                with open(script_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    size = len(f.read())
 
-        # Basic estimation: ~4 characters per token
-        script_tokens = len(content) // 4
+            # Basic estimation: ~4 characters per token
+            script_tokens = size // 4
 
         # Analysis overhead: instructions + reasoning
         analysis_overhead = 800
@@ -270,16 +369,25 @@ class StreamingProgressCallback:
         self.total_tokens = 0
         self.completion_tokens = 0
 
+        # Streamed characters, and the tokens estimated from them so far
+        self._streamed_chars = 0
+        self._streamed_tokens = 0
+
     def on_token(self, token: str):
-        """Called when a new token is received.
+        """Called when new content is received.
 
         Args:
-            token: The new token content
+            token: The new content, possibly several streamed tokens coalesced
         """
-        # Count the token (rough estimation)
-        if token and token.strip():
-            self.completion_tokens += 1
-            self.progress_manager.update_tokens(1)
+        # Estimate tokens at roughly 4 characters each, like the script size based
+        # estimates the count is compared against. Characters are counted across
+        # calls, so content split into short pieces isn't undercounted.
+        self._streamed_chars += len(token)
+        count = self._streamed_chars // 4 - self._streamed_tokens
+        if count:
+            self._streamed_tokens += count
+            self.completion_tokens += count
+            self.progress_manager.update_tokens(count)
 
     def on_usage_update(self, usage_info: dict):
         """Called when usage information is updated.
@@ -1,6 +1,14 @@
-from typing import List
+import io
+import sys
 from .models import ScriptAnalysis
 
+# Severities in report order, with their label and icon
+SEVERITY_LEVELS = (
+    ("error", "ERROR", "🔴"),
+    ("warning", "WARNING", "🟡"),
+    ("info", "INFO", "🔵"),
+)
+
 
 class Reporter:
     """Reporter for generating compatibility analysis reports."""
@@ -9,82 +17,88 @@ class Reporter:
         """Initialize reporter with verbosity setting."""
         self.verbose = verbose
 
-    def generate_report(self, analyses: List[ScriptAnalysis]) -> None:
+    def generate_report(self, analyses: list[ScriptAnalysis]) -> None:
         """Generate and display compatibility report."""
         if not analyses:
             print("No scripts analyzed.")
             return
 
-        compatible_count = sum(1 for a in analyses if a.is_compatible)
-        total_count = len(analyses)
-
-        print(f"\n{'='*60}")
-        print("NUSHELL COMPATIBILITY REPORT")
-        print(f"{'='*60}")
-        print(f"Total scripts: {total_count}")
-        print(f"Compatible: {compatible_count}")
-        print(f"Issues found: {total_count - compatible_count}")
-        print(f"Target version: {analyses[0].target_version if analyses else 'Unknown'}")
+        # The report is written in one go rather than line by line
+        out = io.StringIO()
 
         # Group analyses by compatibility
-        compatible_scripts = [a for a in analyses if a.is_compatible]
-        incompatible_scripts = [a for a in analyses if not a.is_compatible]
+        compatible_scripts = []
+        incompatible_scripts = []
+        for analysis in analyses:
+            (compatible_scripts if analysis.is_compatible else incompatible_scripts).append(analysis)
+
+        compatible_count = len(compatible_scripts)
+        total_count = len(analyses)
+
+        print(f"\n{'='*60}", file=out)
+        print("NUSHELL COMPATIBILITY REPORT", file=out)
+        print(f"{'='*60}", file=out)
+        print(f"Total scripts: {total_count}", file=out)
+        print(f"Compatible: {compatible_count}", file=out)
+        print(f"Issues found: {total_count - compatible_count}", file=out)
+        print(f"Target version: {analyses[0].target_version if analyses else 'Unknown'}", file=out)
 
         # Report incompatible scripts first
         if incompatible_scripts:
-            print(f"\n{'⚠️  SCRIPTS WITH COMPATIBILITY ISSUES':<60}")
-            print(f"{'-'*60}")
+            print(f"\n{'⚠️  SCRIPTS WITH COMPATIBILITY ISSUES':<60}", file=out)
+            print(f"{'-'*60}", file=out)
 
             for analysis in incompatible_scripts:
-                self._report_script_issues(analysis)
+                self._report_script_issues(analysis, out)
 
         # Report compatible scripts if verbose
         if self.verbose and compatible_scripts:
-            print(f"\n{'✅ COMPATIBLE SCRIPTS':<60}")
-            print(f"{'-'*60}")
+            print(f"\n{'✅ COMPATIBLE SCRIPTS':<60}", file=out)
+            print(f"{'-'*60}", file=out)
 
             for analysis in compatible_scripts:
-                self._report_compatible_script(analysis)
+                self._report_compatible_script(analysis, out)
 
         # Summary
-        print(f"\n{'='*60}")
+        print(f"\n{'='*60}", file=out)
         if incompatible_scripts:
-            print(f"❌ {len(incompatible_scripts)} script(s) need attention")
-            print("Review the issues above and apply suggested fixes.")
+            print(f"❌ {len(incompatible_scripts)} script(s) need attention", file=out)
+            print("Review the issues above and apply suggested fixes.", file=out)
         else:
-            print("✅ All scripts are compatible!")
+            print("✅ All scripts are compatible!", file=out)
 
         if compatible_count > 0:
-            print(f"✅ {compatible_count} script(s) are up to date")
+            print(f"✅ {compatible_count} script(s) are up to date", file=out)
+
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
 
-    def _report_script_issues(self, analysis: ScriptAnalysis) -> None:
+    def _report_script_issues(self, analysis: ScriptAnalysis, out: io.StringIO) -> None:
         """Report issues for a single script."""
         script_name = analysis.script.path.name
         relative_path = str(analysis.script.path)
 
-        print(f"\n📄 {script_name}")
-        print(f"   Path: {relative_path}")
-        print(f"   Last compatible: {analysis.script.compatible_version}")
-        print(f"   Method: {analysis.script.method.value}")
-
-        # Group issues by severity
-        errors = [i for i in analysis.issues if i.severity == "error"]
-        warnings = [i for i in analysis.issues if i.severity == "warning"]
-        info = [i for i in analysis.issues if i.severity == "info"]
-
-        for severity, issues in [("ERROR", errors), ("WARNING", warnings), ("INFO", info)]:
-            if issues:
-                for i, issue in enumerate(issues, 1):
-                    icon = "🔴" if severity == "ERROR" else "🟡" if severity == "WARNING" else "🔵"
-                    print(f"   {icon} {severity} {i}: {issue.description}")
-                    if issue.suggested_fix:
-                        print(f"      💡 Fix: {issue.suggested_fix}")
-
-    def _report_compatible_script(self, analysis: ScriptAnalysis) -> None:
+        print(f"\n📄 {script_name}", file=out)
+        print(f"   Path: {relative_path}", file=out)
+        print(f"   Last compatible: {analysis.script.compatible_version}", file=out)
+        print(f"   Method: {analysis.script.method.value}", file=out)
+
+        # Group issues by severity in one pass; unknown severities are shown as info
+        by_severity = {"error": [], "warning": [], "info": []}
+        for issue in analysis.issues:
+            by_severity.get(issue.severity, by_severity["info"]).append(issue)
+
+        for severity, label, icon in SEVERITY_LEVELS:
+            for i, issue in enumerate(by_severity[severity], 1):
+                print(f"   {icon} {label} {i}: {issue.description}", file=out)
+                if issue.suggested_fix:
+                    print(f"      💡 Fix: {issue.suggested_fix}", file=out)
+
+    def _report_compatible_script(self, analysis: ScriptAnalysis, out: io.StringIO) -> None:
         """Report a compatible script."""
         script_name = analysis.script.path.name
-        print(f"✅ {script_name} (compatible with {analysis.target_version})")
+        print(f"✅ {script_name} (compatible with {analysis.target_version})", file=out)
 
         if self.verbose:
-            print(f"   Path: {analysis.script.path}")
-            print(f"   Method: {analysis.script.method.value}")
\ No newline at end of file
+            print(f"   Path: {analysis.script.path}", file=out)
+            print(f"   Method: {analysis.script.method.value}", file=out)
\ No newline at end of file
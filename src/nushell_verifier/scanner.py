@@ -1,20 +1,72 @@
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Generator, Optional
+from collections.abc import Generator
 from .models import ScriptFile, CompatibilityMethod
+from .patterns import VERSION_COMMENT_HEADER_LINES, VERSION_COMMENT_PATTERN, is_nushell_shebang
+from .version_manager import parse_version
+
+
+# File declaring the compatible version of every script below its directory
+VERSION_FILE_NAME = ".compatible-nushell-version"
+
+# Longest first line read when looking for a shebang
+MAX_SHEBANG_LENGTH = 256
+
+
+@lru_cache(maxsize=65536)
+def _has_nushell_shebang(path: str, file_key: tuple[int, int, int, int]) -> bool:
+    """Check whether a file starts with a NuShell shebang.
+
+    file_key is the file's device, inode, modification time and size, so results
+    are only reused while the file is unchanged, across scans in the same run.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            # Bounded, so files without newlines aren't read whole. A shebang must
+            # start the file, so the line needs no stripping
+            return is_nushell_shebang(f.readline(MAX_SHEBANG_LENGTH))
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def split_by_target_version(
+    scripts: list[ScriptFile], target_version: str
+) -> tuple[list[ScriptFile], list[ScriptFile]]:
+    """Split scripts into those already compatible with target_version and the rest.
+
+    Scripts keep their scan order within each list.
+    """
+    target_key = parse_version(target_version)
+    compatible: list[ScriptFile] = []
+    pending: list[ScriptFile] = []
+    for script in scripts:
+        (compatible if script.version_key >= target_key else pending).append(script)
+    return compatible, pending
 
 
 class NuShellScriptScanner:
     """Scanner for NuShell script files."""
 
-    NUSHELL_SHEBANG_PATTERN = re.compile(r"^#!\s*.*nu(?:shell)?(?:\s|$)")
-    VERSION_COMMENT_PATTERN = re.compile(r"^\s*#\s*nushell-compatible-with:\s*([^\s]+)")
+    # Number of leading lines searched for a version comment
+    HEADER_LINES = VERSION_COMMENT_HEADER_LINES
 
-    def __init__(self, directories: List[str]):
+    # Threads reading script headers; scanning mostly waits on small reads
+    MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+    def __init__(self, directories: list[str]):
         """Initialize scanner with directories to scan."""
         self.directories = [Path(d).expanduser() for d in directories]
 
-    def scan_all(self) -> List[ScriptFile]:
+        # Versions from the version files found while walking, by directory, and
+        # the directories whose trees have been walked completely. Scripts are
+        # scanned concurrently, but racing walks only repeat work, so no lock is needed.
+        self._version_files: dict[str, str] = {}
+        self._indexed_directories: set[Path] = set()
+
+    def scan_all(self) -> list[ScriptFile]:
         """Scan all directories for NuShell scripts."""
         scripts = []
         for directory in self.directories:
@@ -22,47 +74,92 @@ class NuShellScriptScanner:
                 scripts.extend(self.scan_directory(directory))
         return scripts
 
-    def scan_directory(self, directory: Path) -> List[ScriptFile]:
-        """Recursively scan a directory for NuShell scripts."""
-        scripts = []
-        for file_path in self._find_nushell_files(directory):
-            script = self._analyze_script_file(file_path)
-            if script:
-                scripts.append(script)
-        return scripts
+    def scan_directory(self, directory: Path) -> list[ScriptFile]:
+        """Recursively scan a directory for NuShell scripts.
 
-    def _find_nushell_files(self, directory: Path) -> Generator[Path, None, None]:
-        """Find potential NuShell script files."""
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and self._is_nushell_file(file_path):
-                yield file_path
+        Script headers are read in a thread pool, which pays off most on a cold
+        page cache where each read waits on the disk.
+        """
+        file_paths = list(self._find_nushell_files(directory))
+        if not file_paths:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(file_paths))) as executor:
+            return [
+                script for script in executor.map(self._analyze_script_file, file_paths)
+                if script
+            ]
 
-    def _is_nushell_file(self, file_path: Path) -> bool:
-        """Check if a file is a NuShell script."""
+    def _find_nushell_files(self, directory: Path) -> Generator[Path, None, None]:
+        """Find potential NuShell script files, recording version files on the way."""
+        for entry in self._scandir_recursive(directory):
+            if entry.name == VERSION_FILE_NAME:
+                self._record_version_file(entry)
+            elif self._is_nushell_file(entry):
+                yield Path(entry.path)
+        self._indexed_directories.add(directory)
+
+    def _record_version_file(self, entry: os.DirEntry) -> None:
+        """Remember the version declared by a version file, if it declares one."""
+        try:
+            with open(entry.path, encoding="utf-8") as f:
+                version = f.read().strip()
+        except (OSError, UnicodeDecodeError):
+            return
+        if version:
+            self._version_files[os.path.dirname(entry.path)] = version
+
+    def _scandir_recursive(self, directory: Path) -> Generator[os.DirEntry, None, None]:
+        """Recursively yield the files in a directory.
+
+        Directory entries carry their file type from the listing itself, so most
+        entries need no extra stat() call. Like Path.rglob, symlinked directories
+        are not followed, while symlinked files are included. Directories that
+        can't be listed are skipped.
+        """
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+        except OSError:
+            pass
+
+        for subdirectory in subdirectories:
+            yield from self._scandir_recursive(subdirectory)
+
+    def _is_nushell_file(self, entry: os.DirEntry) -> bool:
+        """Check if a directory entry is a NuShell script."""
         # Check file extension
-        if file_path.suffix == ".nu":
+        name = entry.name
+        if name.endswith(".nu"):
             return True
 
-        # Check for shebang if no extension
-        if not file_path.suffix:
+        # Check for shebang if no extension (a leading dot doesn't start one)
+        if "." not in name.lstrip("."):
             try:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    first_line = f.readline().strip()
-                    return bool(self.NUSHELL_SHEBANG_PATTERN.match(first_line))
-            except (OSError, UnicodeDecodeError):
+                stat = entry.stat()
+            except OSError:
                 return False
+            return _has_nushell_shebang(
+                entry.path, (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            )
 
         return False
 
-    def _analyze_script_file(self, file_path: Path) -> Optional[ScriptFile]:
+    def _analyze_script_file(self, file_path: Path) -> ScriptFile | None:
         """Analyze a script file to determine compatibility information."""
         try:
+            # Only the header is needed; the size comes from the file's metadata
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                lines = f.readlines()
+                lines = list(islice(f, self.HEADER_LINES))
+                size = os.fstat(f.fileno()).st_size
 
-            has_shebang = False
-            if lines and self.NUSHELL_SHEBANG_PATTERN.match(lines[0].strip()):
-                has_shebang = True
+            # A shebang must start the file, so the line needs no stripping
+            has_shebang = bool(lines) and is_nushell_shebang(lines[0])
 
             # Look for version comment in header
             version, method = self._find_compatible_version(file_path, lines)
@@ -71,37 +168,65 @@ class NuShellScriptScanner:
                 path=file_path,
                 compatible_version=version,
                 method=method,
-                has_shebang=has_shebang
+                has_shebang=has_shebang,
+                size=size
             )
 
         except (OSError, UnicodeDecodeError):
             return None
 
-    def _find_compatible_version(self, file_path: Path, lines: List[str]) -> tuple[str, CompatibilityMethod]:
+    def _find_compatible_version(self, file_path: Path, lines: list[str]) -> tuple[str, CompatibilityMethod]:
         """Find the compatible version using the priority order specified."""
         # 1. Check for version comment in file header
-        for i, line in enumerate(lines[:20]):  # Only check first 20 lines
-            if line.strip() and not line.strip().startswith("#"):
+        for line in lines[:self.HEADER_LINES]:
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
                 break  # Stop at first non-comment line
 
-            match = self.VERSION_COMMENT_PATTERN.match(line)
+            # Only run the pattern on lines that could match it
+            if "nushell-compatible-with" not in line:
+                continue
+            match = VERSION_COMMENT_PATTERN.match(line)
             if match:
                 return match.group(1), CompatibilityMethod.COMMENT_HEADER
 
         # 2. Check for .compatible-nushell-version file in directory hierarchy
-        current_dir = file_path.parent
         for scan_dir in self.directories:
-            while current_dir >= scan_dir:
-                version_file = current_dir / ".compatible-nushell-version"
-                if version_file.exists():
-                    try:
-                        with open(version_file, "r", encoding="utf-8") as f:
-                            version = f.read().strip()
-                            if version:
-                                return version, CompatibilityMethod.DIRECTORY_FILE
-                    except (OSError, UnicodeDecodeError):
-                        pass
-                current_dir = current_dir.parent
+            version = self._find_directory_version(file_path.parent, scan_dir)
+            if version:
+                return version, CompatibilityMethod.DIRECTORY_FILE
 
         # 3. Default assumption (6 minor versions behind current)
-        return "0.90.0", CompatibilityMethod.DEFAULT_ASSUMPTION  # Will be calculated dynamically
\ No newline at end of file
+        return "0.90.0", CompatibilityMethod.DEFAULT_ASSUMPTION  # Will be calculated dynamically
+
+    def _find_directory_version(self, directory: Path, scan_dir: Path) -> str | None:
+        """Find the version in the nearest version file up to scan_dir.
+
+        Version files are recorded while the scan directory is walked, so the
+        lookup only checks the directory's ancestors in memory. A scan directory
+        that hasn't been walked yet is indexed on first use, unless the directory
+        isn't inside it.
+        """
+        if not directory.is_relative_to(scan_dir):
+            return None
+
+        if scan_dir not in self._indexed_directories:
+            for entry in self._scandir_recursive(scan_dir):
+                if entry.name == VERSION_FILE_NAME:
+                    self._record_version_file(entry)
+            self._indexed_directories.add(scan_dir)
+
+        # Walk up as plain strings, stopping once outside the scan directory
+        scan_root = str(scan_dir)
+        scan_prefix = os.path.join(scan_root, "")
+        current_dir = str(directory)
+        while current_dir == scan_root or current_dir.startswith(scan_prefix):
+            version = self._version_files.get(current_dir)
+            if version:
+                return version
+
+            parent_dir = os.path.dirname(current_dir)
+            if parent_dir == current_dir:
+                break
+            current_dir = parent_dir
+        return None
@@ -1,12 +1,24 @@
-import re
-from typing import List, Tuple
+from functools import lru_cache
+from itertools import islice
+
+from .patterns import VERSION_COMMENT_HEADER_LINES, VERSION_COMMENT_KEY
+
+
+@lru_cache(maxsize=1024)
+def parse_version(version: str) -> tuple[int, ...]:
+    """Parse a version string like "0.107.0" into a comparable tuple of ints.
+
+    Results are cached, so each distinct version string is parsed only once.
+    """
+    try:
+        return tuple(map(int, version.lstrip("v").split(".")))
+    except ValueError:
+        return (0, 0, 0)
 
 
 class VersionManager:
     """Manager for version-related operations."""
 
-    VERSION_COMMENT_PATTERN = re.compile(r"^\s*#\s*nushell-compatible-with:\s*([^\s]+)")
-
     def calculate_default_version(self, current_version: str) -> str:
         """Calculate default version (6 minor versions behind current)."""
         try:
@@ -22,54 +34,42 @@ class VersionManager:
             # Fallback if version parsing fails
             return "0.90.0"
 
-    def find_earliest_version(self, versions: List[str]) -> str:
+    def version_key(self, version: str) -> tuple[int, ...]:
+        """Convert a version string into a tuple suitable for ordering and comparison."""
+        return parse_version(version)
+
+    def find_earliest_version(self, versions: list[str]) -> str:
         """Find the earliest version from a list of versions."""
         if not versions:
             return "0.90.0"
 
-        def version_tuple(v: str) -> Tuple[int, ...]:
-            try:
-                return tuple(map(int, v.lstrip("v").split(".")))
-            except ValueError:
-                return (0, 0, 0)
-
-        return min(versions, key=version_tuple)
+        return min(versions, key=parse_version)
 
     def is_version_after(self, version: str, reference: str) -> bool:
         """Check if version is after (newer than) reference version."""
-        def version_tuple(v: str) -> Tuple[int, ...]:
-            try:
-                return tuple(map(int, v.lstrip("v").split(".")))
-            except ValueError:
-                return (0, 0, 0)
-
-        return version_tuple(version) > version_tuple(reference)
+        return parse_version(version) > parse_version(reference)
 
     def is_version_same_or_after(self, version: str, reference: str) -> bool:
         """Check if version is same or after (newer than or equal to) reference version."""
-        def version_tuple(v: str) -> Tuple[int, ...]:
-            try:
-                return tuple(map(int, v.lstrip("v").split(".")))
-            except ValueError:
-                return (0, 0, 0)
-
-        return version_tuple(version) >= version_tuple(reference)
+        return parse_version(version) >= parse_version(reference)
 
-    def update_version_comment(self, lines: List[str], new_version: str) -> List[str]:
+    def update_version_comment(self, lines: list[str], new_version: str) -> list[str]:
         """Update or add version comment in script lines."""
         new_comment = f"# nushell-compatible-with: {new_version}\n"
         updated_lines = lines.copy()
 
-        # Look for existing version comment in header
+        # Look for existing version comment in header. Any comment with the key
+        # counts, even one missing its version, so it gets replaced rather than
+        # duplicated
         existing_comment_line = None
 
-        for i, line in enumerate(lines):
-            if self.VERSION_COMMENT_PATTERN.match(line):
-                existing_comment_line = i
-                break
-
+        for i, line in enumerate(islice(lines, VERSION_COMMENT_HEADER_LINES)):
             stripped = line.strip()
-            if stripped and not stripped.startswith("#"):
+            if stripped.startswith("#"):
+                if stripped[1:].lstrip().startswith(VERSION_COMMENT_KEY):
+                    existing_comment_line = i
+                    break
+            elif stripped:
                 break
 
         if existing_comment_line is not None:
@@ -80,7 +80,7 @@ class VersionManager:
             insert_position = 0
 
             # If there's a shebang, insert after it (with blank line)
-            if lines and lines[0].strip().startswith("#!"):
+            if lines and lines[0].startswith("#!"):
                 insert_position = 1
                 if len(lines) > 1 and lines[1].strip() == "":
                     insert_position = 2
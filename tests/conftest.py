@@ -0,0 +1,56 @@
+import os
+import subprocess
+import tempfile
+from unittest.mock import MagicMock
+
+import pytest
+
+from nushell_verifier.github_client import GitHubClient, _gh_cli_token
+
+# RAM-backed filesystem used for test files when available
+SHM_DIR = "/dev/shm"
+
+
+def pytest_configure(config):
+    """Keep temporary test files in memory unless TMPDIR says otherwise.
+
+    Both tmp_path and the tempfile module resolve their root through
+    tempfile.gettempdir(), so this covers every test that writes files.
+    """
+    if "TMPDIR" not in os.environ and os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        tempfile.tempdir = SHM_DIR
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_path(tmp_path, monkeypatch):
+    """Keep tests from reading or writing the user's real cache directory."""
+    monkeypatch.setattr('nushell_verifier.cache.get_cache_path', lambda: tmp_path / "cache")
+
+
+@pytest.fixture(autouse=True)
+def no_gh_cli(request, monkeypatch):
+    """Act as if the gh CLI isn't authenticated, so tests never spawn it.
+
+    Other commands still run. Tests that check the gh lookup patch subprocess.run
+    themselves, and live network tests resolve tokens for real.
+    """
+    if request.node.get_closest_marker("network"):
+        _gh_cli_token.cache_clear()
+        return
+
+    run = subprocess.run
+
+    def run_without_gh(args, *rest, **kwargs):
+        if args[0] == "gh":
+            return MagicMock(returncode=1, stdout="")
+        return run(args, *rest, **kwargs)
+
+    monkeypatch.setattr(subprocess, "run", run_without_gh)
+
+
+@pytest.fixture(scope="session")
+def gh_client():
+    """A GitHub client shared by tests that only use its stateless helpers."""
+    client = GitHubClient("dummy_token")
+    yield client
+    client.close()
@@ -1,9 +1,11 @@
 """
 Integration tests for analyzer with progress functionality.
 """
+import asyncio
 import tempfile
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
+import pytest
 from nushell_verifier.analyzer import NuShellAnalyzer
 from nushell_verifier.models import Config, ScriptFile, ReleaseInfo, CompatibilityMethod
 
@@ -61,7 +63,7 @@ class TestAnalyzerProgress:
 
         # Mock LLM client
         mock_llm_instance = mock_llm.return_value
-        mock_llm_instance.convert_blog_to_instructions.return_value = "instructions"
+        mock_llm_instance.convert_blog_to_instructions_async = AsyncMock(return_value="instructions")
         mock_llm_instance.analyze_script_compatibility_streaming.return_value = []
 
         # Create analyzer with progress enabled
@@ -118,6 +120,28 @@ class TestAnalyzerProgress:
         # Verify progress bar was not created (should not be called for disabled progress)
         # The BatchProgressManager creates ScriptProgressManagers with disabled=True
 
+    @pytest.mark.parametrize("disable_progress", [False, True])
+    @patch('nushell_verifier.analyzer.count_tokens', return_value=3)
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('nushell_verifier.progress.alive_bar')
+    def test_script_tokenized_only_for_progress(
+        self, mock_alive_bar, mock_scanner, mock_llm, mock_github, mock_count_tokens, disable_progress
+    ):
+        """Test that scripts are only tokenized when a progress bar shows the estimate."""
+        script_path = self._create_test_script("test.nu", "echo 'hello'")
+        mock_scanner.return_value.scan_all.return_value = [
+            ScriptFile(script_path, "0.95.0", CompatibilityMethod.COMMENT_HEADER)
+        ]
+        mock_github.return_value.get_releases_between.return_value = []
+        mock_llm.return_value.analyze_script_compatibility_streaming.return_value = []
+
+        analyzer = NuShellAnalyzer(self.config, disable_progress=disable_progress)
+        analyzer.analyze_scripts("0.97.0")
+
+        assert mock_count_tokens.called is not disable_progress
+
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
@@ -200,42 +224,6 @@ class TestAnalyzerProgress:
         issue_messages = [msg for msg in print_calls if "⚠️" in str(msg) and "issue(s) found" in str(msg)]
         assert len(issue_messages) > 0
 
-    @patch('nushell_verifier.analyzer.GitHubClient')
-    @patch('nushell_verifier.analyzer.LLMClient')
-    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
-    def test_streaming_fallback(self, mock_scanner, mock_llm, mock_github):
-        """Test fallback to non-streaming when streaming fails."""
-        # Create test script
-        script_path = self._create_test_script("test.nu", "echo 'hello'")
-        script = ScriptFile(
-            path=script_path,
-            compatible_version="0.95.0",
-            method=CompatibilityMethod.COMMENT_HEADER
-        )
-
-        # Mock scanner
-        mock_scanner.return_value.scan_all.return_value = [script]
-
-        # Mock GitHub client
-        mock_github_instance = mock_github.return_value
-        mock_github_instance.get_latest_version.return_value = "0.97.0"
-        mock_github_instance.get_releases_between.return_value = []
-
-        # Mock LLM client - streaming method raises AttributeError
-        mock_llm_instance = mock_llm.return_value
-        mock_llm_instance.analyze_script_compatibility_streaming.side_effect = AttributeError("No streaming")
-        mock_llm_instance.analyze_script_compatibility.return_value = []
-
-        # Create analyzer
-        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
-
-        # Run analysis
-        results = analyzer.analyze_scripts("0.97.0")
-
-        # Verify fallback was used
-        mock_llm_instance.analyze_script_compatibility.assert_called_once()
-        assert len(results) == 1
-
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
@@ -299,7 +287,7 @@ class TestAnalyzerProgress:
         # Mock LLM client with token callback
         mock_llm_instance = mock_llm.return_value
 
-        def mock_streaming_analysis(script, version, instructions, progress_callback=None):
+        def mock_streaming_analysis(script, version, instructions, progress_callback=None, issue_callback=None):
             # Simulate token streaming
             if progress_callback:
                 for token in ["result", ":", "compatible"]:
@@ -323,4 +311,325 @@ class TestAnalyzerProgress:
 
         # Test with progress disabled
         analyzer_disabled = NuShellAnalyzer(self.config, disable_progress=True)
-        assert analyzer_disabled.disable_progress is True
\ No newline at end of file
+        assert analyzer_disabled.disable_progress is True
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('nushell_verifier.progress.alive_bar')
+    def test_concurrent_script_analysis(self, mock_alive_bar, mock_scanner, mock_llm, mock_github):
+        """Test that scripts analyzed concurrently share one progress bar instead of overlapping."""
+        mock_bar = MagicMock()
+        mock_alive_bar.return_value.__enter__.return_value = mock_bar
+
+        # Distinct content, so no script can be served another's cached analysis
+        scripts = [
+            ScriptFile(
+                self._create_test_script(f"test{i}.nu", f"echo 'hello {i}'"),
+                "0.95.0",
+                CompatibilityMethod.DIRECTORY_FILE
+            )
+            for i in range(3)
+        ]
+
+        # Mock scanner
+        mock_scanner.return_value.scan_all.return_value = scripts
+
+        # Mock GitHub client
+        mock_github_instance = mock_github.return_value
+        mock_github_instance.get_latest_version.return_value = "0.97.0"
+        mock_github_instance.get_releases_between.return_value = []
+
+        # Mock LLM client
+        def analyze(script, target_version, instructions, progress_callback, issue_callback):
+            progress_callback("tokn" * 10)
+            return []
+
+        mock_llm_instance = mock_llm.return_value
+        mock_llm_instance.analyze_script_compatibility_streaming.side_effect = analyze
+
+        # Create analyzer with progress enabled and room for all scripts at once
+        self.config.max_concurrency = 3
+        analyzer = NuShellAnalyzer(self.config, disable_progress=False)
+
+        results = analyzer.analyze_scripts("0.97.0")
+
+        # Every script is analyzed exactly once
+        assert len(results) == 3
+        assert {r.script.path for r in results} == {s.path for s in scripts}
+        assert mock_llm_instance.analyze_script_compatibility_streaming.call_count == 3
+
+        # Per-script bars are suppressed while scripts run in parallel, and every
+        # script's tokens are counted on the shared bar
+        mock_alive_bar.assert_called_once()
+        assert mock_alive_bar.call_args.kwargs["title"] == "📄 3 scripts"
+        assert "Tokens: 30/" in mock_bar.text.call_args.args[0]
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    def test_analysis_uses_full_concurrency(self, mock_scanner, mock_llm, mock_github):
+        """Test that as many scripts as configured are analyzed at once, regardless of CPU count."""
+        import threading
+
+        scripts = [
+            ScriptFile(
+                self._create_test_script(f"test{i}.nu", "echo 'hello'"),
+                "0.95.0",
+                CompatibilityMethod.DIRECTORY_FILE
+            )
+            for i in range(8)
+        ]
+        mock_scanner.return_value.scan_all.return_value = scripts
+        mock_github.return_value.get_releases_between.return_value = []
+
+        # Every analysis waits until all of them are running at the same time
+        barrier = threading.Barrier(len(scripts), timeout=5)
+
+        def analyze(*args, **kwargs):
+            barrier.wait()
+            return []
+
+        mock_llm.return_value.analyze_script_compatibility_streaming.side_effect = analyze
+
+        self.config.cache_enabled = False
+        self.config.max_concurrency = len(scripts)
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        results = analyzer.analyze_scripts("0.97.0")
+
+        assert all(r.is_compatible for r in results)
+        assert not barrier.broken
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    def test_analysis_overlaps_instruction_generation(self, mock_scanner, mock_llm, mock_github):
+        """Test that a script is analyzed before unrelated releases finish generating."""
+        import threading
+
+        recent = ScriptFile(
+            self._create_test_script("recent.nu", "echo 'hello'"),
+            "0.96.0",
+            CompatibilityMethod.DIRECTORY_FILE
+        )
+        old = ScriptFile(
+            self._create_test_script("old.nu", "echo 'hello'"),
+            "0.94.0",
+            CompatibilityMethod.DIRECTORY_FILE
+        )
+        mock_scanner.return_value.scan_all.return_value = [recent, old]
+
+        releases = [
+            ReleaseInfo("0.97.0", "http://blog.url/97"),
+            ReleaseInfo("0.96.0", "http://blog.url/96"),
+            ReleaseInfo("0.95.0", "http://blog.url/95")
+        ]
+        mock_github_instance = mock_github.return_value
+        mock_github_instance.get_releases_between.return_value = releases
+        mock_github_instance.fetch_blog_post_content.return_value = "blog content"
+
+        recent_analyzed = threading.Event()
+        overlapped = []
+
+        async def convert(release, content):
+            # The oldest release is only needed by old.nu, so recent.nu
+            # must be analyzed while it is still being generated
+            if release.version == "0.95.0":
+                overlapped.append(await asyncio.to_thread(recent_analyzed.wait, 5))
+            return f"instructions for {release.version}"
+
+        def analyze(script, target_version, instructions, progress_callback=None, issue_callback=None):
+            if script is recent:
+                recent_analyzed.set()
+            analyzed_with[script.path.name] = instructions
+            return []
+
+        analyzed_with = {}
+        mock_llm_instance = mock_llm.return_value
+        mock_llm_instance.convert_blog_to_instructions_async = AsyncMock(side_effect=convert)
+        mock_llm_instance.analyze_script_compatibility_streaming.side_effect = analyze
+
+        self.config.cache_enabled = False
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        results = analyzer.analyze_scripts("0.97.0")
+
+        assert len(results) == 2
+        assert overlapped == [True]
+
+        # Each script still receives every instruction newer than its version
+        assert analyzed_with["recent.nu"] == ["instructions for 0.97.0"]
+        assert analyzed_with["old.nu"] == [
+            "instructions for 0.95.0",
+            "instructions for 0.96.0",
+            "instructions for 0.97.0"
+        ]
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('builtins.print')
+    def test_immediate_results_printed_as_one_block(self, mock_print, mock_scanner, mock_llm, mock_github):
+        """Test that a script's issues are printed in a single call."""
+        from nushell_verifier.models import CompatibilityIssue
+
+        script = ScriptFile(Path("test.nu"), "0.95.0", CompatibilityMethod.COMMENT_HEADER)
+        issues = [
+            CompatibilityIssue("Deprecated command", "Use the new one", "error"),
+            CompatibilityIssue("Odd pattern", None, "unknown")
+        ]
+
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        mock_print.reset_mock()
+        analyzer._display_immediate_script_results(script, issues)
+
+        mock_print.assert_called_once_with(
+            "   📋 Issues found in test.nu:\n"
+            "   ❌ Deprecated command\n"
+            "      💡 Fix: Use the new one\n"
+            "   • Odd pattern\n"
+        )
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('builtins.print')
+    def test_scripts_sharing_instructions_analyzed_together(self, mock_print, mock_scanner, mock_llm, mock_github):
+        """Test that scripts with the same compatible version share one LLM request."""
+        from nushell_verifier.models import CompatibilityIssue
+
+        scripts = [
+            ScriptFile(self._create_test_script(f"same{i}.nu", "echo 'hello'"), "0.95.0",
+                       CompatibilityMethod.DIRECTORY_FILE)
+            for i in range(3)
+        ] + [
+            ScriptFile(self._create_test_script("other.nu", "echo 'hello'"), "0.96.0",
+                       CompatibilityMethod.DIRECTORY_FILE)
+        ]
+        mock_scanner.return_value.scan_all.return_value = scripts
+        mock_github.return_value.get_releases_between.return_value = []
+
+        mock_llm_instance = mock_llm.return_value
+        mock_llm_instance.SCRIPT_BATCH_TOKEN_BUDGET = 16000
+        mock_llm_instance.analyze_scripts_batch.side_effect = lambda group, *args: [
+            [CompatibilityIssue("Old syntax")] if script.path.name == "same1.nu" else []
+            for script in group
+        ]
+        mock_llm_instance.analyze_script_compatibility_streaming.return_value = []
+
+        self.config.cache_enabled = False
+        self.config.max_scripts_per_request = 2
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        results = analyzer.analyze_scripts("0.97.0")
+
+        # same0/same1 are batched; same2 and other.nu are analyzed on their own
+        batched = [
+            [script.path.name for script in call[0][0]]
+            for call in mock_llm_instance.analyze_scripts_batch.call_args_list
+        ]
+        assert batched == [["same0.nu", "same1.nu"]]
+        assert mock_llm_instance.analyze_script_compatibility_streaming.call_count == 2
+
+        compatibility = {r.script.path.name: r.is_compatible for r in results}
+        assert compatibility == {"same0.nu": True, "same1.nu": False, "same2.nu": True, "other.nu": True}
+
+        # Sizes looked up while grouping are kept on the scripts
+        assert all(script.size == script.path.stat().st_size for script in scripts)
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('builtins.print')
+    def test_script_group_falls_back_to_individual_analysis(self, mock_print, mock_scanner, mock_llm, mock_github):
+        """Test that an unparseable batched response falls back to per-script requests."""
+        scripts = [
+            ScriptFile(self._create_test_script(f"test{i}.nu", "echo 'hello'"), "0.95.0",
+                       CompatibilityMethod.DIRECTORY_FILE)
+            for i in range(2)
+        ]
+        mock_scanner.return_value.scan_all.return_value = scripts
+        mock_github.return_value.get_releases_between.return_value = []
+
+        mock_llm_instance = mock_llm.return_value
+        mock_llm_instance.SCRIPT_BATCH_TOKEN_BUDGET = 16000
+        mock_llm_instance.analyze_scripts_batch.side_effect = ValueError("bad response")
+        mock_llm_instance.analyze_script_compatibility_streaming.return_value = []
+
+        self.config.cache_enabled = False
+        self.config.max_scripts_per_request = 4
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        results = analyzer.analyze_scripts("0.97.0")
+
+        assert len(results) == 2
+        assert mock_llm_instance.analyze_script_compatibility_streaming.call_count == 2
+        assert "Processed 2/2 scripts" in mock_print.call_args_list[-1][0][0]
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('builtins.print')
+    def test_batch_mode_analyzes_scripts_in_one_job(self, mock_print, mock_scanner, mock_llm, mock_github):
+        """Test that batch mode submits all scripts as one batch job."""
+        from nushell_verifier.models import CompatibilityIssue
+
+        scripts = [
+            ScriptFile(self._create_test_script(f"test{i}.nu", "echo 'hello'"), "0.95.0",
+                       CompatibilityMethod.DIRECTORY_FILE)
+            for i in range(3)
+        ]
+        mock_scanner.return_value.scan_all.return_value = scripts
+        mock_github.return_value.get_releases_between.return_value = []
+
+        mock_llm_instance = mock_llm.return_value
+        mock_llm_instance.supports_batch.return_value = True
+        # The last script's batch request failed, so it's analyzed on its own
+        mock_llm_instance.analyze_scripts_batch_job.return_value = {
+            str(scripts[0].path): [],
+            str(scripts[1].path): [CompatibilityIssue("Old syntax")]
+        }
+        mock_llm_instance.analyze_script_compatibility_streaming.return_value = []
+
+        self.config.cache_enabled = False
+        self.config.batch_mode = True
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        results = analyzer.analyze_scripts("0.97.0")
+
+        mock_llm_instance.analyze_scripts_batch_job.assert_called_once()
+        submitted = mock_llm_instance.analyze_scripts_batch_job.call_args[0][0]
+        assert [script for script, _ in submitted] == scripts
+        assert mock_llm_instance.analyze_script_compatibility_streaming.call_count == 1
+
+        compatibility = {r.script.path.name: r.is_compatible for r in results}
+        assert compatibility == {"test0.nu": True, "test1.nu": False, "test2.nu": True}
+        assert "Processed 3/3 scripts" in mock_print.call_args_list[-1][0][0]
+
+
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    @patch('builtins.print')
+    def test_unchanged_scripts_reuse_cached_analysis(self, mock_print, mock_scanner, mock_llm, mock_github):
+        """Test that re-analyzing an unchanged script is served from the analysis cache."""
+        from nushell_verifier.models import CompatibilityIssue
+
+        script = ScriptFile(self._create_test_script("test.nu", "echo 'hello'"), "0.95.0",
+                            CompatibilityMethod.DIRECTORY_FILE)
+        mock_scanner.return_value.scan_all.return_value = [script]
+        mock_github.return_value.get_releases_between.return_value = []
+
+        mock_llm_instance = mock_llm.return_value
+        mock_llm_instance.analyze_script_compatibility_streaming.return_value = [
+            CompatibilityIssue("Old syntax", "New syntax", "error")
+        ]
+
+        for _ in range(2):
+            analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+            results = analyzer.analyze_scripts("0.97.0")
+            assert results[0].issues == [CompatibilityIssue("Old syntax", "New syntax", "error")]
+
+        mock_llm_instance.analyze_script_compatibility_streaming.assert_called_once()
+
+        # Changing the script invalidates its cached analysis
+        script.path.write_text("echo 'changed'")
+        script.content = None  # A fresh scan wouldn't carry the old content
+        NuShellAnalyzer(self.config, disable_progress=True).analyze_scripts("0.97.0")
+        assert mock_llm_instance.analyze_script_compatibility_streaming.call_count == 2
@@ -2,27 +2,56 @@
 Tests for the instruction caching functionality.
 """
 import json
-import tempfile
-from pathlib import Path
+import shutil
 from unittest.mock import patch
-from nushell_verifier.cache import InstructionCache
+import orjson
+import pytest
+from nushell_verifier.cache import AnalysisCache, InstructionCache, ResponseCache
+
+# Versions in the prebuilt cache, each with "instructions for <version>" for gpt-4
+PREBUILT_VERSIONS = ["0.105.0", "0.106.0", "0.107.0"]
+
+# A large instruction set, built once at import
+LARGE_INSTRUCTIONS = "Breaking changes:\n" + "\n".join(
+    f"- Change {i}: Some detailed description of breaking change {i}"
+    for i in range(1000)
+)
+
+
+@pytest.fixture(scope="session")
+def prebuilt_instructions_dir(tmp_path_factory):
+    """Build a populated instructions directory once, for tests to copy."""
+    cache_dir = tmp_path_factory.mktemp("prebuilt-cache")
+    with patch('nushell_verifier.cache.get_cache_path', return_value=cache_dir):
+        cache = InstructionCache()
+
+    for version in PREBUILT_VERSIONS:
+        cache.save_instructions(version, f"instructions for {version}", "gpt-4")
+    return cache.instructions_dir
 
 
 class TestInstructionCache:
     """Test the InstructionCache class."""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
         """Set up test environment with temporary cache directory."""
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.cache_dir = Path(self.temp_dir.name)
+        self.cache_dir = tmp_path
 
         # Mock the cache directory to use our temp directory
         with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
             self.cache = InstructionCache()
 
-    def teardown_method(self):
-        """Clean up temporary directory."""
-        self.temp_dir.cleanup()
+    def _reload(self) -> InstructionCache:
+        """Open a fresh cache on the same directory, so reads come from disk rather than the memo."""
+        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
+            return InstructionCache()
+
+    @pytest.fixture
+    def populated(self, prebuilt_instructions_dir):
+        """Fill this test's cache with the prebuilt instructions."""
+        shutil.copytree(prebuilt_instructions_dir, self.cache.instructions_dir)
+        return PREBUILT_VERSIONS
 
     def test_cache_directory_creation(self):
         """Test that cache directory is created properly."""
@@ -49,23 +78,17 @@ class TestInstructionCache:
 
         assert cached == instructions
 
-    def test_cache_miss_scenarios(self):
+    @pytest.mark.parametrize("miss_version,miss_model", [
+        ("0.106.0", "gpt-4"),  # Different version
+        ("0.107.0", "claude-3"),  # Different model
+        ("0.999.0", "gpt-4"),  # Non-existent version
+    ])
+    def test_cache_miss_scenarios(self, miss_version, miss_model):
         """Test various cache miss scenarios."""
-        version = "0.107.0"
-        instructions = "test instructions"
-        model = "gpt-4"
-
         # Save with gpt-4
-        self.cache.save_instructions(version, instructions, model)
-
-        # Miss: different version
-        assert self.cache.get_cached_instructions("0.106.0", model) is None
-
-        # Miss: different model
-        assert self.cache.get_cached_instructions(version, "claude-3") is None
+        self.cache.save_instructions("0.107.0", "test instructions", "gpt-4")
 
-        # Miss: non-existent version
-        assert self.cache.get_cached_instructions("0.999.0", model) is None
+        assert self.cache.get_cached_instructions(miss_version, miss_model) is None
 
     def test_cache_file_format(self):
         """Test that cache files are saved in correct JSON format."""
@@ -78,8 +101,7 @@ class TestInstructionCache:
         cache_file = self.cache.instructions_dir / f"{version}.json"
         assert cache_file.exists()
 
-        with open(cache_file, "r") as f:
-            data = json.load(f)
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
 
         assert data["version"] == version
         assert data["instructions"] == instructions
@@ -96,8 +118,7 @@ class TestInstructionCache:
         cache_file = cache_file / f"{version}.json"
 
         # Create corrupted JSON file
-        with open(cache_file, "w") as f:
-            f.write("{ invalid json")
+        cache_file.write_bytes(b"{ invalid json")
 
         # Should return None for corrupted file
         result = self.cache.get_cached_instructions(version, model)
@@ -113,13 +134,9 @@ class TestInstructionCache:
         assert info["versions"] == []
         assert "cache_directory" in info
 
-    def test_cache_info_with_data(self):
+    def test_cache_info_with_data(self, populated):
         """Test cache info with cached data."""
-        # Add some test data
-        versions = ["0.105.0", "0.106.0", "0.107.0"]
-        for version in versions:
-            self.cache.save_instructions(version, f"instructions for {version}", "gpt-4")
-
+        versions = populated
         info = self.cache.get_cache_info()
 
         assert info["exists"] is True
@@ -127,19 +144,16 @@ class TestInstructionCache:
         assert info["total_size_bytes"] > 0
         assert info["total_size_mb"] >= 0  # Small files might round to 0
         assert set(info["versions"]) == set(versions)
-        assert info["cache_directory"] == str(self.cache.instructions_dir)
+        assert info["cache_directory"] == str(self.cache_dir)
 
     def test_clear_cache_empty(self):
         """Test clearing empty cache."""
         removed_count = self.cache.clear_cache()
         assert removed_count == 0
 
-    def test_clear_cache_with_data(self):
+    def test_clear_cache_with_data(self, populated):
         """Test clearing cache with data."""
-        # Add some test data
-        versions = ["0.105.0", "0.106.0", "0.107.0"]
-        for version in versions:
-            self.cache.save_instructions(version, f"instructions for {version}", "gpt-4")
+        versions = populated
 
         # Verify files exist
         for version in versions:
@@ -158,6 +172,23 @@ class TestInstructionCache:
         # Directory should be cleaned up too
         assert not self.cache.instructions_dir.exists()
 
+    def test_info_and_clear_cover_analysis_and_responses(self, populated):
+        """Test that cache info and clearing include analysis results and API responses."""
+        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
+            AnalysisCache().save("key", [])
+            ResponseCache().save("https://api.github.com/repos/nushell/nushell/releases", [])
+
+        info = self.cache.get_cache_info()
+        assert info["file_count"] == 5
+        assert info["analysis_count"] == 1
+        assert info["response_count"] == 1
+        assert info["versions"] == populated
+
+        assert self.cache.clear_cache() == 5
+        assert not self.cache.analysis_dir.exists()
+        assert not self.cache.responses_dir.exists()
+        assert self.cache.get_cache_info()["exists"] is False
+
     def test_validate_cache_entry_valid(self):
         """Test validation of valid cache entries."""
         version = "0.107.0"
@@ -168,34 +199,25 @@ class TestInstructionCache:
 
         assert self.cache.validate_cache_entry(version, model) is True
 
-    def test_validate_cache_entry_invalid(self):
+    @pytest.mark.parametrize("entry", [
+        None,  # Non-existent file
+        {"version": "0.107.0"},  # Missing required fields
+        {
+            "version": "0.106.0",  # Different from filename
+            "instructions": "test",
+            "created_at": "2025-01-01T00:00:00Z",
+            "llm_model": "gpt-4"
+        },
+    ])
+    def test_validate_cache_entry_invalid(self, entry):
         """Test validation of invalid cache entries."""
         version = "0.107.0"
-        model = "gpt-4"
 
-        # Non-existent file
-        assert self.cache.validate_cache_entry(version, model) is False
-
-        # Create invalid cache file
-        self.cache.instructions_dir.mkdir(parents=True, exist_ok=True)
-        cache_file = self.cache.instructions_dir / f"{version}.json"
+        if entry is not None:
+            self.cache.instructions_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache.instructions_dir / f"{version}.json").write_bytes(orjson.dumps(entry))
 
-        # Missing required fields
-        with open(cache_file, "w") as f:
-            json.dump({"version": version}, f)
-
-        assert self.cache.validate_cache_entry(version, model) is False
-
-        # Wrong version in file
-        with open(cache_file, "w") as f:
-            json.dump({
-                "version": "0.106.0",  # Different from filename
-                "instructions": "test",
-                "created_at": "2025-01-01T00:00:00Z",
-                "llm_model": "gpt-4"
-            }, f)
-
-        assert self.cache.validate_cache_entry(version, model) is False
+        assert self.cache.validate_cache_entry(version, "gpt-4") is False
 
     def test_model_change_invalidation(self):
         """Test that changing LLM model invalidates cache."""
@@ -232,22 +254,197 @@ class TestInstructionCache:
         model = "gpt-4"
 
         self.cache.save_instructions(version, instructions, model)
-        cached = self.cache.get_cached_instructions(version, model)
+        cached = self._reload().get_cached_instructions(version, model)
 
         assert cached == instructions
 
     def test_large_instructions(self):
         """Test cache with large instruction content."""
         version = "0.107.0"
-        # Create a large instruction set
-        instructions = "Breaking changes:\n" + "\n".join([
-            f"- Change {i}: Some detailed description of breaking change {i}"
-            for i in range(1000)
-        ])
+        instructions = LARGE_INSTRUCTIONS
         model = "gpt-4"
 
         self.cache.save_instructions(version, instructions, model)
-        cached = self.cache.get_cached_instructions(version, model)
+        cached = self._reload().get_cached_instructions(version, model)
 
         assert cached == instructions
-        assert len(cached) > 10000  # Should be quite large
\ No newline at end of file
+        assert len(cached) > 10000  # Should be quite large
+
+    def test_malformed_entry_types(self):
+        """Test that entries with wrongly typed fields are treated as misses."""
+        version = "0.107.0"
+        self.cache.instructions_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self.cache.instructions_dir / f"{version}.json"
+
+        cache_file.write_bytes(orjson.dumps({
+            "version": version,
+            "instructions": ["not", "a", "string"],
+            "created_at": "2024-01-01T00:00:00+00:00",
+            "llm_model": "gpt-4"
+        }))
+
+        assert self.cache.get_cached_instructions(version, "gpt-4") is None
+        assert not self.cache.validate_cache_entry(version)
+
+    def test_save_leaves_no_temporary_files(self):
+        """Test that saving replaces the entry atomically without leftovers."""
+        self.cache.save_instructions("0.107.0", "first", "gpt-4")
+        self.cache.save_instructions("0.107.0", "second", "gpt-4")
+
+        files = [p.name for p in self.cache.instructions_dir.iterdir()]
+        assert files == ["0.107.0.json"]
+        assert self.cache.get_cached_instructions("0.107.0", "gpt-4") == "second"
+
+
+    def test_cache_info_ignores_non_entry_files(self):
+        """Test that cache info only counts cache entry files."""
+        self.cache.save_instructions("0.107.0", "test instructions", "gpt-4")
+        (self.cache.instructions_dir / "notes.txt").write_text("not a cache entry")
+        (self.cache.instructions_dir / ".0.108.0.123.tmp").write_text("{}")
+        (self.cache.instructions_dir / "0.108.0.json").mkdir()
+
+        info = self.cache.get_cache_info()
+        assert info["file_count"] == 1
+        assert info["versions"] == ["0.107.0"]
+
+        detailed = self.cache.get_detailed_cache_info()
+        assert [entry["version"] for entry in detailed["entries"]] == ["0.107.0"]
+        cache_file = self.cache.instructions_dir / "0.107.0.json"
+        assert detailed["entries"][0]["file_size_bytes"] == cache_file.stat().st_size
+
+    def test_lookups_are_memoized(self):
+        """Test that repeated lookups don't re-read the cache file."""
+        version = "0.107.0"
+        self.cache.save_instructions(version, "test instructions", "gpt-4")
+
+        # A separate instance starts without any memoized lookups
+        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
+            fresh_cache = InstructionCache()
+
+        with patch('nushell_verifier.cache.open', create=True, wraps=open) as mock_open:
+            assert fresh_cache.get_cached_instructions(version, "gpt-4") == "test instructions"
+            assert fresh_cache.get_cached_instructions(version, "gpt-4") == "test instructions"
+            assert fresh_cache.get_cached_instructions("0.106.0", "gpt-4") is None
+            assert fresh_cache.get_cached_instructions("0.106.0", "gpt-4") is None
+
+        assert mock_open.call_count == 2
+
+    def test_memoized_lookups_follow_saves_and_clears(self):
+        """Test that saving and clearing keep memoized lookups consistent."""
+        version = "0.107.0"
+        assert self.cache.get_cached_instructions(version, "gpt-4") is None
+
+        self.cache.save_instructions(version, "gpt-4 instructions", "gpt-4")
+        assert self.cache.get_cached_instructions(version, "gpt-4") == "gpt-4 instructions"
+
+        # Saving for another model replaces the version's entry
+        self.cache.save_instructions(version, "claude instructions", "claude-3")
+        assert self.cache.get_cached_instructions(version, "gpt-4") is None
+        assert self.cache.get_cached_instructions(version, "claude-3") == "claude instructions"
+
+        self.cache.clear_cache()
+        assert self.cache.get_cached_instructions(version, "claude-3") is None
+
+    def test_has_instructions(self):
+        """Test checking for cached instructions without reading absent entries."""
+        version = "0.107.0"
+        self.cache.save_instructions(version, "test instructions", "gpt-4")
+
+        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
+            fresh_cache = InstructionCache()
+
+        with patch('nushell_verifier.cache.open', create=True, wraps=open) as mock_open:
+            assert fresh_cache.has_instructions("0.106.0", "gpt-4") is False
+            assert mock_open.call_count == 0
+
+            assert fresh_cache.has_instructions(version, "gpt-4") is True
+            assert fresh_cache.has_instructions(version, "other-model") is False
+
+
+class TestResponseCache:
+    """Test the ResponseCache class."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test environment with temporary cache directory."""
+        self.cache_dir = tmp_path
+
+        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
+            self.cache = ResponseCache(ttl=60)
+
+    def test_save_and_get(self):
+        """Test saving and retrieving a response."""
+        assert self.cache.get("releases") is None
+
+        self.cache.save("releases", [{"version": "0.107.0"}], '"etag-1"')
+        entry = self.cache.get("releases")
+
+        assert entry["data"] == [{"version": "0.107.0"}]
+        assert entry["etag"] == '"etag-1"'
+        assert self.cache.is_fresh(entry)
+
+    def test_expired_entry(self):
+        """Test that entries older than the TTL are not fresh."""
+        self.cache.save("releases", [], None)
+        entry = self.cache.get("releases")
+        entry["fetched_at"] -= 120
+
+        assert not self.cache.is_fresh(entry)
+
+    def test_corrupted_entry(self):
+        """Test that corrupted cache files are ignored."""
+        self.cache.save("releases", [], None)
+        self.cache._cache_file("releases").write_bytes(b"{ invalid json")
+
+        assert self.cache.get("releases") is None
+
+
+
+class TestAnalysisCache:
+    """Test the AnalysisCache class."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test environment with temporary cache directory."""
+        self.cache_dir = tmp_path
+
+        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
+            self.cache = AnalysisCache()
+
+    def test_save_and_get(self):
+        """Test saving and retrieving analysis results."""
+        digest = AnalysisCache.hash_instructions(["instructions"])
+        key = AnalysisCache.make_key("openai/gpt-4", "0.97.0", "0.95.0", digest, b"ls")
+        assert self.cache.get(key) is None
+
+        issues = [{"description": "Old syntax", "suggested_fix": None, "severity": "error"}]
+        self.cache.save(key, issues)
+
+        assert self.cache.get(key) == issues
+
+    def test_key_covers_all_inputs(self):
+        """Test that changing any analysis input changes the key."""
+        digest = AnalysisCache.hash_instructions(["instructions"])
+        args = ("openai/gpt-4", "0.97.0", "0.95.0", digest, b"ls")
+        key = AnalysisCache.make_key(*args)
+
+        assert AnalysisCache.make_key(*args) == key
+        assert AnalysisCache.make_key("openai/gpt-4o", *args[1:]) != key
+        assert AnalysisCache.make_key(*args[:2], "0.96.0", *args[3:]) != key
+        assert AnalysisCache.make_key(
+            *args[:3], AnalysisCache.hash_instructions(["other instructions"]), b"ls"
+        ) != key
+        assert AnalysisCache.make_key(*args[:4], b"ls -a") != key
+
+        # Instruction boundaries are part of the digest
+        assert AnalysisCache.hash_instructions(["a", "b"]) != AnalysisCache.hash_instructions(["ab"])
+
+    def test_corrupted_entry(self):
+        """Test that corrupted cache files are ignored."""
+        key = AnalysisCache.make_key(
+            "openai/gpt-4", "0.97.0", "0.95.0", AnalysisCache.hash_instructions([]), b"ls"
+        )
+        self.cache.save(key, [])
+        (self.cache.analysis_dir / f"{key}.json").write_bytes(b"{ invalid json")
+
+        assert self.cache.get(key) is None
@@ -1,100 +1,86 @@
 """
 Integration tests for caching functionality with CLI and analyzer.
 """
-import tempfile
-from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
+import pytest
 from click.testing import CliRunner
 from nushell_verifier.cli import cli
 from nushell_verifier.analyzer import NuShellAnalyzer
 from nushell_verifier.models import Config
 from nushell_verifier.cache import InstructionCache
 
+# Click's test runner keeps no state between invocations, so one serves every test
+RUNNER = CliRunner()
+
 
 class TestCacheIntegration:
     """Integration tests for caching with CLI and analyzer."""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
         """Set up test environment."""
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.cache_dir = Path(self.temp_dir.name)
-        self.runner = CliRunner()
-
-    def teardown_method(self):
-        """Clean up temporary directory."""
-        self.temp_dir.cleanup()
+        self.cache_dir = tmp_path
+        monkeypatch.setattr('nushell_verifier.cache.get_cache_path', lambda: self.cache_dir)
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_cache_info_cli_empty(self, mock_cache_path):
+    def test_cache_info_cli_empty(self):
         """Test cache info with empty cache."""
-        mock_cache_path.return_value = self.cache_dir
-
-        result = self.runner.invoke(cli, ['cache', 'info', '--short'])
+        result = RUNNER.invoke(cli, ['cache', 'info', '--short'])
 
         assert result.exit_code == 0
         assert "Cache Information:" in result.output
-        assert f"Directory: {self.cache_dir}/instructions" in result.output
+        assert f"Directory: {self.cache_dir}" in result.output
         assert "Exists: False" in result.output
         assert "Files: 0" in result.output
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_cache_info_cli_with_data(self, mock_cache_path):
+    def test_cache_info_cli_with_data(self):
         """Test cache info with cached data."""
-        mock_cache_path.return_value = self.cache_dir
-
         # Create some test cache data
         cache = InstructionCache()
         cache.save_instructions("0.107.0", "test instructions 1", "gpt-4")
         cache.save_instructions("0.106.0", "test instructions 2", "gpt-4")
 
-        result = self.runner.invoke(cli, ['cache', 'info', '--short'])
+        result = RUNNER.invoke(cli, ['cache', 'info', '--short'])
 
         assert result.exit_code == 0
         assert "Exists: True" in result.output
         assert "Files: 2" in result.output
         assert "0.106.0, 0.107.0" in result.output
+        assert "Cached analysis results: 0" in result.output
+        assert "Cached API responses: 0" in result.output
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_clear_cache_cli_empty(self, mock_cache_path):
+    def test_clear_cache_cli_empty(self):
         """Test cache clean with empty cache."""
-        mock_cache_path.return_value = self.cache_dir
-
-        result = self.runner.invoke(cli, ['cache', 'clean'])
+        result = RUNNER.invoke(cli, ['cache', 'clean'])
 
         assert result.exit_code == 0
         assert "Cache was already empty" in result.output
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_clear_cache_cli_with_data(self, mock_cache_path):
+    def test_clear_cache_cli_with_data(self):
         """Test cache clean with cached data."""
-        mock_cache_path.return_value = self.cache_dir
-
         # Create some test cache data
         cache = InstructionCache()
         cache.save_instructions("0.107.0", "test instructions 1", "gpt-4")
         cache.save_instructions("0.106.0", "test instructions 2", "gpt-4")
 
-        result = self.runner.invoke(cli, ['cache', 'clean'])
+        result = RUNNER.invoke(cli, ['cache', 'clean'])
 
         assert result.exit_code == 0
-        assert "Cleared 2 cached compatibility instruction(s)" in result.output
+        assert "Cleared 2 cache file(s)" in result.output
 
         # Verify cache is actually cleared
         info = cache.get_cache_info()
         assert info["file_count"] == 0
 
-    @patch('nushell_verifier.cache.get_cache_path')
     @patch('nushell_verifier.analyzer.NuShellAnalyzer.analyze_scripts')
-    def test_no_cache_cli_flag(self, mock_analyze, mock_cache_path):
+    def test_no_cache_cli_flag(self, mock_analyze):
         """Test --no-cache flag disables caching."""
-        mock_cache_path.return_value = self.cache_dir
         mock_analyze.return_value = []
 
         # Create test script directory
         script_dir = self.cache_dir / "scripts"
         script_dir.mkdir()
 
-        result = self.runner.invoke(cli, [
+        result = RUNNER.invoke(cli, [
             '--no-cache',
             '--directory', str(script_dir)
         ])
@@ -103,11 +89,8 @@ class TestCacheIntegration:
         # Verify that analyze_scripts was called (meaning we got past config loading)
         mock_analyze.assert_called_once()
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_analyzer_cache_integration(self, mock_cache_path):
+    def test_analyzer_cache_integration(self):
         """Test analyzer integration with caching."""
-        mock_cache_path.return_value = self.cache_dir
-
         config = Config(
             cache_enabled=True,
             llm_provider="openai",
@@ -132,11 +115,8 @@ class TestCacheIntegration:
             assert analyzer.cache is not None
             assert isinstance(analyzer.cache, InstructionCache)
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_analyzer_cache_disabled(self, mock_cache_path):
+    def test_analyzer_cache_disabled(self):
         """Test analyzer with caching disabled."""
-        mock_cache_path.return_value = self.cache_dir
-
         config = Config(
             cache_enabled=False,
             llm_provider="openai",
@@ -152,11 +132,8 @@ class TestCacheIntegration:
             # Verify cache is not initialized
             assert analyzer.cache is None
 
-    @patch('nushell_verifier.cache.get_cache_path')
-    def test_cache_hit_miss_reporting(self, mock_cache_path):
+    def test_cache_hit_miss_reporting(self, capsys):
         """Test cache hit/miss reporting in analyzer."""
-        mock_cache_path.return_value = self.cache_dir
-
         config = Config(
             cache_enabled=True,
             llm_provider="openai",
@@ -169,8 +146,7 @@ class TestCacheIntegration:
 
         with patch('nushell_verifier.analyzer.GitHubClient') as mock_github, \
              patch('nushell_verifier.analyzer.LLMClient') as mock_llm, \
-             patch('nushell_verifier.analyzer.NuShellScriptScanner') as mock_scanner, \
-             patch('builtins.print') as mock_print:
+             patch('nushell_verifier.analyzer.NuShellScriptScanner') as mock_scanner:
 
             # Mock scanner to return no scripts
             mock_scanner.return_value.scan_all.return_value = []
@@ -189,14 +165,15 @@ class TestCacheIntegration:
 
             # Mock LLM client
             mock_llm_instance = mock_llm.return_value
-            mock_llm_instance.convert_blog_to_instructions.return_value = "new instructions"
+            mock_llm_instance.convert_blog_to_instructions_async = AsyncMock(return_value="new instructions")
 
             analyzer = NuShellAnalyzer(config)
             analyzer.analyze_scripts("0.107.0")
 
             # Check that cache performance was reported
-            print_calls = [call[0][0] for call in mock_print.call_args_list if call and call[0]]
-            cache_perf_calls = [call for call in print_calls if "Cache performance:" in str(call)]
+            output = capsys.readouterr().out
+            assert "Analyzing scripts for compatibility with NuShell 0.107.0" in output
+            cache_perf_calls = [line for line in output.splitlines() if "Cache performance:" in line]
 
             # The test should pass if cache reporting works, but the exact numbers may vary
             # based on implementation details, so let's just check basic functionality
@@ -204,37 +181,131 @@ class TestCacheIntegration:
 
     def test_cache_directory_structure(self):
         """Test that cache creates proper directory structure."""
-        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
-            cache = InstructionCache()
+        cache = InstructionCache()
 
-            # Initially instructions directory doesn't exist
-            assert not cache.instructions_dir.exists()
+        # Initially instructions directory doesn't exist
+        assert not cache.instructions_dir.exists()
 
-            # Save instructions should create directories
-            cache.save_instructions("0.107.0", "test", "gpt-4")
+        # Save instructions should create directories
+        cache.save_instructions("0.107.0", "test", "gpt-4")
 
-            assert cache.cache_dir.exists()
-            assert cache.instructions_dir.exists()
-            assert (cache.instructions_dir / "0.107.0.json").exists()
+        assert cache.cache_dir.exists()
+        assert cache.instructions_dir.exists()
+        assert (cache.instructions_dir / "0.107.0.json").exists()
 
     def test_cache_with_different_models(self):
         """Test cache behavior with different LLM models."""
-        with patch('nushell_verifier.cache.get_cache_path', return_value=self.cache_dir):
-            cache = InstructionCache()
+        cache = InstructionCache()
+
+        # Save with gpt-4
+        cache.save_instructions("0.107.0", "gpt-4 instructions", "gpt-4")
+
+        # Should be retrievable with correct model
+        assert cache.get_cached_instructions("0.107.0", "gpt-4") == "gpt-4 instructions"
+
+        # Save with claude-3 (should overwrite previous entry)
+        cache.save_instructions("0.107.0", "claude instructions", "claude-3")
+
+        # Now only claude-3 instructions should be retrievable
+        assert cache.get_cached_instructions("0.107.0", "claude-3") == "claude instructions"
+        # gpt-4 should return None since it was overwritten
+        assert cache.get_cached_instructions("0.107.0", "gpt-4") is None
+
+        # Wrong model should return None
+        assert cache.get_cached_instructions("0.107.0", "unknown") is None
+
+    def test_cache_misses_generate_instructions(self):
+        """Test that only cache misses are fetched and converted, and results are cached."""
+        config = Config(
+            cache_enabled=True,
+            llm_provider="openai",
+            llm_model="gpt-4"
+        )
+
+        # Pre-populate cache with one version
+        cache = InstructionCache()
+        cache.save_instructions("0.106.0", "cached instructions", "openai/gpt-4")
+
+        with patch('nushell_verifier.analyzer.GitHubClient') as mock_github, \
+             patch('nushell_verifier.analyzer.LLMClient') as mock_llm, \
+             patch('nushell_verifier.analyzer.NuShellScriptScanner') as mock_scanner:
+
+            # Mock scanner to return no scripts
+            mock_scanner.return_value.scan_all.return_value = []
+
+            from nushell_verifier.models import ReleaseInfo
+            releases = [
+                ReleaseInfo("0.108.0", "http://blog.url/108"),
+                ReleaseInfo("0.107.0", "http://blog.url/107"),
+                ReleaseInfo("0.106.0", "http://blog.url/106")
+            ]
+            mock_github_instance = mock_github.return_value
+            mock_github_instance.get_releases_between.return_value = releases
+            mock_github_instance.fetch_blog_post_content.side_effect = (
+                lambda release: None if release.version == "0.108.0" else "blog content"
+            )
 
-            # Save with gpt-4
-            cache.save_instructions("0.107.0", "gpt-4 instructions", "gpt-4")
+            mock_llm_instance = mock_llm.return_value
+            mock_llm_instance.convert_blog_to_instructions_async = AsyncMock(
+                side_effect=lambda release, content: f"instructions for {release.version}"
+            )
+
+            analyzer = NuShellAnalyzer(config)
+            analyzer._prepare_release_instructions(releases)
 
-            # Should be retrievable with correct model
-            assert cache.get_cached_instructions("0.107.0", "gpt-4") == "gpt-4 instructions"
+            # Only the releases missing from the cache were fetched
+            assert mock_github_instance.fetch_blog_post_content.call_count == 2
+            mock_llm_instance.convert_blog_to_instructions_async.assert_called_once()
 
-            # Save with claude-3 (should overwrite previous entry)
-            cache.save_instructions("0.107.0", "claude instructions", "claude-3")
+            assert releases[0].compatibility_instructions is None
+            assert releases[1].compatibility_instructions == "instructions for 0.107.0"
+            assert releases[2].compatibility_instructions == "cached instructions"
 
-            # Now only claude-3 instructions should be retrievable
-            assert cache.get_cached_instructions("0.107.0", "claude-3") == "claude instructions"
-            # gpt-4 should return None since it was overwritten
-            assert cache.get_cached_instructions("0.107.0", "gpt-4") is None
+            # Newly generated instructions are cached for future runs
+            assert cache.get_cached_instructions("0.107.0", "openai/gpt-4") == "instructions for 0.107.0"
 
-            # Wrong model should return None
-            assert cache.get_cached_instructions("0.107.0", "unknown") is None
\ No newline at end of file
+    def test_batch_mode_generates_instructions_in_one_job(self):
+        """Test that batch mode converts all cache misses through a single batch job."""
+        config = Config(
+            cache_enabled=True,
+            llm_provider="openai",
+            llm_model="gpt-4",
+            batch_mode=True
+        )
+
+        with patch('nushell_verifier.analyzer.GitHubClient') as mock_github, \
+             patch('nushell_verifier.analyzer.LLMClient') as mock_llm, \
+             patch('nushell_verifier.analyzer.NuShellScriptScanner') as mock_scanner:
+
+            mock_scanner.return_value.scan_all.return_value = []
+
+            from nushell_verifier.models import ReleaseInfo
+            releases = [
+                ReleaseInfo("0.108.0", "http://blog.url/108"),
+                ReleaseInfo("0.107.0", "http://blog.url/107")
+            ]
+            mock_github_instance = mock_github.return_value
+            mock_github_instance.fetch_blog_post_content.side_effect = (
+                lambda release: None if release.version == "0.108.0" else "blog content"
+            )
+
+            mock_llm_instance = mock_llm.return_value
+            mock_llm_instance.supports_batch.return_value = True
+            mock_llm_instance.convert_blogs_to_instructions_batch.return_value = {
+                "0.107.0": "batched instructions"
+            }
+
+            analyzer = NuShellAnalyzer(config)
+            analyzer._prepare_release_instructions(releases)
+
+            # Only releases with a blog post are submitted, and no per-release calls are made
+            mock_llm_instance.convert_blogs_to_instructions_batch.assert_called_once_with(
+                [(releases[1], "blog content")]
+            )
+            mock_llm_instance.convert_blog_to_instructions_async.assert_not_called()
+
+            assert releases[0].compatibility_instructions is None
+            assert releases[1].compatibility_instructions == "batched instructions"
+
+            cache = InstructionCache()
+            assert cache.get_cached_instructions("0.107.0", "openai/gpt-4") == "batched instructions"
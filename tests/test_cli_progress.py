@@ -1,23 +1,25 @@
 """
 Tests for CLI integration with progress functionality.
 """
-import tempfile
+import os
+import subprocess
+import sys
 from unittest.mock import patch, MagicMock
+import pytest
 from click.testing import CliRunner
 from nushell_verifier.cli import cli
 
+# Click's test runner keeps no state between invocations, so one serves every test
+RUNNER = CliRunner()
+
 
 class TestCLIProgress:
     """Test CLI integration with progress system."""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
         """Set up test environment."""
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.runner = CliRunner()
-
-    def teardown_method(self):
-        """Clean up temporary directory."""
-        self.temp_dir.cleanup()
+        self.temp_dir = str(tmp_path)
 
     @patch('nushell_verifier.analyzer.NuShellAnalyzer')
     @patch('nushell_verifier.reporter.Reporter')
@@ -36,9 +38,9 @@ class TestCLIProgress:
         mock_reporter.return_value
 
         # Run CLI with --no-progress flag
-        result = self.runner.invoke(cli, [
+        result = RUNNER.invoke(cli, [
             '--no-progress',
-            '--directory', self.temp_dir.name
+            '--directory', self.temp_dir
         ])
 
         assert result.exit_code == 0
@@ -63,8 +65,8 @@ class TestCLIProgress:
         mock_reporter.return_value
 
         # Run CLI without --no-progress flag
-        result = self.runner.invoke(cli, [
-            '--directory', self.temp_dir.name
+        result = RUNNER.invoke(cli, [
+            '--directory', self.temp_dir
         ])
 
         assert result.exit_code == 0
@@ -89,12 +91,12 @@ class TestCLIProgress:
         mock_reporter.return_value
 
         # Run CLI with --no-progress and other flags
-        result = self.runner.invoke(cli, [
+        result = RUNNER.invoke(cli, [
             '--no-progress',
             '--verbose',
             '--no-cache',
             '--version', '0.97.0',
-            '--directory', self.temp_dir.name
+            '--directory', self.temp_dir
         ])
 
         assert result.exit_code == 0
@@ -106,33 +108,36 @@ class TestCLIProgress:
         # Verify analyze_scripts was called with correct version
         mock_analyzer_instance.analyze_scripts.assert_called_once_with(target_version='0.97.0')
 
-    @patch('nushell_verifier.cache.InstructionCache')
-    def test_cache_commands_work_independently(self, mock_cache):
-        """Test cache commands work independently."""
-        # Mock cache
-        mock_cache_instance = mock_cache.return_value
-        mock_cache_instance.get_cache_info.return_value = {
-            'cache_directory': '/test/cache',
-            'exists': False,
-            'file_count': 0,
-            'total_size_mb': 0,
-            'versions': []
-        }
-
-        # Test cache info command
-        result = self.runner.invoke(cli, ['cache', 'info', '--short'])
-        assert result.exit_code == 0
-        assert "Cache Information:" in result.output
+    @pytest.fixture
+    def mock_cache(self):
+        """Replace the instruction cache with an empty mock one."""
+        with patch('nushell_verifier.cache.InstructionCache') as mock_cache:
+            mock_cache_instance = mock_cache.return_value
+            mock_cache_instance.get_cache_info.return_value = {
+                'cache_directory': '/test/cache',
+                'exists': False,
+                'file_count': 0,
+                'total_size_mb': 0,
+                'versions': [],
+                'analysis_count': 0,
+                'response_count': 0
+            }
+            mock_cache_instance.clear_cache.return_value = 0
+            yield mock_cache_instance
 
-        # Test cache clean command
-        mock_cache_instance.clear_cache.return_value = 0
-        result = self.runner.invoke(cli, ['cache', 'clean'])
+    @pytest.mark.parametrize("args,expected", [
+        (['cache', 'info', '--short'], "Cache Information:"),
+        (['cache', 'clean'], "Cache was already empty"),
+    ])
+    def test_cache_commands_work_independently(self, mock_cache, args, expected):
+        """Test cache commands work independently."""
+        result = RUNNER.invoke(cli, args)
         assert result.exit_code == 0
-        assert "Cache was already empty" in result.output
+        assert expected in result.output
 
     def test_cli_help_includes_no_progress(self):
         """Test that CLI help includes --no-progress option."""
-        result = self.runner.invoke(cli, ['--help'])
+        result = RUNNER.invoke(cli, ['--help'])
         assert result.exit_code == 0
         assert '--no-progress' in result.output
         assert 'Disable progress bars and spinners' in result.output
@@ -151,12 +156,12 @@ class TestCLIProgress:
         mock_analyzer_instance.analyze_scripts.side_effect = RuntimeError("Test error")
 
         # Test with progress enabled
-        result = self.runner.invoke(cli, ['--directory', self.temp_dir.name])
+        result = RUNNER.invoke(cli, ['--directory', self.temp_dir])
         assert result.exit_code == 1
         assert "Error: Test error" in result.output
 
         # Test with progress disabled
-        result = self.runner.invoke(cli, ['--no-progress', '--directory', self.temp_dir.name])
+        result = RUNNER.invoke(cli, ['--no-progress', '--directory', self.temp_dir])
         assert result.exit_code == 1
         assert "Error: Test error" in result.output
 
@@ -176,17 +181,17 @@ class TestCLIProgress:
         mock_analyzer_instance.analyze_scripts.return_value = []
 
         # Run CLI with overrides and progress disabled
-        result = self.runner.invoke(cli, [
+        result = RUNNER.invoke(cli, [
             '--no-progress',
             '--no-cache',
-            '--directory', self.temp_dir.name,
+            '--directory', self.temp_dir,
             '--directory', '/another/dir'
         ])
 
         assert result.exit_code == 0
 
         # Verify config was modified correctly
-        assert mock_config.scan_directories == [self.temp_dir.name, '/another/dir']
+        assert mock_config.scan_directories == [self.temp_dir, '/another/dir']
         assert mock_config.cache_enabled is False
 
         # Verify analyzer was initialized correctly
@@ -206,7 +211,7 @@ class TestCLIProgress:
         mock_analyzer_instance.analyze_scripts.return_value = []
 
         # Run CLI
-        result = self.runner.invoke(cli, ['--no-progress'])
+        result = RUNNER.invoke(cli, ['--no-progress'])
         assert result.exit_code == 0
 
         # Check that the disable_progress parameter was passed as a boolean
@@ -218,25 +223,94 @@ class TestCLIProgress:
     def test_cache_subcommands_exist(self):
         """Test that cache subcommands exist and work properly."""
         # Test cache help shows subcommands
-        result = self.runner.invoke(cli, ['cache', '--help'])
+        result = RUNNER.invoke(cli, ['cache', '--help'])
         assert result.exit_code == 0
         assert 'info' in result.output
         assert 'clean' in result.output
 
-        # Test cache commands work with mocked dependencies
-        with patch('nushell_verifier.cache.InstructionCache') as mock_cache:
-            mock_cache_instance = mock_cache.return_value
-            mock_cache_instance.get_cache_info.return_value = {
-                'cache_directory': '/test',
-                'exists': False,
-                'file_count': 0,
-                'total_size_mb': 0,
-                'versions': []
-            }
+    def test_cli_import_does_not_load_litellm(self):
+        """Test that importing the CLI doesn't pull in litellm, which is slow to import."""
+        result = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys, nushell_verifier.cli; "
+                "sys.exit('litellm' in sys.modules or 'nushell_verifier.llm_client' in sys.modules)"
+            ],
+            capture_output=True,
+            text=True
+        )
+        assert result.returncode == 0, result.stderr
+
+    def test_cache_clean_loads_only_cache_modules(self):
+        """Test that the cache clean fast path doesn't import the analysis stack."""
+        for args in (['cache', 'clean'], ['cache', 'info', '--short']):
+            result = subprocess.run(
+                [
+                    sys.executable, "-c",
+                    "import sys; from nushell_verifier.cli import cli\n"
+                    "try:\n"
+                    f"    cli({args!r})\n"
+                    "except SystemExit:\n"
+                    "    pass\n"
+                    "heavy = {'litellm', 'httpx', 'rich', 'nushell_verifier.analyzer'}\n"
+                    "sys.exit(sorted(heavy & set(sys.modules)) or 0)"
+                ],
+                capture_output=True,
+                text=True,
+                env={**os.environ, "XDG_CACHE_HOME": self.temp_dir}
+            )
+            assert result.returncode == 0, (args, result.stderr)
 
-            result = self.runner.invoke(cli, ['cache', 'info', '--short'])
-            assert result.exit_code == 0
+    @patch('nushell_verifier.analyzer.NuShellAnalyzer')
+    @patch('nushell_verifier.config.load_config')
+    def test_cache_add_prepares_versions_concurrently(self, mock_load_config, mock_analyzer):
+        """Test that cache add prepares every version and keeps each version's output together."""
+        from nushell_verifier.models import Config, ReleaseInfo
+
+        mock_load_config.return_value = Config()
+        analyzer = mock_analyzer.return_value.__enter__.return_value
+        analyzer.config = Config()
+        analyzer.cache.has_instructions.return_value = False
+        analyzer.github_client.get_all_releases.return_value = [
+            ReleaseInfo("0.106.0", "https://www.nushell.sh/blog/a.html"),
+            ReleaseInfo("0.107.0", "https://www.nushell.sh/blog/b.html"),
+        ]
+        analyzer.github_client.fetch_blog_post_content.return_value = "blog content"
+        analyzer.llm_client.convert_blog_to_instructions_streaming.return_value = "instructions"
+
+        result = RUNNER.invoke(cli, ['cache', 'add', '0.106.0', '0.107.0'])
 
-            mock_cache_instance.clear_cache.return_value = 0
-            result = self.runner.invoke(cli, ['cache', 'clean'])
-            assert result.exit_code == 0
\ No newline at end of file
+        assert result.exit_code == 0
+        assert analyzer.cache.save_instructions.call_count == 2
+        # The release listing is fetched once for all versions
+        analyzer.github_client.get_all_releases.assert_called_once()
+        first = result.output.index("Processing version 0.106.0")
+        second = result.output.index("Processing version 0.107.0")
+        assert first < result.output.index("cached", first) < second
+
+    def test_cache_info_has_short_option(self):
+        """Test that cache info keeps its --short option."""
+        result = RUNNER.invoke(cli, ['cache', 'info', '--help'])
+        assert result.exit_code == 0
+        assert '--short' in result.output
+
+    @patch('nushell_verifier.analyzer.NuShellAnalyzer')
+    @patch('nushell_verifier.config.load_config')
+    def test_cache_add_skips_github_when_all_cached(self, mock_load_config, mock_analyzer):
+        """Test that cache add doesn't contact GitHub when every version is cached."""
+        from nushell_verifier.models import Config
+
+        mock_load_config.return_value = Config()
+        analyzer = mock_analyzer.return_value.__enter__.return_value
+        analyzer.config = Config()
+        analyzer.cache.has_instructions.return_value = True
+        analyzer.github_client.token_status.return_value = "Using GitHub token from configuration"
+
+        result = RUNNER.invoke(cli, ['cache', 'add', '0.106.0', '0.107.0'])
+
+        assert result.exit_code == 0
+        assert result.output.count("Instructions already cached") == 2
+        # The token status comes from the analyzer's client, shown once
+        assert result.output.count("Using GitHub token") == 1
+        analyzer.github_client.get_all_releases.assert_not_called()
+        analyzer.github_client.prefetch_blog_posts.assert_not_called()
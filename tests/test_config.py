@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+from nushell_verifier.config import create_default_config, load_config
+
+
+def test_default_config_round_trips(tmp_path):
+    """Test that the generated default config loads back with its values."""
+    with patch('nushell_verifier.config.get_config_path', return_value=tmp_path), \
+            patch('builtins.print'):
+        create_default_config()
+
+    config = load_config(tmp_path / "config.toml")
+    assert config.llm_provider == "openai"
+    assert config.scan_directories == ["~/dots/bin", "~/dots/config/nushell"]
+    assert config.temperature == 0.1
+    assert config.llm_params == {}
+    assert config.max_concurrency == 8
+
+
+def test_load_config(tmp_path):
+    """Test loading settings from a TOML file."""
+    config_path = tmp_path / "config.toml"
+    config_path.write_text(
+        'llm_model = "gpt-4o"\n'
+        'cache_enabled = false\n'
+        '\n'
+        '[llm_params]\n'
+        'top_p = 0.9\n'
+    )
+
+    config = load_config(config_path)
+    assert config.llm_model == "gpt-4o"
+    assert config.cache_enabled is False
+    assert config.llm_params == {"top_p": 0.9}
+
+
+def test_xdg_paths(monkeypatch, tmp_path):
+    """Test that XDG directories are honoured and resolved once per process."""
+    from nushell_verifier.config import get_cache_path, get_config_path
+
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    get_config_path.cache_clear()
+    get_cache_path.cache_clear()
+
+    try:
+        assert get_config_path() == tmp_path / "config" / "nushell-verifier"
+        assert get_cache_path() == tmp_path / "cache" / "nushell-verifier"
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "elsewhere"))
+        assert get_cache_path() == tmp_path / "cache" / "nushell-verifier"
+    finally:
+        get_config_path.cache_clear()
+        get_cache_path.cache_clear()
@@ -1,55 +1,43 @@
 """
 Unit tests for blog path extraction to prevent regression.
 """
-from nushell_verifier.github_client import GitHubClient
+import pytest
 
 
-def test_blog_path_extraction():
-    """Test that blog path extraction works correctly."""
-    client = GitHubClient()
-
+@pytest.mark.parametrize("blog_url,expected_path", [
     # Test cases based on real URLs
-    test_cases = [
-        (
-            "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html",
-            "blog/2025-09-02-nushell_0_107_0.md"
-        ),
-        (
-            "https://www.nushell.sh/blog/2025-07-23-nushell_0_106_0.html",
-            "blog/2025-07-23-nushell_0_106_0.md"
-        ),
-        (
-            "https://www.nushell.sh/blog/2023-10-10-nushell_0_85_0.html",
-            "blog/2023-10-10-nushell_0_85_0.md"
-        )
-    ]
-
-    for blog_url, expected_path in test_cases:
-        result = client._extract_blog_path(blog_url)
-        assert result == expected_path, f"URL {blog_url} should map to {expected_path}, got {result}"
+    (
+        "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html",
+        "blog/2025-09-02-nushell_0_107_0.md"
+    ),
+    (
+        "https://www.nushell.sh/blog/2025-07-23-nushell_0_106_0.html",
+        "blog/2025-07-23-nushell_0_106_0.md"
+    ),
+    (
+        "https://www.nushell.sh/blog/2023-10-10-nushell_0_85_0.html",
+        "blog/2023-10-10-nushell_0_85_0.md"
+    )
+])
+def test_blog_path_extraction(gh_client, blog_url, expected_path):
+    """Test that blog path extraction works correctly."""
+    assert gh_client._extract_blog_path(blog_url) == expected_path
 
 
-def test_blog_path_extraction_invalid_urls():
+@pytest.mark.parametrize("invalid_url", [
+    "https://example.com/blog/invalid.html",
+    "https://www.nushell.sh/docs/something.html",
+    "not-a-url",
+    None,
+    ""
+])
+def test_blog_path_extraction_invalid_urls(gh_client, invalid_url):
     """Test blog path extraction with invalid URLs."""
-    client = GitHubClient()
-
-    invalid_urls = [
-        "https://example.com/blog/invalid.html",
-        "https://www.nushell.sh/docs/something.html",
-        "not-a-url",
-        None,
-        ""
-    ]
+    assert gh_client._extract_blog_path(invalid_url) is None
 
-    for invalid_url in invalid_urls:
-        result = client._extract_blog_path(invalid_url)
-        assert result is None, f"Invalid URL {invalid_url} should return None, got {result}"
 
-
-def test_blog_url_pattern_in_release_body():
+def test_blog_url_pattern_in_release_body(gh_client):
     """Test that the blog URL pattern correctly matches release bodies."""
-    client = GitHubClient()
-
     # Example release body content
     release_body = """
     This release brings several exciting features...
@@ -59,17 +47,26 @@ def test_blog_url_pattern_in_release_body():
     Thanks to all contributors!
     """
 
-    extracted_url = client._extract_blog_url(release_body)
+    extracted_url = gh_client._extract_blog_url(release_body)
     assert extracted_url == "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html"
 
 
-def test_blog_url_pattern_no_match():
+def test_blog_url_pattern_no_match(gh_client):
     """Test blog URL extraction when no URL is present."""
-    client = GitHubClient()
-
     release_body = """
     This release brings several features but has no blog post link.
     """
 
-    extracted_url = client._extract_blog_url(release_body)
-    assert extracted_url is None
\ No newline at end of file
+    extracted_url = gh_client._extract_blog_url(release_body)
+    assert extracted_url is None
+
+
+def test_blog_url_extraction(gh_client):
+    """Test finding the blog post link in release notes."""
+    body = (
+        "Changes: see https://www.nushell.sh/blog/ for all posts.\n"
+        "Release notes: https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html\n"
+    )
+    assert gh_client._extract_blog_url(body) == "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html"
+    assert gh_client._extract_blog_url("No blog post this time") is None
+    assert gh_client._extract_blog_url("") is None
@@ -1,6 +1,28 @@
 import subprocess
 from unittest.mock import patch, MagicMock
-from nushell_verifier.github_client import GitHubClient
+import pytest
+from nushell_verifier.github_client import GitHubClient, _gh_cli_token
+
+
+def graphql_releases(*releases):
+    """Build a mock GraphQL response listing (tag, description) releases."""
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {}
+    response.json.return_value = {"data": {"repository": {"releases": {"nodes": [
+        {"tagName": tag, "description": description, "isDraft": False, "isPrerelease": False}
+        for tag, description in releases
+    ]}}}}
+    return response
+
+
+@pytest.fixture(autouse=True)
+def isolated_gh_token(monkeypatch):
+    """Resolve tokens afresh in each test, independent of the environment."""
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    _gh_cli_token.cache_clear()
+    yield
+    _gh_cli_token.cache_clear()
 
 
 def test_github_client_with_provided_token():
@@ -63,19 +85,336 @@ def test_github_client_gh_cli_timeout(mock_run):
     assert client.github_token is None
 
 
-def test_github_client_explicit_token_takes_precedence():
+@patch('subprocess.run')
+def test_github_client_explicit_token_takes_precedence(mock_run):
     """Test that explicit token takes precedence over GitHub CLI."""
-    with patch('subprocess.run') as mock_run:
-        # Mock successful gh CLI call
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_result.stdout = "gh_cli_token_123\n"
-        mock_run.return_value = mock_result
+    # Mock successful gh CLI call
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = "gh_cli_token_123\n"
+    mock_run.return_value = mock_result
+
+    client = GitHubClient("explicit_token")
+    assert client.github_token == "explicit_token"
+
+    # GitHub CLI should not be called when explicit token is provided
+    mock_run.assert_not_called()
+
+
+@patch('httpx.Client')
+def test_releases_served_from_fresh_cache(mock_client_class, tmp_path):
+    """Test that fresh cached releases avoid a GitHub API request."""
+    from nushell_verifier.cache import ResponseCache
+
+    with patch('nushell_verifier.cache.get_cache_path', return_value=tmp_path):
+        response_cache = ResponseCache(ttl=3600)
+
+    mock_client = mock_client_class.return_value
+    mock_client.post.return_value = graphql_releases(
+        ("0.107.0", "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html")
+    )
+
+    client = GitHubClient("token", response_cache=response_cache)
+    assert client.get_latest_version() == "0.107.0"
+    releases = client.get_releases_between("0.100.0", "0.107.0")
+
+    # The second call is answered from the cache
+    assert mock_client.post.call_count == 1
+    assert releases[0].blog_post_url == "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html"
+
+
+@patch('httpx.Client')
+def test_expired_releases_revalidated_with_etag(mock_client_class, tmp_path):
+    """Test that expired cached releases are revalidated with If-None-Match."""
+    from nushell_verifier.cache import ResponseCache
+
+    with patch('nushell_verifier.cache.get_cache_path', return_value=tmp_path):
+        response_cache = ResponseCache(ttl=0)
+
+    client = GitHubClient("token", response_cache=response_cache)
+    url = f"{client.base_url}/repos/{client.nushell_repo}/releases"
+    response_cache.save(
+        f"{url}?per_page=100",
+        [{"version": "0.106.0", "blog_post_url": None}],
+        '"etag-1"'
+    )
+
+    mock_response = MagicMock()
+    mock_response.status_code = 304
+    mock_client = mock_client_class.return_value
+    mock_client.get.return_value = mock_response
+
+    assert client.get_latest_version() == "0.106.0"
+    assert mock_client.get.call_args[1]["headers"]["If-None-Match"] == '"etag-1"'
+    mock_response.raise_for_status.assert_not_called()
+
+
+@patch('nushell_verifier.github_client.time.sleep')
+@patch('httpx.Client')
+def test_transient_errors_are_retried(mock_client_class, mock_sleep):
+    """Test that server errors are retried with backoff before succeeding."""
+    unavailable = MagicMock()
+    unavailable.status_code = 503
+    unavailable.headers = {}
+
+    mock_client = mock_client_class.return_value
+    mock_client.post.side_effect = [unavailable, graphql_releases(("0.107.0", ""))]
+
+    client = GitHubClient("token")
+    assert client.get_latest_version() == "0.107.0"
+    assert mock_client.post.call_count == 2
+    mock_sleep.assert_called_once()
+
+
+@patch('nushell_verifier.github_client.time.time', return_value=1000.0)
+@patch('nushell_verifier.github_client.time.sleep')
+@patch('httpx.Client')
+def test_rate_limit_waits_for_reset(mock_client_class, mock_sleep, mock_time):
+    """Test that an exhausted rate limit waits until reset, but only if it's soon."""
+    client = GitHubClient("token")
+
+    limited = MagicMock()
+    limited.status_code = 403
+    limited.headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1010"}
+    assert client._retry_delay(limited, 0) == 11.0
+
+    limited.headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "5000"}
+    assert client._retry_delay(limited, 0) is None
+
+    # A 403 that isn't a rate limit is not retried
+    forbidden = MagicMock()
+    forbidden.status_code = 403
+    forbidden.headers = {}
+    assert client._retry_delay(forbidden, 0) is None
+
+
+@patch('httpx.Client')
+def test_http_client_reused_across_requests(mock_client_class):
+    """Test that one connection pool serves every request until closed."""
+    mock_client_class.return_value.post.return_value = graphql_releases(("0.107.0", ""))
+
+    client = GitHubClient("token")
+    client.get_all_releases(limit=10)
+    client.get_latest_version()
+
+    mock_client_class.assert_called_once()
+    assert mock_client_class.return_value.post.call_count == 2
+
+    client.close()
+    mock_client_class.return_value.close.assert_called_once()
+
+
+@patch('httpx.Client')
+def test_blog_content_fetched_as_raw_file(mock_client_class):
+    """Test that blog posts are downloaded as raw files, not via the contents API."""
+    from nushell_verifier.models import ReleaseInfo
+
+    ok = MagicMock()
+    ok.status_code = 200
+    ok.headers = {}
+    ok.text = "# Nushell 0.107.0"
+    mock_client = mock_client_class.return_value
+    mock_client.get.return_value = ok
+
+    client = GitHubClient("token")
+    release = ReleaseInfo("0.107.0", "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html")
+    assert client.fetch_blog_post_content(release) == "# Nushell 0.107.0"
+    assert mock_client.get.call_args[0][0] == (
+        "https://raw.githubusercontent.com/nushell/nushell.github.io/HEAD/"
+        "blog/2025-09-02-nushell_0_107_0.md"
+    )
+
+    # Missing files return None
+    ok.status_code = 404
+    assert client.fetch_blog_post_content(release) is None
+
+
+@patch('httpx.Client')
+def test_releases_between_skips_patch_releases(mock_client_class):
+    """Test filtering releases by version range, excluding patch releases."""
+    mock_client_class.return_value.post.return_value = graphql_releases(
+        *[(tag, "") for tag in ["0.108.0", "0.107.1", "0.107.0", "0.106.0", "0.99.0"]]
+    )
+
+    client = GitHubClient("token")
+    releases = client.get_releases_between("0.100.0", "0.107.0")
+    assert [release.version for release in releases] == ["0.107.0", "0.106.0"]
+
+    # Further range queries reuse the sorted release index
+    releases = client.get_releases_between("0.107.0", "0.200.0")
+    assert [release.version for release in releases] == ["0.108.0", "0.107.0"]
+    assert mock_client_class.return_value.post.call_count == 1
+
+
+@patch('subprocess.run')
+def test_gh_cli_token_looked_up_once(mock_run):
+    """Test that the GitHub CLI is only run once however many clients are created."""
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = "gh_cli_token_123\n"
+    mock_run.return_value = mock_result
+
+    assert GitHubClient().github_token == "gh_cli_token_123"
+    assert GitHubClient().github_token == "gh_cli_token_123"
+    mock_run.assert_called_once()
+
+
+@patch('subprocess.run')
+def test_github_token_env_var(mock_run, monkeypatch):
+    """Test that GITHUB_TOKEN is used without running the GitHub CLI."""
+    monkeypatch.setenv("GITHUB_TOKEN", "env_token")
+
+    assert GitHubClient().github_token == "env_token"
+    mock_run.assert_not_called()
+
+
+@patch('subprocess.run')
+def test_token_status(mock_run, monkeypatch):
+    """Test that the token status names where the token came from."""
+    mock_run.return_value = MagicMock(returncode=1, stdout="")
+    assert GitHubClient().token_status() == (
+        "Warning: No GitHub token available - API rate limits may apply"
+    )
+
+    mock_run.return_value = MagicMock(returncode=0, stdout="gh_cli_token_123\n")
+    _gh_cli_token.cache_clear()
+    assert GitHubClient().token_status() == "Using GitHub token from GitHub CLI (gh auth token)"
+
+    monkeypatch.setenv("GITHUB_TOKEN", "env_token")
+    assert GitHubClient().token_status() == (
+        "Using GitHub token from GITHUB_TOKEN environment variable"
+    )
+    assert GitHubClient("explicit_token").token_status() == "Using GitHub token from configuration"
+
+
+@patch('httpx.Client')
+def test_releases_listed_via_graphql_with_token(mock_client_class):
+    """Test that authenticated clients list releases with a GraphQL query."""
+    response = graphql_releases(
+        ("0.107.0", "See https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html"),
+        ("0.106.0", None),
+    )
+    nodes = response.json.return_value["data"]["repository"]["releases"]["nodes"]
+    nodes.append({"tagName": "0.108.0-rc", "description": "", "isDraft": False, "isPrerelease": True})
+    mock_client = mock_client_class.return_value
+    mock_client.post.return_value = response
 
-        client = GitHubClient("explicit_token")
-        assert client.github_token == "explicit_token"
+    releases = GitHubClient("token").get_all_releases()
 
-        # GitHub CLI should not be called when explicit token is provided
-        mock_run.assert_not_called()
+    assert [release.version for release in releases] == ["0.107.0", "0.106.0"]
+    assert releases[0].blog_post_url == "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html"
+    assert releases[1].blog_post_url is None
+    assert mock_client.post.call_args[0][0] == "https://api.github.com/graphql"
+    mock_client.get.assert_not_called()
+
+
+@patch('httpx.Client')
+def test_releases_listed_via_rest_without_token(mock_client_class):
+    """Test that unauthenticated clients fall back to the REST listing."""
+    ok = MagicMock()
+    ok.status_code = 200
+    ok.headers = {}
+    ok.json.return_value = [
+        {"tag_name": "0.107.0", "body": "", "draft": False, "prerelease": False},
+        {"tag_name": "0.108.0-rc", "body": "", "draft": False, "prerelease": True},
+    ]
+    mock_client = mock_client_class.return_value
+    mock_client.get.return_value = ok
+
+    with patch.object(GitHubClient, '_get_gh_cli_token', return_value=None):
+        client = GitHubClient()
+
+    assert [release.version for release in client.get_all_releases()] == ["0.107.0"]
+    mock_client.post.assert_not_called()
+
+
+@patch('httpx.Client')
+def test_blog_content_revalidated_with_etag(mock_client_class, tmp_path):
+    """Test that cached blog posts are revalidated with If-None-Match once expired."""
+    from nushell_verifier.cache import ResponseCache
+    from nushell_verifier.models import ReleaseInfo
+
+    with patch('nushell_verifier.cache.get_cache_path', return_value=tmp_path):
+        response_cache = ResponseCache(ttl=0)
+
+    ok = MagicMock()
+    ok.status_code = 200
+    ok.headers = {"ETag": '"blog-etag"'}
+    ok.text = "# Nushell 0.107.0"
+    mock_client = mock_client_class.return_value
+    mock_client.get.return_value = ok
+
+    client = GitHubClient("token", response_cache=response_cache)
+    release = ReleaseInfo("0.107.0", "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html")
+    assert client.fetch_blog_post_content(release) == "# Nushell 0.107.0"
+
+    not_modified = MagicMock()
+    not_modified.status_code = 304
+    mock_client.get.return_value = not_modified
+
+    assert client.fetch_blog_post_content(release) == "# Nushell 0.107.0"
+    assert mock_client.get.call_args[1]["headers"]["If-None-Match"] == '"blog-etag"'
+
+
+@patch('httpx.Client')
+def test_blog_posts_prefetched_in_one_request(mock_client_class):
+    """Test that prefetched blog posts are served without per-post requests."""
+    from nushell_verifier.models import ReleaseInfo
+
+    releases = [
+        ReleaseInfo("0.107.0", "https://www.nushell.sh/blog/2025-09-02-nushell_0_107_0.html"),
+        ReleaseInfo("0.106.0", "https://www.nushell.sh/blog/2025-07-23-nushell_0_106_0.html"),
+        ReleaseInfo("0.105.0", None),
+    ]
+
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {}
+    response.json.return_value = {"data": {"repository": {
+        # Paths are queried in sorted order
+        "file0": None,
+        "file1": {"text": "# Nushell 0.107.0", "isTruncated": False},
+    }}}
+    mock_client = mock_client_class.return_value
+    mock_client.post.return_value = response
+
+    client = GitHubClient("token")
+    client.prefetch_blog_posts(releases)
+
+    assert mock_client.post.call_count == 1
+    query = mock_client.post.call_args[1]["json"]["query"]
+    assert "HEAD:blog/2025-07-23-nushell_0_106_0.md" in query
+
+    assert client.fetch_blog_post_content(releases[0]) == "# Nushell 0.107.0"
+    assert client.fetch_blog_post_content(releases[1]) is None
+    mock_client.get.assert_not_called()
+
+
+@patch('httpx.Client')
+def test_release_listing_fetched_once_per_client(mock_client_class):
+    """Test that repeated release queries reuse the listing without a response cache."""
+    mock_client = mock_client_class.return_value
+    mock_client.post.return_value = graphql_releases(("0.107.0", ""), ("0.106.0", ""))
+
+    client = GitHubClient("token")
+    assert client.get_latest_version() == "0.107.0"
+    releases = client.get_all_releases()
+    releases.clear()
+    assert len(client.get_all_releases()) == 2
+
+    assert mock_client.post.call_count == 1
+
+
+@patch('httpx.Client')
+def test_shorter_release_listing_served_from_longer(mock_client_class):
+    """Test that a shorter release listing is sliced from a longer one already fetched."""
+    mock_client = mock_client_class.return_value
+    mock_client.post.return_value = graphql_releases(
+        ("0.107.0", ""), ("0.106.0", ""), ("0.105.0", "")
+    )
 
+    client = GitHubClient("token")
+    assert len(client.get_all_releases()) == 3
+    assert [release.version for release in client.get_all_releases(limit=2)] == ["0.107.0", "0.106.0"]
 
+    assert mock_client.post.call_count == 1
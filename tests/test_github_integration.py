@@ -1,30 +1,42 @@
 """
 Integration tests for GitHub client - these make real API calls.
-Run with: pytest tests/test_github_integration.py -s -v
+They're skipped by default; run with: pytest -m network tests/test_github_integration.py -s -v
 """
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 from nushell_verifier.github_client import GitHubClient
 
+pytestmark = pytest.mark.network
+
+BLOG_URL_PATTERN = re.compile(r"https://www\.nushell\.sh/blog/(.+)\.html")
+
 
 class TestGitHubIntegration:
     """Integration tests that make real GitHub API calls."""
 
-    def setup_method(self):
-        """Set up client for each test."""
-        self.client = GitHubClient()  # Will auto-detect GitHub CLI token if available
+    @pytest.fixture(scope="class")
+    def client(self):
+        """Set up one client for the whole class, so its release listings are reused."""
+        client = GitHubClient()  # Will auto-detect GitHub CLI token if available
+        yield client
+        client.close()
 
-    def test_get_latest_version_real(self):
+    @pytest.fixture(scope="class")
+    def releases(self, client):
+        """Fetch the 10 latest releases once for the tests that inspect them."""
+        return client._get_releases(limit=10)
+
+    def test_get_latest_version_real(self, client):
         """Test fetching the actual latest NuShell version."""
-        version = self.client.get_latest_version()
+        version = client.get_latest_version()
 
         print(f"Latest version: {version}")
         assert version.startswith(("0.", "1."))  # Should be a version like 0.107.0
         assert "." in version
 
-    def test_get_releases_real(self):
+    def test_get_releases_real(self, releases):
         """Test fetching real releases."""
-        releases = self.client._get_releases(limit=5)
-
         print(f"Found {len(releases)} releases:")
         for release in releases[:3]:
             print(f"  - {release.version}: {release.blog_post_url}")
@@ -32,10 +44,8 @@ class TestGitHubIntegration:
         assert len(releases) > 0
         assert all(r.version for r in releases)
 
-    def test_release_blog_url_extraction(self):
+    def test_release_blog_url_extraction(self, releases):
         """Test blog URL extraction from real release bodies."""
-        releases = self.client._get_releases(limit=10)
-
         releases_with_blogs = [r for r in releases if r.blog_post_url]
         releases_without_blogs = [r for r in releases if not r.blog_post_url]
 
@@ -52,10 +62,8 @@ class TestGitHubIntegration:
             for release in releases_without_blogs[:5]:
                 print(f"  - {release.version}")
 
-    def test_blog_post_fetching_real(self):
+    def test_blog_post_fetching_real(self, client, releases):
         """Test fetching actual blog posts."""
-        releases = self.client._get_releases(limit=10)
-
         # Find a release with a blog URL
         test_release = None
         for release in releases:
@@ -70,11 +78,11 @@ class TestGitHubIntegration:
         print(f"Blog URL: {test_release.blog_post_url}")
 
         # Test the blog path extraction
-        blog_path = self.client._extract_blog_path(test_release.blog_post_url)
+        blog_path = client._extract_blog_path(test_release.blog_post_url)
         print(f"Extracted blog path: {blog_path}")
 
         # Test fetching the actual content
-        content = self.client.fetch_blog_post_content(test_release)
+        content = client.fetch_blog_post_content(test_release)
 
         if content:
             print(f"Blog post content length: {len(content)}")
@@ -85,15 +93,15 @@ class TestGitHubIntegration:
             # Let's debug why it failed
             if blog_path:
                 print(f"Trying to fetch directly: {blog_path}")
-                direct_content = self.client._fetch_file_content(self.client.blog_repo, blog_path)
+                direct_content = client._fetch_file_content(client.blog_repo, blog_path)
                 print(f"Direct fetch result: {direct_content is not None}")
 
-    def test_version_range_releases(self):
+    def test_version_range_releases(self, client):
         """Test fetching releases in a specific version range."""
         start_version = "0.105.0"
         end_version = "0.107.0"
 
-        releases = self.client.get_releases_between(start_version, end_version)
+        releases = client.get_releases_between(start_version, end_version)
 
         print(f"Releases between {start_version} and {end_version}:")
         for release in releases:
@@ -101,10 +109,14 @@ class TestGitHubIntegration:
 
         assert len(releases) > 0
 
-        # Test if we can fetch blog posts for any of these
+        # Test if we can fetch blog posts for any of these. With a token they all
+        # come from one GraphQL request; otherwise the fetches overlap
+        client.prefetch_blog_posts(releases)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            contents = list(executor.map(client.fetch_blog_post_content, releases))
+
         successful_fetches = 0
-        for release in releases:
-            content = self.client.fetch_blog_post_content(release)
+        for release, content in zip(releases, contents):
             if content:
                 successful_fetches += 1
                 print(f"✅ Successfully fetched blog for {release.version}")
@@ -113,10 +125,10 @@ class TestGitHubIntegration:
 
         print(f"Successfully fetched {successful_fetches}/{len(releases)} blog posts")
 
-    def test_debug_specific_release(self):
+    def test_debug_specific_release(self, client):
         """Debug a specific recent release to understand the issue."""
         # Let's debug 0.106.0 specifically
-        releases = self.client._get_releases()
+        releases = client._get_releases()
         target_release = None
 
         for release in releases:
@@ -132,16 +144,14 @@ class TestGitHubIntegration:
 
         if target_release.blog_post_url:
             # Test URL pattern
-            import re
-            pattern = re.compile(r"https://www\.nushell\.sh/blog/(.+)\.html")
-            match = pattern.search(target_release.blog_post_url)
+            match = BLOG_URL_PATTERN.search(target_release.blog_post_url)
             if match:
                 print(f"URL pattern matches: {match.group(1)}")
                 blog_path = f"blog/_posts/{match.group(1)}.md"
                 print(f"Expected blog path: {blog_path}")
 
                 # Try to fetch it
-                content = self.client._fetch_file_content(self.client.blog_repo, blog_path)
+                content = client._fetch_file_content(client.blog_repo, blog_path)
                 print(f"Fetch result: {content is not None}")
                 if content:
                     print(f"Content length: {len(content)}")
@@ -154,7 +164,7 @@ class TestGitHubIntegration:
                     ]
                     for alt_path in alt_paths:
                         print(f"Trying alternative path: {alt_path}")
-                        alt_content = self.client._fetch_file_content(self.client.blog_repo, alt_path)
+                        alt_content = client._fetch_file_content(client.blog_repo, alt_path)
                         if alt_content:
                             print(f"✅ Found content at: {alt_path}")
                             break
@@ -1,162 +1,564 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
 from nushell_verifier.llm_client import LLMClient
 from nushell_verifier.models import Config
 
 
-def test_safe_params_gpt4():
-    """Test safe parameters for GPT-4 (supports temperature)."""
-    config = Config(llm_provider="openai", llm_model="gpt-4")
-    client = LLMClient(config)
+@pytest.mark.parametrize("config_kwargs,custom_params,expected", [
+    pytest.param(
+        {"llm_provider": "openai", "llm_model": "gpt-4"}, None,
+        {"temperature": 0.1, "max_tokens": 32000},
+        id="gpt4-supports-temperature"
+    ),
+    pytest.param(
+        {"llm_provider": "openai", "llm_model": "gpt-5"}, None,
+        {"max_tokens": 32000},
+        id="gpt5-no-temperature"
+    ),
+    pytest.param(
+        {"llm_provider": "openai", "llm_model": "gpt-4", "temperature": 0.5}, None,
+        {"temperature": 0.5, "max_tokens": 32000},
+        id="custom-temperature"
+    ),
+    pytest.param(
+        {"llm_provider": "openai", "llm_model": "gpt-4", "llm_params": {"top_p": 0.9, "max_tokens": 2000}}, None,
+        {"temperature": 0.1, "top_p": 0.9, "max_tokens": 2000},  # llm_params override defaults
+        id="llm-params"
+    ),
+    pytest.param(
+        {"llm_provider": "unknown", "llm_model": "unknown-model"}, None,
+        {"max_tokens": 32000},  # Default supports neither temperature nor top_p
+        id="unsupported-model"
+    ),
+    pytest.param(
+        {"llm_provider": "anthropic", "llm_model": "claude-3-sonnet"}, None,
+        {"temperature": 0.1, "max_tokens": 32000},
+        id="anthropic"
+    ),
+    pytest.param(
+        {"llm_provider": "openai", "llm_model": "gpt-4"}, {"temperature": 0.8},
+        {"temperature": 0.8, "max_tokens": 32000},
+        id="custom-params-override"
+    ),
+    pytest.param(
+        {"llm_provider": "openai", "llm_model": "gpt-5", "llm_params": {"temperature": 0.5, "max_tokens": 2000}}, None,
+        {"max_tokens": 2000},  # Unsupported temperature is filtered out
+        id="filters-unsupported"
+    ),
+])
+def test_safe_params(config_kwargs, custom_params, expected):
+    """Test that safe parameters keep only what the model supports, with overrides applied."""
+    client = LLMClient(Config(**config_kwargs))
+
+    assert client._get_safe_params(custom_params=custom_params) == expected
 
-    params = client._get_safe_params()
 
-    assert "temperature" in params
-    assert params["temperature"] == 0.1
-    assert "max_tokens" in params
-    assert params["max_tokens"] == 32000
+@patch('litellm.completion')
+def test_convert_blog_to_instructions_uses_safe_params(mock_completion):
+    """Test that converting a blog post without a callback uses safe parameters and no streaming."""
+    from nushell_verifier.models import ReleaseInfo
 
+    # Mock the response
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Test instructions"
+    mock_completion.return_value = mock_response
 
-def test_safe_params_gpt5():
-    """Test safe parameters for GPT-5 (no temperature support)."""
-    config = Config(llm_provider="openai", llm_model="gpt-5")
+    config = Config(llm_provider="openai", llm_model="gpt-5")  # No temperature support
     client = LLMClient(config)
 
-    params = client._get_safe_params()
+    release = ReleaseInfo(version="0.95.0", blog_post_url="test")
+    client.convert_blog_to_instructions_streaming(release, "test content")
 
-    assert "temperature" not in params
-    assert "max_tokens" in params
-    assert params["max_tokens"] == 32000
+    # Verify the call was made without temperature
+    mock_completion.assert_called_once()
+    call_args = mock_completion.call_args
 
+    assert "stream" not in call_args[1]
+    assert "temperature" not in call_args[1]
+    assert "max_tokens" in call_args[1]
+    assert call_args[1]["model"] == "openai/gpt-5"
 
-def test_safe_params_with_custom_temperature():
-    """Test safe parameters with custom temperature from config."""
-    config = Config(llm_provider="openai", llm_model="gpt-4", temperature=0.5)
-    client = LLMClient(config)
 
-    params = client._get_safe_params()
+@patch('litellm.completion')
+def test_analyze_script_compatibility_uses_safe_params(mock_completion):
+    """Test that analyzing a script without a callback uses safe parameters and no streaming."""
+    from pathlib import Path
 
-    assert params["temperature"] == 0.5
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
 
+    # Mock the response
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "COMPATIBLE"
+    mock_completion.return_value = mock_response
 
-def test_safe_params_with_llm_params():
-    """Test safe parameters with custom llm_params from config."""
-    config = Config(
-        llm_provider="openai",
-        llm_model="gpt-4",
-        llm_params={"top_p": 0.9, "max_tokens": 2000}
-    )
+    config = Config(llm_provider="openai", llm_model="gpt-4", temperature=0.2)
     client = LLMClient(config)
 
-    params = client._get_safe_params()
-
-    assert params["top_p"] == 0.9
-    assert params["max_tokens"] == 2000  # Should override default
+    script = ScriptFile(
+        path=Path("test.nu"),
+        compatible_version="0.90.0",
+        method=CompatibilityMethod.COMMENT_HEADER,
+        content="echo 'test'"
+    )
 
+    result = client.analyze_script_compatibility_streaming(script, "0.95.0", ["test instructions"])
 
-def test_safe_params_unsupported_model():
-    """Test safe parameters for unknown model (uses default)."""
-    config = Config(llm_provider="unknown", llm_model="unknown-model")
-    client = LLMClient(config)
+    # Verify the call was made with correct temperature
+    mock_completion.assert_called_once()
+    call_args = mock_completion.call_args
 
-    params = client._get_safe_params()
+    assert "stream" not in call_args[1]
+    assert call_args[1]["temperature"] == 0.2
+    assert "max_tokens" in call_args[1]
+    assert result == []  # COMPATIBLE response should return empty list
 
-    assert "temperature" not in params  # Default doesn't support temperature
-    assert "max_tokens" in params
-    assert "top_p" not in params  # Default doesn't support top_p
+def test_supports_batch():
+    """Test that batch support depends on the configured provider."""
+    assert LLMClient(Config(llm_provider="openai", llm_model="gpt-4")).supports_batch()
+    assert not LLMClient(Config(llm_provider="anthropic", llm_model="claude-3-opus")).supports_batch()
 
 
-def test_safe_params_anthropic():
-    """Test safe parameters for Anthropic models."""
-    config = Config(llm_provider="anthropic", llm_model="claude-3-sonnet")
-    client = LLMClient(config)
+@patch('litellm.file_content')
+@patch('litellm.retrieve_batch')
+@patch('litellm.create_batch')
+@patch('litellm.create_file')
+@patch('time.sleep')
+def test_convert_blogs_to_instructions_batch(
+    mock_sleep, mock_create_file, mock_create_batch, mock_retrieve_batch, mock_file_content
+):
+    """Test that blog posts are submitted as one batch job and results mapped by version."""
+    import json
 
-    params = client._get_safe_params()
+    from nushell_verifier.models import ReleaseInfo
 
-    assert "temperature" in params
-    assert params["temperature"] == 0.1
-    assert "max_tokens" in params
+    mock_create_file.return_value.id = "file-in"
+    mock_create_batch.return_value = MagicMock(id="batch-1", status="in_progress")
+    mock_retrieve_batch.return_value = MagicMock(
+        id="batch-1", status="completed", output_file_id="file-out"
+    )
 
+    def result_line(custom_id, content, status_code=200):
+        return json.dumps({
+            "custom_id": custom_id,
+            "response": {
+                "status_code": status_code,
+                "body": {"choices": [{"message": {"content": content}}]}
+            },
+            "error": None
+        })
+
+    mock_file_content.return_value.content = "\n".join([
+        result_line("0.95.0", "  instructions 95  "),
+        result_line("0.96.0", None, status_code=500),
+    ]).encode("utf-8")
 
-def test_safe_params_custom_params_override():
-    """Test that custom_params parameter works correctly."""
     config = Config(llm_provider="openai", llm_model="gpt-4")
     client = LLMClient(config)
 
-    params = client._get_safe_params(custom_params={"temperature": 0.8})
+    releases = [ReleaseInfo("0.95.0", "test"), ReleaseInfo("0.96.0", "test")]
+    result = client.convert_blogs_to_instructions_batch(
+        [(releases[0], "content 95"), (releases[1], "content 96")]
+    )
+
+    assert result == {"0.95.0": "instructions 95"}
+
+    # One request line per release, keyed by version
+    uploaded = mock_create_file.call_args[1]["file"][1].decode("utf-8").splitlines()
+    requests = [json.loads(line) for line in uploaded]
+    assert [r["custom_id"] for r in requests] == ["0.95.0", "0.96.0"]
+    assert requests[0]["body"]["model"] == "gpt-4"
+    assert requests[0]["url"] == "/v1/chat/completions"
+
+    assert mock_create_batch.call_args[1]["completion_window"] == "24h"
+    mock_retrieve_batch.assert_called_once()
+    mock_file_content.assert_called_once_with(file_id="file-out", custom_llm_provider="openai")
+
+
+@patch('litellm.file_content')
+@patch('litellm.retrieve_batch')
+@patch('litellm.create_batch')
+@patch('litellm.create_file')
+def test_analyze_scripts_batch_job(
+    mock_create_file, mock_create_batch, mock_retrieve_batch, mock_file_content
+):
+    """Test that scripts are analyzed in one batch job and results mapped by path."""
+    import json
+    from pathlib import Path
 
-    assert params["temperature"] == 0.8
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
 
+    mock_create_file.return_value.id = "file-in"
+    mock_create_batch.return_value = MagicMock(
+        id="batch-1", status="completed", output_file_id="file-out"
+    )
 
-def test_safe_params_filters_unsupported():
-    """Test that unsupported parameters are filtered out."""
-    config = Config(
-        llm_provider="openai",
-        llm_model="gpt-5",  # Doesn't support temperature
-        llm_params={"temperature": 0.5, "max_tokens": 2000}
+    issues = [{"description": "Old syntax", "suggested_fix": "New syntax", "severity": "error"}]
+    mock_file_content.return_value.content = "\n".join([
+        json.dumps({
+            "custom_id": "a.nu",
+            "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "COMPATIBLE"}}]}}
+        }),
+        json.dumps({
+            "custom_id": "b.nu",
+            "response": {"status_code": 200, "body": {"choices": [{"message": {"content": json.dumps(issues)}}]}}
+        }),
+        json.dumps({"custom_id": "c.nu", "response": None, "error": {"message": "failed"}}),
+    ]).encode("utf-8")
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    scripts = [
+        ScriptFile(Path(name), "0.90.0", CompatibilityMethod.COMMENT_HEADER, content="echo 'test'")
+        for name in ("a.nu", "b.nu", "c.nu")
+    ]
+    result = client.analyze_scripts_batch_job(
+        [(script, ["instructions"]) for script in scripts], "0.95.0"
     )
+
+    assert result["a.nu"] == []
+    assert [issue.description for issue in result["b.nu"]] == ["Old syntax"]
+    assert "c.nu" not in result
+
+    uploaded = mock_create_file.call_args[1]["file"][1].decode("utf-8").splitlines()
+    assert [json.loads(line)["custom_id"] for line in uploaded] == ["a.nu", "b.nu", "c.nu"]
+    mock_retrieve_batch.assert_not_called()
+
+
+@patch('litellm.completion')
+def test_shared_http_client(mock_completion):
+    """Test that OpenAI requests share one pooled HTTP client, passed per request, until closed."""
+    import litellm
+
+    config = Config(llm_provider="openai", llm_model="gpt-4", api_key="sk-test", max_concurrency=4)
     client = LLMClient(config)
+    client._completion("first")
+    client._completion("second")
+
+    sent = {id(call.kwargs["client"]) for call in mock_completion.call_args_list}
+    assert sent == {id(client.request_client)}
+    assert client.request_client._client is client.http_client
+    assert litellm.client_session is None
+
+    # LiteLLM already retries each request, so the SDK must not retry on top
+    assert client.request_client.max_retries == 0
+
+    client.close()
+    assert client.http_client.is_closed
+
+    # LiteLLM keeps its own clients for providers that don't use the OpenAI SDK,
+    # so no pool is opened for them
+    other = LLMClient(Config(llm_provider="anthropic", llm_model="claude"))
+    assert other.request_client is None
+    assert other.http_client is None
+    other.close()
+
+
+@patch('litellm.acompletion', new_callable=AsyncMock)
+def test_shared_async_http_client(mock_acompletion):
+    """Test that async requests share a pooled client per event loop, closed with the loop."""
+    import litellm
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4", api_key="sk-test"))
 
-    params = client._get_safe_params()
+    async def two_requests():
+        async with client.async_requests():
+            await client._acompletion("first")
+            first_client = mock_acompletion.call_args.kwargs["client"]
+            await client._acompletion("second")
+            pool = client.async_http_client
+            assert mock_acompletion.call_args.kwargs["client"] is first_client
+            assert first_client._client is pool
+            assert first_client.max_retries == 0
+        return pool
 
-    assert "temperature" not in params  # Should be filtered out
-    assert params["max_tokens"] == 2000  # Should be included
+    pool = asyncio.run(two_requests())
+    assert pool.is_closed
+    assert client.async_http_client is None
+    assert litellm.aclient_session is None
+
+    # Connections can't be reused from another event loop
+    assert asyncio.run(two_requests()) is not pool
 
 
 @patch('litellm.completion')
-def test_convert_blog_to_instructions_uses_safe_params(mock_completion):
-    """Test that convert_blog_to_instructions uses safe parameters."""
+def test_analyze_scripts_batch(mock_completion):
+    """Test that several scripts are analyzed in one request and results split per script."""
+    from pathlib import Path
+
+    import pytest
+
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = """[
+        {"script_id": 2, "issues": [{"description": "Old syntax", "severity": "error"}]},
+        {"script_id": 1, "issues": []}
+    ]"""
+    mock_completion.return_value = mock_response
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    scripts = [
+        ScriptFile(Path(f"test{i}.nu"), "0.90.0", CompatibilityMethod.COMMENT_HEADER, content="echo 'test'")
+        for i in range(2)
+    ]
+
+    results = client.analyze_scripts_batch(scripts, "0.95.0", ["shared instructions"])
+
+    mock_completion.assert_called_once()
+    system, user = mock_completion.call_args[1]["messages"]
+    assert system["role"] == "system"
+    assert system["content"].count("shared instructions") == 1
+    assert "shared instructions" not in user["content"]
+    assert "### Script 2" in user["content"]
+
+    assert results[0] == []
+    assert len(results[1]) == 1
+    assert results[1][0].description == "Old syntax"
+    assert results[1][0].severity == "error"
+
+    # A response that doesn't cover every script is rejected
+    mock_response.choices[0].message.content = '[{"script_id": 1, "issues": []}]'
+    with pytest.raises(ValueError):
+        client.analyze_scripts_batch(scripts, "0.95.0", ["shared instructions"])
+
+
+
+@patch('litellm.completion')
+def test_completion_retries_with_backoff(mock_completion):
+    """Test that LLM requests ask litellm to retry with exponential backoff."""
     from nushell_verifier.models import ReleaseInfo
 
-    # Mock the response
     mock_response = MagicMock()
-    mock_response.choices[0].message.content = "Test instructions"
+    mock_response.choices[0].message.content = "instructions"
     mock_completion.return_value = mock_response
 
-    config = Config(llm_provider="openai", llm_model="gpt-5")  # No temperature support
-    client = LLMClient(config)
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    client.convert_blog_to_instructions_streaming(ReleaseInfo(version="0.95.0", blog_post_url="test"), "blog")
+
+    call_kwargs = mock_completion.call_args[1]
+    assert call_kwargs["num_retries"] == LLMClient.NUM_RETRIES
+    assert call_kwargs["retry_strategy"] == "exponential_backoff_retry"
+
 
+@patch('litellm.acompletion', new_callable=AsyncMock)
+def test_async_instructions_use_acompletion(mock_acompletion):
+    """Test that async instruction generation awaits litellm.acompletion with safe parameters."""
+    from nushell_verifier.models import ReleaseInfo
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "  instructions  "
+    mock_acompletion.return_value = mock_response
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4", temperature=0.2))
     release = ReleaseInfo(version="0.95.0", blog_post_url="test")
-    client.convert_blog_to_instructions(release, "test content")
 
-    # Verify the call was made without temperature
-    mock_completion.assert_called_once()
-    call_args = mock_completion.call_args
+    assert asyncio.run(client.convert_blog_to_instructions_async(release, "blog")) == "instructions"
+    assert mock_acompletion.call_args[1]["temperature"] == 0.2
+    assert mock_acompletion.call_args[1]["num_retries"] == LLMClient.NUM_RETRIES
 
-    assert "temperature" not in call_args[1]
-    assert "max_tokens" in call_args[1]
-    assert call_args[1]["model"] == "openai/gpt-5"
+
+@patch('litellm.completion')
+def test_stream_completion_coalesces_callbacks(mock_completion):
+    """Test that streamed content reaches the progress callback in coalesced updates."""
+    def chunk(content=None, usage=None):
+        return MagicMock(choices=[MagicMock(delta=MagicMock(content=content))], usage=usage)
+
+    mock_completion.return_value = iter(
+        [chunk(f"token{i} ") for i in range(100)]
+        + [MagicMock(choices=[], usage="usage info")]
+    )
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    updates = []
+    result = client._stream_completion("prompt", updates.append)
+
+    assert result == " ".join(f"token{i}" for i in range(100))
+    # All content arrives before the usage update, in far fewer calls than tokens
+    assert "".join(updates[:-1]) == "".join(f"token{i} " for i in range(100))
+    assert updates[-1] == "__USAGE__usage info"
+    assert len(updates) < 10
 
 
 @patch('litellm.completion')
-@patch('builtins.open')
-def test_analyze_script_compatibility_uses_safe_params(mock_open, mock_completion):
-    """Test that analyze_script_compatibility uses safe parameters."""
-    from nushell_verifier.models import ScriptFile, CompatibilityMethod
+def test_stream_completion_falls_back_to_regular_completion(mock_completion):
+    """Test that a failed streaming request is retried as a regular completion."""
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "  COMPATIBLE  "
+    mock_completion.side_effect = [RuntimeError("streaming unsupported"), mock_response]
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    updates = []
+
+    assert client._stream_completion("prompt", updates.append) == "COMPATIBLE"
+    assert mock_completion.call_args_list[0][1]["stream"] is True
+    assert "stream" not in mock_completion.call_args_list[1][1]
+
+
+@patch('litellm.completion')
+def test_stream_completion_does_not_repeat_partial_stream(mock_completion):
+    """Test that a stream failing after content was reported is not retried."""
+    def stream():
+        yield MagicMock(choices=[MagicMock(delta=MagicMock(content="partial "))], usage=None)
+        raise RuntimeError("connection reset")
+
+    mock_completion.return_value = stream()
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    client.STREAM_CALLBACK_INTERVAL = 0
+    updates = []
+
+    with pytest.raises(RuntimeError, match="connection reset"):
+        client._stream_completion("prompt", updates.append)
+    assert mock_completion.call_count == 1
+    assert updates == ["partial "]
+
+
+def test_parse_analysis_response():
+    """Test parsing issue arrays, compatible responses and free-form text."""
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+
+    assert client._parse_analysis_response("COMPATIBLE") == []
+
+    issues = client._parse_analysis_response(
+        '[{"description": "Old syntax", "suggested_fix": "New syntax", "severity": "error"},'
+        ' {"description": "Deprecated flag"}]'
+    )
+    assert [(i.description, i.suggested_fix, i.severity) for i in issues] == [
+        ("Old syntax", "New syntax", "error"),
+        ("Deprecated flag", None, "warning"),
+    ]
+
+    # Responses that aren't JSON are reported as a single issue
+    issues = client._parse_analysis_response("The script uses removed commands")
+    assert len(issues) == 1
+    assert issues[0].description == "The script uses removed commands"
+
+
+@patch('litellm.completion')
+def test_issues_reported_while_streaming(mock_completion):
+    """Test that each issue reaches the issue callback as soon as it is complete."""
+    import json
     from pathlib import Path
 
-    # Mock file reading
-    mock_open.return_value.__enter__.return_value.read.return_value = "echo 'test'"
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
+
+    response = json.dumps([
+        {"description": "Old {syntax}", "suggested_fix": "New syntax", "severity": "error"},
+        {"description": "Deprecated flag"},
+    ])
+    first_issue_end = response.index("}, {") + 1
+    reported = []
+
+    def stream():
+        # Stream one character at a time; the first issue is reported right
+        # after its closing brace, before the second one has arrived
+        for position, char in enumerate(response):
+            if position == first_issue_end - 1:
+                assert reported == []
+            elif position == first_issue_end:
+                assert len(reported) == 1
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=char))], usage=None)
+
+    mock_completion.return_value = stream()
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    client.STREAM_CALLBACK_INTERVAL = 0
+    script = ScriptFile(Path("test.nu"), "0.90.0", CompatibilityMethod.COMMENT_HEADER, content="echo 'test'")
+
+    issues = client.analyze_script_compatibility_streaming(
+        script, "0.95.0", ["instructions"], issue_callback=reported.append
+    )
 
-    # Mock the response
-    mock_response = MagicMock()
-    mock_response.choices[0].message.content = "COMPATIBLE"
-    mock_completion.return_value = mock_response
+    assert [issue.description for issue in reported] == ["Old {syntax}", "Deprecated flag"]
+    assert issues == reported
 
-    config = Config(llm_provider="openai", llm_model="gpt-4", temperature=0.2)
-    client = LLMClient(config)
 
-    script = ScriptFile(
-        path=Path("test.nu"),
-        compatible_version="0.90.0",
-        method=CompatibilityMethod.COMMENT_HEADER
+def test_analysis_prompt_shares_system_message():
+    """Test that scripts checked against the same instructions share their system message."""
+    from pathlib import Path
+
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
+
+    scripts = [
+        ScriptFile(Path(f"test{i}.nu"), "0.90.0", CompatibilityMethod.COMMENT_HEADER, content="echo 'test'")
+        for i in range(2)
+    ]
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    first, second = (
+        client._build_analysis_prompt(script, "0.95.0", ["instructions"]) for script in scripts
     )
 
-    result = client.analyze_script_compatibility(script, "0.95.0", ["test instructions"])
+    assert first[0] == second[0] == {"role": "system", "content": first[0]["content"]}
+    assert "instructions" in first[0]["content"]
+    assert first[1]["role"] == "user"
+    assert "test0.nu" in first[1]["content"] and "test1.nu" in second[1]["content"]
 
-    # Verify the call was made with correct temperature
-    mock_completion.assert_called_once()
-    call_args = mock_completion.call_args
+    # Anthropic only caches prompt prefixes that are marked for it
+    client = LLMClient(Config(llm_provider="anthropic", llm_model="claude-sonnet-4"))
+    system = client._build_analysis_prompt(scripts[0], "0.95.0", ["instructions"])[0]
+    assert system["content"][0]["cache_control"] == {"type": "ephemeral"}
 
-    assert call_args[1]["temperature"] == 0.2
-    assert "max_tokens" in call_args[1]
-    assert result == []  # COMPATIBLE response should return empty list
\ No newline at end of file
+
+def test_count_tokens():
+    """Test that tokens are counted with the model's tokenizer."""
+    from nushell_verifier.llm_client import count_tokens
+
+    assert count_tokens("openai/gpt-4", "") == 0
+    assert 0 < count_tokens("openai/gpt-4", "ls | where type == file") < 20
+
+    with patch('litellm.encode', side_effect=ValueError("no tokenizer")):
+        assert count_tokens("openai/gpt-4", "ls") is None
+
+
+def test_read_script_large_file(tmp_path):
+    """Test that large scripts are read through a memory map with text mode newlines."""
+    import mmap
+
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
+
+    content = "echo 'héllo'\r\n" * 10000
+    path = tmp_path / "large.nu"
+    path.write_bytes(content.encode("utf-8") + b"\xff")
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))
+    script = ScriptFile(path, "0.90.0", CompatibilityMethod.COMMENT_HEADER, size=len(content))
+    assert script.size >= ScriptFile.MMAP_THRESHOLD
+
+    with patch('mmap.mmap', wraps=mmap.mmap) as mock_mmap:
+        assert client._read_script(script) == content.replace("\r\n", "\n")
+    mock_mmap.assert_called_once()
+
+    # Small scripts are read directly
+    script.size = 10
+    script.content = None
+    with patch('mmap.mmap') as mock_mmap:
+        assert client._read_script(script) == content.replace("\r\n", "\n")
+    mock_mmap.assert_not_called()
+
+    # Later reads reuse the content kept on the script
+    with patch('builtins.open') as mock_open:
+        assert client._read_script(script) == content.replace("\r\n", "\n")
+    mock_open.assert_not_called()
+
+
+@patch('litellm.completion')
+def test_api_key_passed_per_request(mock_completion, monkeypatch):
+    """Test that the configured API key is sent with requests instead of set in the environment."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "COMPATIBLE"
+    mock_completion.return_value = mock_response
+
+    client = LLMClient(Config(llm_provider="openai", llm_model="gpt-4", api_key="sk-configured"))
+    client._stream_completion("prompt")
+
+    assert mock_completion.call_args[1]["api_key"] == "sk-configured"
+    assert "OPENAI_API_KEY" not in os.environ
+
+    # Without a configured key, LiteLLM reads the provider's environment variable
+    LLMClient(Config(llm_provider="openai", llm_model="gpt-4"))._stream_completion("prompt")
+    assert "api_key" not in mock_completion.call_args[1]
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from nushell_verifier.models import (
+    CompatibilityIssue,
+    CompatibilityMethod,
+    ScriptAnalysis,
+    ScriptFile,
+)
+from nushell_verifier.reporter import Reporter
+
+
+def _analysis(name: str, issues=()) -> ScriptAnalysis:
+    script = ScriptFile(Path(name), "0.90.0", CompatibilityMethod.COMMENT_HEADER)
+    return ScriptAnalysis(script, "0.95.0", list(issues), is_compatible=not issues)
+
+
+def test_generate_report_writes_once(capsys):
+    """Test that the whole report is written to stdout in a single write."""
+    analyses = [
+        _analysis("ok.nu"),
+        _analysis("old.nu", [CompatibilityIssue("Old syntax", "New syntax", "error")]),
+    ]
+
+    with patch('sys.stdout.write', wraps=sys.stdout.write) as mock_write:
+        Reporter(verbose=True).generate_report(analyses)
+    mock_write.assert_called_once()
+
+    output = capsys.readouterr().out
+    assert "Total scripts: 2" in output
+    assert "🔴 ERROR 1: Old syntax" in output
+    assert "💡 Fix: New syntax" in output
+    assert "✅ ok.nu (compatible with 0.95.0)" in output
+    assert "❌ 1 script(s) need attention" in output
+
+
+def test_issues_grouped_by_severity(capsys):
+    """Test that issues are listed by severity, with unknown severities shown as info."""
+    analysis = _analysis("old.nu", [
+        CompatibilityIssue("Note", severity="info"),
+        CompatibilityIssue("Broken", severity="error"),
+        CompatibilityIssue("Odd", severity="critical"),
+        CompatibilityIssue("Deprecated", severity="warning"),
+    ])
+
+    Reporter().generate_report([analysis])
+
+    lines = [line.strip() for line in capsys.readouterr().out.splitlines() if line.startswith("   ")]
+    assert lines[3:] == [
+        "🔴 ERROR 1: Broken",
+        "🟡 WARNING 1: Deprecated",
+        "🔵 INFO 1: Note",
+        "🔵 INFO 2: Odd",
+    ]
@@ -0,0 +1,218 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from nushell_verifier.models import CompatibilityMethod, ScriptFile
+from nushell_verifier.patterns import is_nushell_shebang
+from nushell_verifier.scanner import (
+    MAX_SHEBANG_LENGTH,
+    NuShellScriptScanner,
+    split_by_target_version,
+)
+
+
+def test_scan_directory_finds_scripts(tmp_path):
+    """Test that scripts are found by extension or shebang in nested directories."""
+    nested = tmp_path / "config" / "nushell"
+    nested.mkdir(parents=True)
+    (nested / "env.nu").write_text("$env.FOO = 1\n")
+    (tmp_path / "tool").write_text("#!/usr/bin/env nu\nprint hi\n")
+    (tmp_path / "other").write_text("#!/bin/sh\necho hi\n")
+    (tmp_path / "notes.txt").write_text("#!/usr/bin/env nu\n")
+    (tmp_path / ".hidden").write_text("#!/usr/bin/env nu\n")
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    scripts = scanner.scan_directory(tmp_path)
+
+    assert sorted(script.path.name for script in scripts) == [".hidden", "env.nu", "tool"]
+    assert next(s for s in scripts if s.path.name == "tool").has_shebang
+
+
+def test_scan_directory_skips_symlinked_directories(tmp_path):
+    """Test that symlinked directories aren't followed, while symlinked files are found."""
+    scripts_dir = tmp_path / "scripts"
+    scripts_dir.mkdir()
+    (scripts_dir / "a.nu").write_text("ls\n")
+
+    scan_dir = tmp_path / "scan"
+    scan_dir.mkdir()
+    (scan_dir / "linked").symlink_to(scripts_dir, target_is_directory=True)
+    (scan_dir / "b.nu").symlink_to(scripts_dir / "a.nu")
+
+    scanner = NuShellScriptScanner([str(scan_dir)])
+    assert [script.path.name for script in scanner.scan_directory(scan_dir)] == ["b.nu"]
+
+
+def test_is_nushell_shebang():
+    """Test shebang detection for NuShell and other interpreters."""
+    assert is_nushell_shebang("#!/usr/bin/env nu")
+    assert is_nushell_shebang("#!/usr/local/bin/nushell --stdin")
+    assert not is_nushell_shebang("#!/bin/bash")
+    assert not is_nushell_shebang("# nu")
+    assert not is_nushell_shebang("")
+    assert is_nushell_shebang("#!/usr/bin/env nu\n")
+
+
+def test_shebang_read_is_bounded(tmp_path):
+    """Test that extensionless files without newlines aren't read whole."""
+    (tmp_path / "blob").write_text("x" * 100000)
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    with patch('nushell_verifier.scanner.is_nushell_shebang', return_value=False) as mock_check:
+        assert scanner.scan_directory(tmp_path) == []
+
+    assert len(mock_check.call_args[0][0]) == MAX_SHEBANG_LENGTH
+
+
+def test_shebang_detected_like_script_header(tmp_path):
+    """Test that extensionless files are matched on their unstripped first line."""
+    (tmp_path / "crlf").write_text("#!/usr/bin/env nu\r\nprint hi\r\n", newline="")
+    (tmp_path / "indented").write_text("  #!/usr/bin/env nu\nprint hi\n")
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    scripts = scanner.scan_directory(tmp_path)
+
+    # A shebang only counts at the very start of the file
+    assert [script.path.name for script in scripts] == ["crlf"]
+    assert scripts[0].has_shebang
+
+
+def test_analyze_script_file_reads_only_header(tmp_path):
+    """Test that scanning records the file size without reading past the header."""
+    path = tmp_path / "long.nu"
+    path.write_text("# nushell-compatible-with: 0.95.0\n" + "ls\n" * 10000)
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    with patch.object(scanner, '_find_compatible_version', wraps=scanner._find_compatible_version) as mock_find:
+        script = scanner._analyze_script_file(path)
+
+    assert script.compatible_version == "0.95.0"
+    assert script.size == path.stat().st_size
+    assert len(mock_find.call_args[0][1]) == NuShellScriptScanner.HEADER_LINES
+
+
+def test_directory_version_lookups_are_cached(tmp_path):
+    """Test that each version file is read once, however many scripts it covers."""
+    (tmp_path / ".compatible-nushell-version").write_text("0.95.0\n")
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    paths = [tmp_path / "a" / "three.nu", nested / "one.nu", nested / "two.nu"]
+    with patch('builtins.open', wraps=open) as mock_open:
+        versions = [scanner._find_compatible_version(path, []) for path in paths]
+
+    assert {version for version, _ in versions} == {"0.95.0"}
+    opened = [str(call.args[0]) for call in mock_open.call_args_list]
+    assert opened == [str(tmp_path / ".compatible-nushell-version")]
+
+
+def test_scan_directory_keeps_walk_order(tmp_path):
+    """Test that scripts read concurrently are returned in the order they were found."""
+    for i in range(50):
+        (tmp_path / f"script{i:02}.nu").write_text(f"# nushell-compatible-with: 0.{i}.0\n")
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    found = [Path(path) for path in scanner._find_nushell_files(tmp_path)]
+    scripts = scanner.scan_directory(tmp_path)
+
+    assert [script.path for script in scripts] == found
+    assert all(script.compatible_version == f"0.{int(script.path.stem[6:])}.0" for script in scripts)
+
+
+def test_version_comment_found_in_header(tmp_path):
+    """Test that the version comment is found among other header comments, but not after code."""
+    scanner = NuShellScriptScanner([str(tmp_path)])
+
+    version, _ = scanner._find_compatible_version(tmp_path / "a.nu", [
+        "#!/usr/bin/env nu\n", "#\n", "# Tool description\n", "# nushell-compatible-with: 0.95.0\n"
+    ])
+    assert version == "0.95.0"
+
+    _, method = scanner._find_compatible_version(tmp_path / "a.nu", [
+        "ls\n", "# nushell-compatible-with: 0.95.0\n"
+    ])
+    assert method == CompatibilityMethod.DEFAULT_ASSUMPTION
+
+
+def test_shebang_checks_cached_until_file_changes(tmp_path):
+    """Test that rescanning doesn't reread unchanged extensionless files."""
+    import os
+
+    tool = tmp_path / "tool"
+    tool.write_text("#!/usr/bin/env nu\n")
+    scanner = NuShellScriptScanner([str(tmp_path)])
+
+    def shebang_reads():
+        with patch('builtins.open', wraps=open) as mock_open:
+            found = list(scanner._find_nushell_files(tmp_path))
+        return found, len(mock_open.call_args_list)
+
+    assert shebang_reads() == ([tool], 1)
+    assert shebang_reads() == ([tool], 0)
+
+    tool.write_text("#!/bin/sh\n")
+    os.utime(tool, ns=(0, 0))
+    assert shebang_reads() == ([], 1)
+
+
+def test_version_files_recorded_while_scanning(tmp_path):
+    """Test that version files found by the scan are used without reading them again."""
+    (tmp_path / ".compatible-nushell-version").write_text("0.95.0\n")
+    nested = tmp_path / "a"
+    nested.mkdir()
+    (nested / ".compatible-nushell-version").write_text("0.97.0\n")
+    (nested / "one.nu").write_text("ls\n")
+    (tmp_path / "two.nu").write_text("ls\n")
+
+    scanner = NuShellScriptScanner([str(tmp_path)])
+    with patch('builtins.open', wraps=open) as mock_open:
+        scripts = scanner.scan_directory(tmp_path)
+
+    assert {script.path.name: script.compatible_version for script in scripts} == {
+        "one.nu": "0.97.0", "two.nu": "0.95.0"
+    }
+    opened = [str(call.args[0]) for call in mock_open.call_args_list]
+    assert len([path for path in opened if path.endswith(".compatible-nushell-version")]) == 2
+
+
+def test_directory_version_stays_within_scan_directory(tmp_path):
+    """Test that version files outside the scan directory aren't used."""
+    (tmp_path / ".compatible-nushell-version").write_text("0.95.0\n")
+    scan_dir = tmp_path / "scripts"
+    sibling = tmp_path / "scripts-old"
+    for directory in (scan_dir, sibling):
+        directory.mkdir()
+    (sibling / ".compatible-nushell-version").write_text("0.80.0\n")
+
+    scanner = NuShellScriptScanner([str(scan_dir)])
+    assert scanner._find_directory_version(scan_dir, scan_dir) is None
+    assert scanner._find_directory_version(sibling, scan_dir) is None
+
+
+def test_unrelated_scan_directories_are_not_indexed(tmp_path):
+    """Test that looking up a script's version doesn't walk scan directories it isn't in."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    for directory in (first, second):
+        directory.mkdir()
+    (first / "script.nu").write_text("ls\n")
+
+    scanner = NuShellScriptScanner([str(first), str(second)])
+    scanner.scan_directory(first)
+
+    with patch.object(scanner, '_scandir_recursive', wraps=scanner._scandir_recursive) as walk:
+        assert scanner._find_directory_version(first, second) is None
+    walk.assert_not_called()
+    assert second not in scanner._indexed_directories
+
+
+def test_split_by_target_version():
+    """Test that scripts at or past the target version are split from the rest, in order."""
+    scripts = [
+        ScriptFile(Path(f"{version}.nu"), version, CompatibilityMethod.COMMENT_HEADER)
+        for version in ["0.96.0", "0.90.0", "0.95.0", "0.100.0", "0.94.9"]
+    ]
+
+    compatible, pending = split_by_target_version(scripts, "0.95.0")
+
+    assert [script.compatible_version for script in compatible] == ["0.96.0", "0.95.0", "0.100.0"]
+    assert [script.compatible_version for script in pending] == ["0.90.0", "0.94.9"]
@@ -1,4 +1,4 @@
-from nushell_verifier.version_manager import VersionManager
+from nushell_verifier.version_manager import VersionManager, parse_version
 
 
 def test_calculate_default_version():
@@ -54,6 +54,48 @@ def test_is_version_same_or_after():
     assert vm.is_version_same_or_after("0.95.0", "v0.95.0")
 
 
+def test_version_key():
+    """Test version key parsing."""
+    vm = VersionManager()
+
+    assert vm.version_key("0.95.0") == (0, 95, 0)
+    assert vm.version_key("v1.2.3") == (1, 2, 3)
+    assert vm.version_key("invalid") == (0, 0, 0)
+    assert vm.version_key("0.99.0") < vm.version_key("0.100.0")
+
+
+def test_model_version_keys():
+    """Test that script and release version keys follow their version strings."""
+    from pathlib import Path
+
+    from nushell_verifier.models import CompatibilityMethod, ReleaseInfo, ScriptFile
+
+    script = ScriptFile(Path("test.nu"), "0.95.0", CompatibilityMethod.DEFAULT_ASSUMPTION)
+    assert script.version_key == (0, 95, 0)
+
+    # Default versions are assigned after scanning, so the key must track updates
+    script.compatible_version = "0.101.0"
+    assert script.version_key == (0, 101, 0)
+
+    assert ReleaseInfo("0.107.0", None).version_key == parse_version("0.107.0")
+
+
+def test_script_versions_interned():
+    """Test that scripts with equal versions share one version string."""
+    from pathlib import Path
+
+    from nushell_verifier.models import CompatibilityMethod, ScriptFile
+
+    versions = ["".join(["0.95", ".0"]) for _ in range(2)]
+    assert versions[0] is not versions[1]
+
+    scripts = [
+        ScriptFile(Path(f"test{i}.nu"), version, CompatibilityMethod.COMMENT_HEADER)
+        for i, version in enumerate(versions)
+    ]
+    assert scripts[0].compatible_version is scripts[1].compatible_version
+
+
 def test_update_version_comment():
     """Test version comment updating."""
     vm = VersionManager()
@@ -75,4 +117,15 @@ def test_update_version_comment():
     ]
     result = vm.update_version_comment(lines, "0.95.0")
     assert "# nushell-compatible-with: 0.95.0\n" in result
-    assert "# nushell-compatible-with: 0.90.0\n" not in result
\ No newline at end of file
+    assert "# nushell-compatible-with: 0.90.0\n" not in result
+
+    # Comments past the header aren't treated as version comments
+    lines = ["# comment\n"] * 20 + ["# nushell-compatible-with: 0.90.0\n", "echo 'hello'\n"]
+    result = vm.update_version_comment(lines, "0.95.0")
+    assert result[0] == "# nushell-compatible-with: 0.95.0\n"
+    assert "# nushell-compatible-with: 0.90.0\n" in result
+
+    # A comment missing its version is replaced, however it's spaced
+    lines = ["#!/usr/bin/env nu\n", "  #nushell-compatible-with:\n", "echo 'hello'\n"]
+    result = vm.update_version_comment(lines, "0.95.0")
+    assert result == ["#!/usr/bin/env nu\n", "# nushell-compatible-with: 0.95.0\n", "echo 'hello'\n"]
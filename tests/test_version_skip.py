@@ -48,8 +48,7 @@ class TestVersionSkipping:
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
-    @patch('builtins.print')
-    def test_skip_compatible_script_same_version(self, mock_print, mock_scanner, mock_llm, mock_github):
+    def test_skip_compatible_script_same_version(self, mock_scanner, mock_llm, mock_github, capsys):
         """Test skipping script with same version as target."""
         # Create test script
         script_path = Path(self.temp_dir.name) / "test.nu"
@@ -82,18 +81,16 @@ class TestVersionSkipping:
 
         # Verify LLM was not called for analysis
         mock_llm.return_value.analyze_script_compatibility_streaming.assert_not_called()
-        mock_llm.return_value.analyze_script_compatibility.assert_not_called()
 
         # Verify skip message was printed
-        print_calls = [call[0][0] for call in mock_print.call_args_list if call and call[0]]
+        print_calls = capsys.readouterr().out.splitlines()
         skip_messages = [msg for msg in print_calls if "⏭️" in str(msg) and "Already compatible" in str(msg)]
         assert len(skip_messages) > 0
 
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
-    @patch('builtins.print')
-    def test_skip_compatible_script_newer_version(self, mock_print, mock_scanner, mock_llm, mock_github):
+    def test_skip_compatible_script_newer_version(self, mock_scanner, mock_llm, mock_github, capsys):
         """Test skipping script with newer version than target."""
         # Create test script
         script_path = Path(self.temp_dir.name) / "test.nu"
@@ -124,15 +121,14 @@ class TestVersionSkipping:
         assert results[0].is_compatible
 
         # Verify skip message shows correct versions
-        print_calls = [call[0][0] for call in mock_print.call_args_list if call and call[0]]
+        print_calls = capsys.readouterr().out.splitlines()
         skip_messages = [msg for msg in print_calls if "v0.98.0 >= v0.97.0" in str(msg)]
         assert len(skip_messages) > 0
 
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
-    @patch('builtins.print')
-    def test_analyze_older_script(self, mock_print, mock_scanner, mock_llm, mock_github):
+    def test_analyze_older_script(self, mock_scanner, mock_llm, mock_github, capsys):
         """Test that scripts with older versions are still analyzed."""
         # Create test script
         script_path = Path(self.temp_dir.name) / "test.nu"
@@ -169,15 +165,14 @@ class TestVersionSkipping:
         mock_llm_instance.analyze_script_compatibility_streaming.assert_called_once()
 
         # Verify no skip message was printed
-        print_calls = [call[0][0] for call in mock_print.call_args_list if call and call[0]]
+        print_calls = capsys.readouterr().out.splitlines()
         skip_messages = [msg for msg in print_calls if "⏭️" in str(msg)]
         assert len(skip_messages) == 0
 
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
-    @patch('builtins.print')
-    def test_mixed_script_versions(self, mock_print, mock_scanner, mock_llm, mock_github):
+    def test_mixed_script_versions(self, mock_scanner, mock_llm, mock_github, capsys):
         """Test mix of scripts - some skipped, some analyzed."""
         # Create test scripts
         script1_path = Path(self.temp_dir.name) / "old.nu"
@@ -219,7 +214,7 @@ class TestVersionSkipping:
         assert mock_llm_instance.analyze_script_compatibility_streaming.call_count == 1
 
         # Verify skip messages for compatible scripts
-        print_calls = [call[0][0] for call in mock_print.call_args_list if call and call[0]]
+        print_calls = capsys.readouterr().out.splitlines()
         skip_messages = [msg for msg in print_calls if "⏭️" in str(msg) and "Already compatible" in str(msg)]
         assert len(skip_messages) == 2  # current.nu and newer.nu should be skipped
 
@@ -235,6 +230,32 @@ class TestVersionSkipping:
         assert vm.is_version_same_or_after("invalid", "0.97.0") is False
         assert vm.is_version_same_or_after("0.97.0", "invalid") is True  # Valid >= invalid(0.0.0)
 
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    def test_relevant_instructions_by_version(self, mock_scanner, mock_llm, mock_github):
+        """Test that each compatible version gets instructions only for newer releases."""
+        from nushell_verifier.models import ReleaseInfo
+
+        releases = [
+            ReleaseInfo("0.97.0", "url", compatibility_instructions="instructions 97"),
+            ReleaseInfo("0.96.0", "url", compatibility_instructions=None),
+            ReleaseInfo("0.95.0", "url", compatibility_instructions="instructions 95"),
+            ReleaseInfo("0.100.0", "url", compatibility_instructions="instructions 100"),
+        ]
+
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        relevant = analyzer._get_relevant_instructions_by_version(
+            releases, {"0.94.0", "0.95.0", "0.97.0", "0.100.0"}
+        )
+
+        assert relevant == {
+            "0.94.0": ["instructions 95", "instructions 97", "instructions 100"],
+            "0.95.0": ["instructions 97", "instructions 100"],
+            "0.97.0": ["instructions 100"],
+            "0.100.0": [],
+        }
+
     @patch('nushell_verifier.analyzer.GitHubClient')
     @patch('nushell_verifier.analyzer.LLMClient')
     @patch('nushell_verifier.analyzer.NuShellScriptScanner')
@@ -266,4 +287,31 @@ class TestVersionSkipping:
 
         # Verify script was skipped properly
         assert len(results) == 1
-        assert results[0].is_compatible
\ No newline at end of file
+        assert results[0].is_compatible
+    @patch('nushell_verifier.analyzer.GitHubClient')
+    @patch('nushell_verifier.analyzer.LLMClient')
+    @patch('nushell_verifier.analyzer.NuShellScriptScanner')
+    def test_update_version_comment_preserves_body(self, mock_scanner, mock_llm, mock_github):
+        """Test that updating the version comment leaves the rest of the script untouched."""
+        import os
+        import stat
+
+        script_path = Path(self.temp_dir.name) / "test.nu"
+        body = b"".join(f"echo 'line {i}'\r\n".encode() for i in range(10000))
+        script_path.write_bytes(b"#!/usr/bin/env nu\n# nushell-compatible-with: 0.95.0\n\n" + body)
+        os.chmod(script_path, 0o755)
+
+        script = ScriptFile(
+            path=script_path,
+            compatible_version="0.95.0",
+            method=CompatibilityMethod.COMMENT_HEADER
+        )
+
+        analyzer = NuShellAnalyzer(self.config, disable_progress=True)
+        analyzer._update_script_version_comment(script, "0.97.0")
+
+        assert script_path.read_bytes() == (
+            b"#!/usr/bin/env nu\n# nushell-compatible-with: 0.97.0\n\n" + body
+        )
+        assert stat.S_IMODE(script_path.stat().st_mode) == 0o755
+        assert sorted(p.name for p in Path(self.temp_dir.name).iterdir()) == ["test.nu"]